@@ -2,6 +2,7 @@
 define('AJAX_SCRIPT', true);
 require_once(__DIR__ . '/../../../config.php');
 require_once($CFG->dirroot . '/local/ai_functions/libagent.php');
+require_once($CFG->dirroot . '/blocks/ai_assistant/locallib.php');
 
 require_login();
 require_sesskey();
@@ -91,6 +92,19 @@ error_log("Ask Agent - Starting streaming request");
 error_log("Ask Agent - Agent key: {$agentkey}");
 error_log("Ask Agent - User text: {$usertext}");
 
+    // Pre-generated / proxied notes (response_cache.py): replay as the same SSE events libagent emits.
+    $cached_text = block_ai_assistant_response_cache_get('ask_agent', '', 0, $prompt_template, $payload['messages']);
+    if ($cached_text !== null) {
+        foreach (mb_str_split($cached_text, 2048) as $piece) {
+            echo "event: chunk\n";
+            echo "data: " . json_encode(['content' => $piece]) . "\n\n";
+        }
+        echo "event: done\n";
+        echo "data: {}\n\n";
+        flush();
+        exit;
+    }
+
     local_ai_functions_call_endpoint($agentkey, 'ask_agent', $payload);
     
 	error_log("Ask Agent - Streaming completed");
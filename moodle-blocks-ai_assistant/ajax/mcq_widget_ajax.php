@@ -11,6 +11,7 @@ define('AJAX_SCRIPT', true);
 
 require_once(__DIR__ . '/../../../config.php');
 require_once($CFG->dirroot . '/local/ai_functions/libmcq.php');
+require_once($CFG->dirroot . '/blocks/ai_assistant/locallib.php');
 //require_once($CFG->dirroot . '/local/ai_functions/lib_dummy.php');
 
 require_login();
@@ -73,7 +74,44 @@ try {
             $question_count = 5;
     }
     
-    
+    // ==================== CURATED PACK (NO LLM CALL) ====================
+    $pack_data = block_ai_assistant_find_mcq_pack($mainsubjectkey, $subject, $topic, $level, $tags, $question_count);
+    
+    if ($pack_data !== null) {
+        $pack_data['metadata'] = array_merge($pack_data['metadata'], [
+            'level' => $level,
+            'subject' => $subject,
+            'topic' => $topic,
+            'lesson' => $lesson,
+            'target_exam' => $target,
+            'agent_text' => $agenttext,
+            'tags' => $tags,
+            'generated_at' => time(),
+            'api_duration_ms' => 0
+        ]);
+        $pack_metadata = ['source' => 'pack', 'pack_source' => $pack_data['metadata']['source'] ?? null];
+        
+        $history_record = new stdClass();
+        $history_record->userid = $USER->id;
+        $history_record->courseid = $courseid;
+        $history_record->usertext = strtoupper($level) . " MCQ: " . $agenttext;
+        $history_record->botresponse = json_encode($pack_data, JSON_PRETTY_PRINT | JSON_UNESCAPED_UNICODE);
+        $history_record->metadata = json_encode($pack_metadata, JSON_PRETTY_PRINT | JSON_UNESCAPED_UNICODE);
+        $history_record->functioncalled = 'mcq_widget';
+        $history_record->subject = $subject;
+        $history_record->topic = $topic;
+        $history_record->lesson = $lesson;
+        $history_record->timecreated = time();
+        $history_record->timemodified = time();
+        $pack_data['metadata']['history_id'] = $DB->insert_record('block_ai_assistant_history', $history_record);
+        
+        echo json_encode([
+            'status' => 'success',
+            'data' => $pack_data,
+            'api_metadata' => $pack_metadata
+        ], JSON_PRETTY_PRINT | JSON_UNESCAPED_UNICODE);
+        exit;
+    }
     
     // ==================== LOAD EXISTING MCQ PROMPT ====================
 	$prompt_file = $CFG->dirroot . '/blocks/ai_assistant/prompts/mcq_' .$level.'.txt';
@@ -117,8 +155,21 @@ try {
     //error_log('MCQ Widget - Starting non-streaming API call for ' . $question_count . ' questions');
     $start_time = microtime(true);
     
+    // Pre-generated / proxied answer for this exact prompt (response_cache.py), else call the API.
+    $full_response = null;
+    $cached_text = block_ai_assistant_response_cache_get('mcq_widget', $level, $question_count, $prompt_template, $payload['messages']);
+    if ($cached_text !== null) {
+        $full_response = json_encode([
+            'object' => 'chat.completion',
+            'model' => 'response_cache',
+            'choices' => [['message' => ['role' => 'assistant', 'content' => $cached_text], 'finish_reason' => 'stop']]
+        ]);
+    }
+    
     // ✅ Call API - now returns full JSON response
-    $full_response = local_ai_functions_call_endpoint($agentkey, 'mcq', $payload);
+    if ($full_response === null) {
+        $full_response = local_ai_functions_call_endpoint($agentkey, 'mcq', $payload);
+    }
     
     $api_duration = round((microtime(true) - $start_time) * 1000);
     //error_log('MCQ Widget - API call completed in ' . $api_duration . 'ms');
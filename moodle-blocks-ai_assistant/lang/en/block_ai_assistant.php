@@ -44,3 +44,5 @@ $string['view_history'] = 'View full history';
 $string['general_inquiry'] = 'General Inquiry';
 $string['strftimedatetimeshort'] = '%d %B %Y, %I:%M %p'; 
 $string['ai_assistant'] = 'AI Assistant';
+$string['response_cache_dir'] = 'Response cache folder';
+$string['response_cache_dir_desc'] = 'Folder holding response_cache.sqlite3 written by the payload tools. Leave empty to use moodledata/ai_assistant_response_cache. Cached notes and MCQs are served without calling the AI endpoint.';
@@ -0,0 +1,162 @@
+<?php
+// FILE: moodle/blocks/ai_assistant/locallib.php
+// PURPOSE: Helpers shared by the block's AJAX endpoints.
+
+defined('MOODLE_INTERNAL') || die();
+
+/**
+ * Look up a curated MCQ flashcard pack (built by GATE-Chemistry/MCQ/mcq_pack.py).
+ *
+ * Packs live in blocks/ai_assistant/mcq_packs/<mainsubject>/ with an index.json
+ * keyed by "subject_key|topic_key|level"; when subject/topic do not match, the
+ * first pack sharing one of the request tags at the same level is used.
+ *
+ * @param string $mainsubject Course main subject key (e.g. GATECHEM100)
+ * @param string $subject     data-subject of the clicked link (snake_case)
+ * @param string $topic       data-topic of the clicked link (snake_case)
+ * @param string $level       basic | intermediate | advanced
+ * @param string $tags        data-tags of the clicked link (comma separated)
+ * @param int    $count       Number of questions requested
+ * @return array|null Widget data ['questions' => [...], 'metadata' => [...]] or null on a miss
+ */
+function block_ai_assistant_find_mcq_pack(string $mainsubject, string $subject, string $topic,
+        string $level, string $tags, int $count): ?array {
+    global $CFG;
+
+    $mainsubject = clean_param($mainsubject, PARAM_ALPHANUMEXT);
+    if ($mainsubject === '') {
+        return null;
+    }
+
+    $packdir = $CFG->dirroot . '/blocks/ai_assistant/mcq_packs/' . $mainsubject;
+    $indexfile = $packdir . '/index.json';
+    if (!is_readable($indexfile)) {
+        return null;
+    }
+
+    $index = json_decode(file_get_contents($indexfile), true);
+    if (!is_array($index) || empty($index['packs'])) {
+        return null;
+    }
+
+    $entry = $index['packs'][$subject . '|' . $topic . '|' . $level] ?? null;
+
+    if ($entry === null && $tags !== '') {
+        foreach (explode(',', $tags) as $tag) {
+            $keys = $index['tags'][trim($tag) . '|' . $level] ?? [];
+            if (!empty($keys)) {
+                $entry = $index['packs'][$keys[0]] ?? null;
+                break;
+            }
+        }
+    }
+
+    if ($entry === null || empty($entry['file'])) {
+        return null;
+    }
+
+    // Pack paths are written by the packer; refuse anything that escapes the pack folder.
+    $packfile = realpath($packdir . '/' . $entry['file']);
+    if ($packfile === false || strpos($packfile, realpath($packdir) . DIRECTORY_SEPARATOR) !== 0) {
+        return null;
+    }
+
+    $pack = json_decode(file_get_contents($packfile), true);
+    if (!is_array($pack) || empty($pack['questions'])) {
+        return null;
+    }
+
+    // Serve a different selection on repeated clicks.
+    $questions = $pack['questions'];
+    shuffle($questions);
+    if ($count > 0) {
+        $questions = array_slice($questions, 0, $count);
+    }
+
+    $metadata = $pack['metadata'] ?? [];
+    $metadata['count'] = count($questions);
+    $metadata['served_from'] = 'pack';   // keep 'source' (the bank the pack came from) intact
+
+    return ['questions' => array_values($questions), 'metadata' => $metadata];
+}
+
+/**
+ * Folder of the response cache written by new_moodle_payload/response_cache.py.
+ *
+ * @return string
+ */
+function block_ai_assistant_response_cache_dir(): string {
+    global $CFG;
+
+    $dir = (string)get_config('block_ai_assistant', 'response_cache_dir');
+    return $dir !== '' ? $dir : $CFG->dataroot . '/ai_assistant_response_cache';
+}
+
+/**
+ * Cache key; must stay identical to response_cache.cache_key() in Python.
+ *
+ * @param string $function        ask_agent | mcq_widget
+ * @param string $level           MCQ level ('' for ask_agent)
+ * @param int    $number          Question count (0 for ask_agent)
+ * @param string $templatetext    Raw prompts/*.txt contents (version = sha256 prefix)
+ * @param array  $messages        Chat messages sent to the endpoint
+ * @return string
+ */
+function block_ai_assistant_response_cache_key(string $function, string $level, int $number,
+        string $templatetext, array $messages): string {
+    $lines = [];
+    foreach ($messages as $message) {
+        $content = preg_replace('/[ \t\n\r\f\x0B]+/', ' ', (string)($message['content'] ?? ''));
+        $lines[] = ($message['role'] ?? '') . ': ' . trim($content, ' ');
+    }
+    $version = substr(hash('sha256', $templatetext), 0, 12);
+
+    return hash('sha256', implode("\n", ['v1', $function, $level, (string)$number, $version, implode("\n", $lines)]));
+}
+
+/**
+ * Read a pre-generated / proxied response before calling the LLM.
+ *
+ * Never throws: any problem (no pdo_sqlite, no cache folder, locked database)
+ * is a miss so the caller falls back to the endpoint.
+ *
+ * @return string|null Response text or null on a miss
+ */
+function block_ai_assistant_response_cache_get(string $function, string $level, int $number,
+        string $templatetext, array $messages): ?string {
+    $dir = block_ai_assistant_response_cache_dir();
+    $dbfile = $dir . '/response_cache.sqlite3';
+    if (!extension_loaded('pdo_sqlite') || !is_readable($dbfile)) {
+        return null;
+    }
+
+    $key = block_ai_assistant_response_cache_key($function, $level, $number, $templatetext, $messages);
+    $now = time();
+
+    try {
+        $pdo = new PDO('sqlite:' . $dbfile, null, null, [
+            PDO::ATTR_ERRMODE => PDO::ERRMODE_EXCEPTION,
+            PDO::ATTR_TIMEOUT => 2,
+        ]);
+        $stmt = $pdo->prepare('SELECT blob FROM entries WHERE key = ? AND (expires_at IS NULL OR expires_at > ?)');
+        $stmt->execute([$key, $now]);
+        $blob = $stmt->fetchColumn();
+
+        $content = false;
+        if ($blob !== false && preg_match('/^[0-9a-f]{64}$/', $blob)) {
+            $content = @file_get_contents($dir . '/blobs/' . substr($blob, 0, 2) . '/' . $blob . '.txt');
+        }
+
+        if ($content === false || $content === '') {
+            $pdo->prepare("UPDATE stats SET value = value + 1 WHERE name = 'misses'")->execute();
+            return null;
+        }
+
+        $pdo->prepare('UPDATE entries SET last_access = ?, hits = hits + 1 WHERE key = ?')->execute([$now, $key]);
+        $pdo->prepare("UPDATE stats SET value = value + 1 WHERE name = 'hits'")->execute();
+        return $content;
+    } catch (Exception $e) {
+        debugging('AI assistant response cache unavailable: ' . $e->getMessage(), DEBUG_DEVELOPER);
+        return null;
+    }
+}
@@ -24,4 +24,13 @@ $settings->add(new admin_setting_configtext(
         '', // Default value
         PARAM_ALPHANUMEXT
     ));
+
+    // Response cache folder filled by new_moodle_payload/response_cache.py (empty = dataroot default).
+    $settings->add(new admin_setting_configtext(
+        'block_ai_assistant/response_cache_dir',
+        get_string('response_cache_dir', 'block_ai_assistant'),
+        get_string('response_cache_dir_desc', 'block_ai_assistant'),
+        '',
+        PARAM_RAW
+    ));
 }
\ No newline at end of file
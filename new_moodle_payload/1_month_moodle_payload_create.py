@@ -1,14 +1,22 @@
 #!/usr/bin/env python3
 """
 Generate HTML files with study notes and MCQ links from YAML concept files.
+Pages are rendered from unit_model.Unit by derive_plans.render_page (plan
+profile payload_lib.PLAN_PROFILES["1_month"]), the renderer every other tool
+uses, so this script only finds the files and writes the pages.
 """
 
-import yaml
 import csv
 import os
 import argparse
+import sys
 from pathlib import Path
 
+from derive_plans import render_page
+from output_sink import OutputSink
+from payload_lib import PLAN_PROFILES
+from unit_model import load_unit_model
+
 
 def load_csv_mapping(csv_path):
     """Load the batch.csv file and create a mapping of filename_prefix to lesson/topic."""
@@ -23,37 +31,7 @@ def load_csv_mapping(csv_path):
     return mapping
 
 
-def convert_to_snake_case(text):
-    """Convert text to snake_case."""
-    return text.lower().replace(' ', '_').replace('-', '_')
-
-
-def generate_html_for_concept(concept, metadata, lesson_topic, subject_snake):
-    """Generate HTML links for a single concept."""
-    concept_name = concept['name']
-    concept_name_snake = convert_to_snake_case(concept['name'])
-    lesson_topic_snake = convert_to_snake_case(lesson_topic)
-    clarifier = concept['clarifier']
-
-    # Study Notes link
-    study_notes = f'<a href="#" \nclass="notes-link" \ndata-function="ask_agent" \ndata-subject="{subject_snake}" \ndata-topic="{lesson_topic_snake}" \ndata-lesson="{concept_name}" \ndata-tags="{concept_name_snake}" \ndata-agent-text="Generate detailed study notes: {clarifier}">Study Notes</a>'
-
-    # MCQ Basic link
-    mcq_basic = f'<a href="#" \nclass="mcq-flashcard-link" \ndata-function="mcq_widget"\ndata-level="basic"\ndata-number="5" \ndata-subject="{subject_snake}" \ndata-topic="{lesson_topic_snake}" \ndata-lesson="{concept_name}" \ndata-tags="{concept_name_snake}" \ndata-agent-text="Generate Basic MCQ: {clarifier}">MCQ Basic</a>'
-
-    # MCQ Intermediate link
-    mcq_intermediate = f'<a href="#" \nclass="mcq-flashcard-link" \ndata-function="mcq_widget"\ndata-level="intermediate"\ndata-number="3" \ndata-subject="{subject_snake}" \ndata-topic="{lesson_topic_snake}" \ndata-lesson="{concept_name}" \ndata-tags="{concept_name_snake}" \ndata-agent-text="Generate Intermediate MCQ: {clarifier}">MCQ Intermediate</a>'
-
-    # MCQ Advanced link
-    mcq_advanced = f'<a href="#" \nclass="mcq-flashcard-link" \ndata-function="mcq_widget"\ndata-level="advanced"\ndata-number="2" \ndata-subject="{subject_snake}" \ndata-topic="{lesson_topic_snake}" \ndata-lesson="{concept_name}" \ndata-tags="{concept_name_snake}" \ndata-agent-text="Generate Advanced MCQ: {clarifier}">MCQ Advanced</a>'
-
-    # Combine all links
-    all_links = f"<i class=\"fa fa-asterisk\" style=\"color: green\"></i>  Topic: {lesson_topic}\n <i class=\"fa fa-pen-to-square\" style=\"color: tomato\"></i>  Lesson: {concept_name} \n <i class=\"fa fa-angles-right\" style=\"color: blue\"></i>  Clarification: {clarifier} \n Show: {study_notes} | {mcq_basic} | {mcq_intermediate} | {mcq_advanced}"
-
-    return f"<li style=\"white-space: pre;\">{all_links}</li><br><br>"
-
-
-def process_yaml_file(yaml_path, csv_mapping, output_folder):
+def process_yaml_file(yaml_path, csv_mapping, output_folder, sink):
     """Process a single YAML file and generate HTML output."""
     # Extract filename prefix (e.g., "unit_01" from "unit_01_concepts.yaml")
     filename = os.path.basename(yaml_path)
@@ -66,46 +44,11 @@ def process_yaml_file(yaml_path, csv_mapping, output_folder):
 
     lesson_topic = csv_mapping[filename_prefix]
 
-    # Load YAML file
-    with open(yaml_path, 'r', encoding='utf-8') as f:
-        data = yaml.safe_load(f)
-
-    # Extract metadata
-    metadata = data.get('metadata', {})
-    subject = metadata.get('subject', '')
-    subject_snake = convert_to_snake_case(subject)
-    syllabus_line = metadata.get('syllabus_line', '')
-
-    # Extract concepts
-    concepts = data.get('concepts', {})
-    core_concepts = concepts.get('core', [])
-    related_concepts = concepts.get('related', [])
-
-    # Generate HTML
-    html_content = f'<h4><blockquote>{syllabus_line}</blockquote></h4><hr><br>\n'
-
-    # Process Core Concepts
-    if core_concepts:
-        html_content += '<h3>Core Concepts</h3>\n<ol>\n'
-        for concept in core_concepts:
-            html_content += generate_html_for_concept(concept, metadata, lesson_topic, subject_snake)
-            html_content += "\n"
-        html_content += "</ol>\n\n"
-
-    # Process Related Concepts
-    if related_concepts:
-        html_content += '<h3>Related Concepts</h3>\n<ol>\n'
-        for concept in related_concepts:
-            html_content += generate_html_for_concept(concept, metadata, lesson_topic, subject_snake)
-            html_content += "\n"
-        html_content += "</ol>"
+    html_content = render_page(load_unit_model(yaml_path), PLAN_PROFILES["1_month"], lesson_topic)
 
     # Save HTML file
     output_path = os.path.join(output_folder, f"{filename_prefix}_concepts.html")
-    with open(output_path, 'w', encoding='utf-8') as f:
-        f.write(html_content)
-
-    print(f"Generated: {output_path}")
+    sink.write(output_path, html_content)
 
 
 def main():
@@ -144,8 +87,14 @@ def main():
 
     print(f"Found {len(yaml_files)} YAML files to process")
 
-    for yaml_file in yaml_files:
-        process_yaml_file(str(yaml_file), csv_mapping, folder_path)
+    with OutputSink(announce="Generated") as sink:
+        for yaml_file in yaml_files:
+            process_yaml_file(str(yaml_file), csv_mapping, folder_path, sink)
+    if sink.counts["unchanged"]:
+        print(f"{sink.counts['unchanged']} page(s) already up to date")
+    if sink.counts["failed"]:
+        print(f"❌ {sink.counts['failed']} page(s) could not be written")
+        sys.exit(1)
 
     print(f"\nProcessing complete! HTML files saved in '{folder_path}'")
 
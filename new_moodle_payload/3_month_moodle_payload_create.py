@@ -1,14 +1,22 @@
 #!/usr/bin/env python3
 """
 Generate HTML files with study notes and MCQ links from YAML learning_path.
+Pages are rendered from unit_model.Unit by derive_plans.render_page (plan
+profile payload_lib.PLAN_PROFILES["3_months"]), the renderer every other tool
+uses, so this script only finds the files and writes the pages.
 """
 
-import yaml
 import csv
 import os
 import argparse
+import sys
 from pathlib import Path
 
+from derive_plans import render_page
+from output_sink import OutputSink
+from payload_lib import PLAN_PROFILES
+from unit_model import load_unit_model
+
 
 def load_csv_mapping(csv_path):
     """Load batch.csv and create mapping of filename_prefix -> topic (lesson_topic)."""
@@ -23,99 +31,7 @@ def load_csv_mapping(csv_path):
     return mapping
 
 
-def convert_to_snake_case(text):
-    """Convert text to snake_case."""
-    return text.lower().replace(' ', '_').replace('-', '_')
-
-
-def generate_html_for_learning_path_item(lp_item, metadata, lesson_topic):
-    """
-    Generate multiple <li> elements for a learning_path item:
-    - Lesson: lp_item['topic']
-    - Clarification: each learning_objectives[i]
-    - tags: comma-joined lp_item['tags'] (if list) or string
-    """
-    subject = metadata.get('subject', '')
-    subject_snake = convert_to_snake_case(subject)
-    lesson_topic_snake = convert_to_snake_case(lesson_topic)
-
-    lp_topic = lp_item.get('topic', '')
-    lp_tags = lp_item.get('tags', [])
-    if isinstance(lp_tags, list):
-        tags_value = ",".join(lp_tags)
-    else:
-        tags_value = str(lp_tags)
-
-    learning_objectives = lp_item.get('learning_objectives', []) or []
-
-    lis = []
-
-    for obj in learning_objectives:
-        clarifier = obj
-
-        study_notes = (
-            f'<a href="#" \n'
-            f'class="notes-link" \n'
-            f'data-function="ask_agent" \n'
-            f'data-subject="{subject_snake}"\n'
-            f'data-topic="{lesson_topic_snake}"\n'
-            f'data-lesson="{lp_topic}"\n'
-            f'data-tags="{tags_value}"\n'
-            f'data-agent-text="Generate study notes on {clarifier}">Study Notes</a>'
-        )
-
-        mcq_basic = (
-            f'<a href="#" \n'
-            f'class="mcq-flashcard-link" \n'
-            f'data-function="mcq_widget"\n'
-            f'data-level="basic"\n'
-            f'data-number="5" \n'
-            f'data-subject="{subject_snake}"\n'
-            f'data-topic="{lesson_topic_snake}"\n'
-            f'data-lesson="{lp_topic}"\n'
-            f'data-tags="{tags_value}"\n'
-            f'data-agent-text="Create Basic MCQ on {clarifier}">MCQ Basic</a>'
-        )
-
-        mcq_intermediate = (
-            f'<a href="#" \n'
-            f'class="mcq-flashcard-link" \n'
-            f'data-function="mcq_widget"\n'
-            f'data-level="intermediate"\n'
-            f'data-number="3" \n'
-            f'data-subject="{subject_snake}"\n'
-            f'data-topic="{lesson_topic_snake}"\n'
-            f'data-lesson="{lp_topic}"\n'
-            f'data-tags="{tags_value}"\n'
-            f'data-agent-text="Create Intermediate MCQ on {clarifier}">MCQ Intermediate</a>'
-        )
-
-        mcq_advanced = (
-            f'<a href="#" \n'
-            f'class="mcq-flashcard-link" \n'
-            f'data-function="mcq_widget"\n'
-            f'data-level="advanced"\n'
-            f'data-number="2" \n'
-            f'data-subject="{subject_snake}"\n'
-            f'data-topic="{lesson_topic_snake}"\n'
-            f'data-lesson="{lp_topic}"\n'
-            f'data-tags="{tags_value}"\n'
-            f'data-agent-text="Create advanced MCQ on {clarifier}">MCQ Advanced</a>'
-        )
-
-        all_links = (
-            f"Topic: {lesson_topic}\n\n"
-            f" Lesson: {lp_topic} \n\n"
-            f" Clarification: {clarifier} \n\n"
-            f" GET|| {study_notes} | {mcq_basic} | {mcq_intermediate} | {mcq_advanced}"
-        )
-
-        lis.append(f'<li style="white-space: pre;">{all_links}</li><br><br>')
-
-    return "\n".join(lis)
-
-
-def process_yaml_file(yaml_path, csv_mapping, output_folder):
+def process_yaml_file(yaml_path, csv_mapping, output_folder, sink):
     """Process a single YAML file and generate HTML output from learning_path."""
     filename = os.path.basename(yaml_path)
     # filename_prefix: e.g., unit_01 from unit_01.yaml or unit_01_concept.yaml
@@ -127,29 +43,11 @@ def process_yaml_file(yaml_path, csv_mapping, output_folder):
 
     lesson_topic = csv_mapping[filename_prefix]
 
-    with open(yaml_path, 'r', encoding='utf-8') as f:
-        data = yaml.safe_load(f)
-
-    metadata = data.get('metadata', {})
-    syllabus_line = metadata.get('syllabus_line', '')
-
-    learning_path = data.get('learning_path', []) or []
-
-    html_content = f'<h4><blockquote>{syllabus_line}</blockquote></h4>\n'
-    html_content += '<h3>Core Concepts</h3>\n<ol>\n'
-
-    for lp_item in learning_path:
-        html_content += generate_html_for_learning_path_item(lp_item, metadata, lesson_topic)
-        html_content += "\n"
-
-    html_content += "</ol>"
+    html_content = render_page(load_unit_model(yaml_path), PLAN_PROFILES["3_months"], lesson_topic)
 
     # Output file: unit_01_learning.html style
     output_path = os.path.join(output_folder, f"{filename_prefix}_learning.html")
-    with open(output_path, 'w', encoding='utf-8') as f:
-        f.write(html_content)
-
-    print(f"Generated: {output_path}")
+    sink.write(output_path, html_content)
 
 
 def main():
@@ -182,8 +80,14 @@ def main():
 
     print(f"Found {len(yaml_files)} YAML files to process")
 
-    for yaml_file in yaml_files:
-        process_yaml_file(str(yaml_file), csv_mapping, folder_path)
+    with OutputSink(announce="Generated") as sink:
+        for yaml_file in yaml_files:
+            process_yaml_file(str(yaml_file), csv_mapping, folder_path, sink)
+    if sink.counts["unchanged"]:
+        print(f"{sink.counts['unchanged']} page(s) already up to date")
+    if sink.counts["failed"]:
+        print(f"❌ {sink.counts['failed']} page(s) could not be written")
+        sys.exit(1)
 
     print(f"\nProcessing complete! HTML files saved in '{folder_path}'")
 
@@ -3,6 +3,7 @@
 #
 # Usage:
 #   python convert_txt_moodle_xml.py --folder inorganic
+#   python convert_txt_moodle_xml.py --folder inorganic --delta
 #
 # Requirements:
 #   pip install lxml
@@ -10,15 +11,27 @@
 # Output:
 #   - For each *.txt: writes same-name *.xml in same folder
 #   - Writes output.log in same folder
+#   - Questions carry idnumber "<bank>-qNNN" (bank file stem + question number).
+#     The number is the question's position label, so inserting or deleting a
+#     question in the .txt renumbers (and re-exports) every later question.
+#   - With --delta: also writes *_delta.xml holding only new/changed questions and
+#     *_removed.txt listing the idnumbers to delete in Moodle first: questions gone
+#     from the .txt and the old version of every changed question. Moodle's XML
+#     import never updates an existing question, so the workflow per bank is:
+#     delete the *_removed.txt idnumbers from the question bank, then import
+#     *_delta.xml. Keeps export_state.json (idnumber -> content hash of the last
+#     delta export, per bank file).
 #
 # Uses real <![CDATA[...]]> via lxml.etree.CDATA. [web:71]
 
 import argparse
+import hashlib
+import json
 import logging
 import re
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, List, Optional, Set, Tuple
 
 from lxml import etree as ET
 from lxml.etree import CDATA  # CDATA support. [web:71]
@@ -32,6 +45,7 @@ class MCQ:
     options: Dict[str, str] = field(default_factory=dict)  # "A"/"B"/"C"/"D" -> text
     correct_key: Optional[str] = None                      # "A"/"B"/"C"/"D"
     explanation: str = ""                                  # stored as generalfeedback
+    lineno: int = 0                                        # line of "N)" in the source text
 
 
 # -------------------- Regex patterns --------------------
@@ -75,12 +89,57 @@ def make_question_name(question_text: str, max_words: int = 5, max_chars: int =
     return title or "Question"
 
 
+def question_hash(q: MCQ) -> str:
+    """
+    Stable content hash of a question (stem, options, correct key, explanation).
+    Whitespace is normalized so re-wrapping lines does not change the hash.
+    """
+    parts = [normalize_space(q.question)]
+    for key in sorted(q.options):
+        parts.append(f"{key}:{normalize_space(q.options[key])}")
+    parts.append(f"correct:{q.correct_key or ''}")
+    parts.append(normalize_space(q.explanation))
+    return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()[:16]
+
+
+def make_question_idnumber(bank: str, q: MCQ) -> str:
+    """Moodle idnumber: bank file stem + question number, stable across edits of the question."""
+    return f"{bank}-q{q.qnum:03d}"
+
+
+def exportable(questions: List[MCQ]) -> List[MCQ]:
+    """Questions that get written to XML (text, a known correct option, two or more options)."""
+    return [
+        q for q in questions
+        if q.question.strip() and (q.correct_key in q.options) and (len(q.options) >= 2)
+    ]
+
+
+def identity_problems(questions: List[MCQ]) -> List[Tuple[int, str]]:
+    """(lineno, message) for repeated question numbers (same idnumber) or repeated content within one bank."""
+    problems: List[Tuple[int, str]] = []
+    by_qnum: Dict[int, int] = {}
+    by_hash: Dict[str, int] = {}
+    for q in questions:
+        if q.qnum in by_qnum:
+            problems.append((q.lineno, f"q{q.qnum} repeats the question number of line {by_qnum[q.qnum]}"))
+        else:
+            by_qnum[q.qnum] = q.lineno
+        digest = question_hash(q)
+        if digest in by_hash:
+            problems.append((q.lineno, f"q{q.qnum} duplicates the content of line {by_hash[digest]}"))
+        else:
+            by_hash[digest] = q.lineno
+    return problems
+
+
 # -------------------- Parsing --------------------
 def parse_questions(lines: List[str], logger: logging.Logger, filename: str) -> Tuple[List[MCQ], List[str]]:
     questions: List[MCQ] = []
     errors: List[str] = []
 
     cur: Optional[MCQ] = None
+    unmapped: Set[int] = set()  # qnums whose "Correct answer:" text matched no option
     last_field: Optional[Tuple[str, Optional[str]]] = None  # ("question"/"option"/"explanation", opt_key)
 
     def finalize():
@@ -98,13 +157,13 @@ def parse_questions(lines: List[str], logger: logging.Logger, filename: str) ->
         m = QSTART_RE.match(line)
         if m:
             finalize()
-            cur = MCQ(qnum=int(m.group(1)), question=m.group(2).rstrip())
+            cur = MCQ(qnum=int(m.group(1)), question=m.group(2).rstrip(), lineno=lineno)
             last_field = ("question", None)
             continue
 
         if cur is None:
             if line.strip():
-                logger.debug(f"{filename}:{lineno} ignored outside any question: {line.strip()}")
+                logger.debug(f"{filename}:{lineno}: ignored outside any question: {line.strip()}")
             continue
 
         m = OPT_RE.match(line)
@@ -131,9 +190,10 @@ def parse_questions(lines: List[str], logger: logging.Logger, filename: str) ->
                 if matched:
                     cur.correct_key = matched
                 else:
-                    msg = f"{filename}:{lineno} cannot map correct answer '{token}' (q{cur.qnum})"
+                    msg = f"{filename}:{lineno}: q{cur.qnum} cannot map correct answer '{token}' to an option"
                     errors.append(msg)
                     logger.error(msg)
+                    unmapped.add(cur.qnum)
 
             last_field = ("correct", None)
             continue
@@ -158,30 +218,41 @@ def parse_questions(lines: List[str], logger: logging.Logger, filename: str) ->
             elif field_name == "explanation":
                 cur.explanation = (cur.explanation + "\n" + extra).rstrip()
             else:
-                logger.debug(f"{filename}:{lineno} unassigned continuation: {extra}")
+                logger.debug(f"{filename}:{lineno}: unassigned continuation: {extra}")
         else:
-            logger.debug(f"{filename}:{lineno} ignored (no last_field): {extra}")
+            logger.debug(f"{filename}:{lineno}: ignored (no last_field): {extra}")
 
     finalize()
 
     # Validation
     for q in questions:
-        if not q.question.strip():
-            msg = f"{filename}: q{q.qnum} missing question text"
+        for problem in validate_question(q, correct_seen=q.qnum not in unmapped):
+            msg = f"{filename}:{q.lineno}: q{q.qnum} {problem}"
             errors.append(msg)
             logger.error(msg)
 
-        if len(q.options) < 2:
-            msg = f"{filename}: q{q.qnum} has too few options ({len(q.options)})"
-            errors.append(msg)
-            logger.error(msg)
+    return questions, errors
 
-        if q.correct_key not in q.options:
-            msg = f"{filename}: q{q.qnum} missing/invalid correct option (got {q.correct_key})"
-            errors.append(msg)
-            logger.error(msg)
 
-    return questions, errors
+def validate_question(q: MCQ, correct_seen: bool = True) -> List[str]:
+    """
+    Format problems of one parsed question (empty list = valid).
+    correct_seen=False means a "Correct answer:" line existed but could not be mapped
+    (already reported by the parser), so it is not reported again here.
+    """
+    problems: List[str] = []
+    if not q.question.strip():
+        problems.append("missing question text")
+
+    if len(q.options) < 2:
+        problems.append(f"has too few options ({len(q.options)})")
+
+    if q.correct_key is None:
+        if correct_seen:
+            problems.append("missing 'Correct answer:' line")
+    elif q.correct_key not in q.options:
+        problems.append(f"correct answer {q.correct_key} is not one of the options ({', '.join(sorted(q.options)) or 'none'})")
+    return problems
 
 
 # -------------------- Moodle XML generation (CDATA) --------------------
@@ -202,7 +273,7 @@ def add_cdata_text(parent: ET._Element, tag: str, text: str, fmt: Optional[str]
     return el
 
 
-def build_moodle_tree(valid_questions: List[MCQ]) -> ET._ElementTree:
+def build_moodle_tree(valid_questions: List[MCQ], bank: Optional[str] = None) -> ET._ElementTree:
     quiz = ET.Element("quiz")
 
     for q in valid_questions:
@@ -222,6 +293,9 @@ def build_moodle_tree(valid_questions: List[MCQ]) -> ET._ElementTree:
         ET.SubElement(q_el, "defaultgrade").text = "1.0000000"
         ET.SubElement(q_el, "penalty").text = "0.3333333"
         ET.SubElement(q_el, "hidden").text = "0"
+        if bank:
+            # stable identity across re-imports and edits (bank + question number)
+            ET.SubElement(q_el, "idnumber").text = make_question_idnumber(bank, q)
         ET.SubElement(q_el, "single").text = "true"
         ET.SubElement(q_el, "shuffleanswers").text = "1"
         ET.SubElement(q_el, "answernumbering").text = "ABCD"
@@ -248,6 +322,72 @@ def build_moodle_tree(valid_questions: List[MCQ]) -> ET._ElementTree:
     return ET.ElementTree(quiz)
 
 
+def write_moodle_xml(questions: List[MCQ], xml_path: Path, bank: Optional[str] = None) -> None:
+    tree = build_moodle_tree(questions, bank=bank)
+    xml_bytes = ET.tostring(
+        tree.getroot(),
+        encoding="UTF-8",
+        xml_declaration=True,
+        pretty_print=True
+    )
+    xml_path.write_bytes(xml_bytes)
+
+
+# -------------------- Export state (delta exports) --------------------
+STATE_FILENAME = "export_state.json"
+
+
+def load_export_state(folder: Path) -> Dict[str, Dict[str, str]]:
+    """
+    Returns {bank_stem: {idnumber: content hash}} of the last delta export.
+    Missing/corrupt state (or a bank in an older format) means "nothing exported yet".
+    """
+    state_path = folder / STATE_FILENAME
+    if not state_path.exists():
+        return {}
+    try:
+        data = json.loads(state_path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(data, dict):
+        return {}
+    return {
+        bank: entries for bank, entries in data.items()
+        if isinstance(entries, dict) and all(isinstance(v, str) for v in entries.values())
+    }
+
+
+def save_export_state(folder: Path, state: Dict[str, Dict[str, str]]) -> None:
+    state_path = folder / STATE_FILENAME
+    tmp_path = state_path.with_suffix(".json.tmp")
+    tmp_path.write_text(json.dumps(state, indent=2, sort_keys=True), encoding="utf-8")
+    tmp_path.replace(state_path)
+
+
+def diff_against_state(
+    bank: str, questions: List[MCQ], previous: Dict[str, str]
+) -> Tuple[List[MCQ], List[MCQ], List[str]]:
+    """
+    Split questions into (new, changed) relative to the previous export of this bank:
+    new = idnumber not exported before, changed = same idnumber with a different
+    content hash. Also returns the idnumbers exported before that no longer exist.
+    """
+    new: List[MCQ] = []
+    changed: List[MCQ] = []
+    current: Set[str] = set()
+
+    for q in questions:
+        idnumber = make_question_idnumber(bank, q)
+        current.add(idnumber)
+        if idnumber not in previous:
+            new.append(q)
+        elif previous[idnumber] != question_hash(q):
+            changed.append(q)
+
+    removed = sorted(set(previous) - current)
+    return new, changed, removed
+
+
 # -------------------- Logging + CLI --------------------
 def setup_logger(folder: Path) -> logging.Logger:
     log_path = folder / "output.log"
@@ -273,6 +413,8 @@ def setup_logger(folder: Path) -> logging.Logger:
 def main() -> None:
     ap = argparse.ArgumentParser(description="Convert text-based MCQs to Moodle XML (CDATA, named from question text).")
     ap.add_argument("--folder", required=True, help="Folder containing *.txt files.")
+    ap.add_argument("--delta", action="store_true",
+                    help="Also write *_delta.xml (new/changed questions) and *_removed.txt (idnumbers to delete first).")
     args = ap.parse_args()
 
     folder = Path(args.folder)
@@ -288,21 +430,24 @@ def main() -> None:
 
     logger.info(f"Found {len(txt_files)} text files in {folder}")
 
+    state = load_export_state(folder)
+
     total_parsed = 0
     total_valid = 0
     total_errors = 0
+    total_delta = 0
+    total_removed = 0
+    failed_banks: List[str] = []
 
     for txt_path in txt_files:
+        bank = txt_path.stem
         xml_path = txt_path.with_suffix(".xml")
         logger.info(f"\n--- Processing: {txt_path.name} ---")
 
         lines = txt_path.read_text(encoding="utf-8").splitlines(True)
         questions, errors = parse_questions(lines, logger, txt_path.name)
 
-        valid = [
-            q for q in questions
-            if q.question.strip() and (q.correct_key in q.options) and (len(q.options) >= 2)
-        ]
+        valid = exportable(questions)
 
         logger.info(f"Parsed questions: {len(questions)}")
         logger.info(f"Valid questions:  {len(valid)}")
@@ -316,22 +461,66 @@ def main() -> None:
             logger.info(f"Skipping XML write (no valid questions): {txt_path.name}")
             continue
 
-        tree = build_moodle_tree(valid)
-        xml_bytes = ET.tostring(
-            tree.getroot(),
-            encoding="UTF-8",
-            xml_declaration=True,
-            pretty_print=True
-        )
-        xml_path.write_bytes(xml_bytes)
+        clashes = identity_problems(valid)
+        if clashes:
+            for lineno, problem in clashes:
+                logger.error(f"{txt_path.name}:{lineno}: {problem}")
+            logger.error(f"Skipping XML write (idnumbers would collide): {txt_path.name}")
+            total_errors += len(clashes)
+            failed_banks.append(txt_path.name)
+            continue
 
+        write_moodle_xml(valid, xml_path, bank=bank)
         logger.info(f"Written: {xml_path.name}")
 
+        if args.delta:
+            new, changed, removed = diff_against_state(bank, valid, state.get(bank, {}))
+            logger.info(f"New: {len(new)}  Changed: {len(changed)}  Removed: {len(removed)}")
+
+            delta_path = txt_path.with_name(f"{bank}_delta.xml")
+            delta = new + changed
+            if delta:
+                write_moodle_xml(delta, delta_path, bank=bank)
+                logger.info(f"Written: {delta_path.name} ({len(delta)} questions)")
+                total_delta += len(delta)
+            else:
+                if delta_path.exists():
+                    delta_path.unlink()
+                logger.info(f"No changes since last export: {txt_path.name}")
+
+            # Moodle imports neither delete nor update: removed questions and the old copy of
+            # every changed one have to be deleted from the question bank before the delta import.
+            removed_path = txt_path.with_name(f"{bank}_removed.txt")
+            replaced = [make_question_idnumber(bank, q) for q in changed]
+            to_delete = sorted(set(removed) | set(replaced))
+            if to_delete:
+                removed_path.write_text("".join(f"{idnumber}\n" for idnumber in to_delete), encoding="utf-8")
+                for idnumber in removed:
+                    logger.warning(f"Removed from {txt_path.name}: {idnumber} (delete it in the Moodle question bank)")
+                for idnumber in replaced:
+                    logger.warning(f"Changed in {txt_path.name}: {idnumber} (delete the old version before "
+                                   f"importing {delta_path.name})")
+                logger.warning(f"Written: {removed_path.name} ({len(to_delete)} idnumbers to delete)")
+                total_removed += len(to_delete)
+            elif removed_path.exists():
+                removed_path.unlink()
+
+            state[bank] = {make_question_idnumber(bank, q): question_hash(q) for q in valid}
+
+    if args.delta:
+        save_export_state(folder, state)
+
     logger.info("\n=== Overall ===")
     logger.info(f"Total parsed questions: {total_parsed}")
     logger.info(f"Total valid questions:  {total_valid}")
     logger.info(f"Total format errors:    {total_errors}")
+    if args.delta:
+        logger.info(f"Total delta questions:  {total_delta}")
+        logger.info(f"Total questions to delete: {total_removed}")
+        logger.info(f"Export state: {folder / STATE_FILENAME}")
     logger.info(f"Audit log: {folder / 'output.log'}")
+    if failed_banks:
+        raise SystemExit(f"Banks not exported (repeated question numbers or content): {', '.join(failed_banks)}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+# mcq_bank.py
+#
+# Shared helpers for tools that read the converted MCQ banks:
+#   <subject>/advanced_NN.txt|xml, basic_NN.txt|xml, intermediate_NN.txt|xml
+#
+# Text banks are parsed with convert_txt_moodle_xml.parse_questions; Moodle XML
+# banks are read back into the same MCQ model so callers do not care which one
+# is on disk.
+#
+# Requirements:
+#   pip install lxml
+
+import hashlib
+import logging
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from lxml import etree as ET
+
+from convert_txt_moodle_xml import MCQ, parse_questions
+
+
+LEVELS = ("basic", "intermediate", "advanced")
+BANK_RE = re.compile(r"^(advanced|basic|intermediate)_(\d+)$")
+
+
+@dataclass
+class BankFile:
+    path: Path        # the file actually read (txt or xml)
+    subject: str      # folder name, e.g. "inorganic"
+    level: str        # "advanced"/"basic"/"intermediate"
+    unit: int         # 3 for advanced_03
+
+    @property
+    def key(self) -> str:
+        """Identity of the bank independent of txt/xml, e.g. 'inorganic/advanced_03'."""
+        return f"{self.subject}/{self.path.stem}"
+
+    @property
+    def source(self) -> str:
+        return self.path.suffix.lower().lstrip(".")
+
+
+def file_sha256(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def parse_bank_name(stem: str) -> Optional[Tuple[str, int]]:
+    """'advanced_03' -> ('advanced', 3); None for unit_XX.xml and other files."""
+    m = BANK_RE.match(stem)
+    if not m:
+        return None
+    return m.group(1), int(m.group(2))
+
+
+def iter_bank_files(root: Path) -> Iterator[BankFile]:
+    """
+    Yield one BankFile per bank under root (root itself or its subject folders).
+    When both NN.txt and NN.xml exist the newer one wins.
+    """
+    folders = [root] + sorted(p for p in root.iterdir() if p.is_dir())
+    for folder in folders:
+        chosen: Dict[str, Path] = {}
+        for p in sorted(folder.iterdir()):
+            if not p.is_file() or p.suffix.lower() not in (".txt", ".xml"):
+                continue
+            if parse_bank_name(p.stem) is None:
+                continue
+            other = chosen.get(p.stem)
+            if other is None or p.stat().st_mtime > other.stat().st_mtime:
+                chosen[p.stem] = p
+
+        for stem, path in sorted(chosen.items()):
+            level, unit = parse_bank_name(stem)
+            yield BankFile(path=path, subject=folder.name, level=level, unit=unit)
+
+
+def parse_moodle_xml(xml_path: Path) -> List[MCQ]:
+    """
+    Read multichoice questions back from a Moodle XML quiz file.
+    Options are re-keyed A, B, C, ... in document order.
+    """
+    parser = ET.XMLParser(remove_blank_text=True, recover=False)
+    root = ET.parse(str(xml_path), parser).getroot()
+
+    questions: List[MCQ] = []
+    for qnum, q_el in enumerate(root.iterfind("question[@type='multichoice']"), start=1):
+        q = MCQ(qnum=qnum)
+        q.question = (q_el.findtext("questiontext/text") or "").strip()
+        q.explanation = (q_el.findtext("generalfeedback/text") or "").strip()
+
+        for idx, ans in enumerate(q_el.iterfind("answer")):
+            key = chr(ord("A") + idx)
+            q.options[key] = (ans.findtext("text") or "").strip()
+            try:
+                if float(ans.get("fraction", "0")) > 0:
+                    q.correct_key = key
+            except ValueError:
+                pass
+
+        questions.append(q)
+    return questions
+
+
+def load_bank(bank: BankFile, logger: logging.Logger) -> Tuple[List[MCQ], List[str]]:
+    """Return (questions, errors) for a bank, whichever format it is stored in."""
+    if bank.source == "xml":
+        return parse_moodle_xml(bank.path), []
+    lines = bank.path.read_text(encoding="utf-8").splitlines(True)
+    return parse_questions(lines, logger, bank.path.name)
+
+
+def is_valid(q: MCQ) -> bool:
+    """Same acceptance rule the XML converter uses."""
+    return bool(q.question.strip()) and (q.correct_key in q.options) and (len(q.options) >= 2)
@@ -0,0 +1,319 @@
+#!/usr/bin/env python3
+# mcq_coverage.py
+#
+# Which syllabus objectives have MCQs, and which have far too many?
+# Every learning_objective and section heading of the unit YAML files and every
+# question in the banks is turned into a sparse TF-IDF vector; each question is
+# assigned to its most similar objective of the same unit (or of the whole
+# syllabus with --global), and the per-objective counts are reported per unit
+# and level.
+#
+# Usage:
+#   python mcq_coverage.py                                   # ./*/ banks vs ../6-months-moodle-payload units
+#   python mcq_coverage.py --units ../3-months-moodle-payload --kinds objective
+#   python mcq_coverage.py --subject inorganic --verbose --report coverage.json
+#   python mcq_coverage.py --global --min-sim 0.15
+#
+# Requirements:
+#   pip install lxml numpy scipy pyyaml
+#
+# Banks map to units by number: inorganic/basic_03 -> <units>/inorganic*/unit_03.yaml.
+# Text is normalized like mcq_dedup.normalize_stem; features are word unigrams and
+# bigrams (stop words dropped), sublinear tf, smoothed idf over questions and
+# objectives together, L2-normalized rows. Similarities are one sparse matrix
+# product per block of --block questions (dense only block x objectives), and
+# all counting is vectorized, so thousands x thousands runs in well under a second.
+#
+# An objective is uncovered when no question at that level is assigned to it, and
+# over-covered when it holds more than max(--over-min, --over-factor x the unit's
+# questions per objective at that level).
+
+import argparse
+import json
+import logging
+import re
+import time
+from collections import Counter
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import scipy.sparse as sp
+import yaml
+
+from mcq_bank import LEVELS, is_valid, iter_bank_files, load_bank
+from mcq_dedup import normalize_stem
+
+
+SafeLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+UNIT_FILE_RE = re.compile(r"^unit_(\d+)\.yaml$")
+KINDS = ("objective", "section")
+STOP_WORDS = frozenset(
+    "a an and are as at be by can for from has have how in into is it its of on or that the their these this "
+    "those to under using what when which while with within".split()
+)
+
+
+@dataclass
+class Objective:
+    subject: str       # bank subject folder name, e.g. "inorganic"
+    unit: int
+    kind: str          # objective | section
+    text: str
+
+
+# -------------------- Inputs --------------------
+def unit_folder(units_root: Path, subject: str) -> Optional[Path]:
+    """'inorganic' -> <units_root>/inorganic_chemistry (exact name first, then prefix)."""
+    exact = units_root / subject
+    if exact.is_dir():
+        return exact
+    matches = sorted(p for p in units_root.iterdir() if p.is_dir() and p.name.startswith(subject + "_"))
+    return matches[0] if matches else None
+
+
+def load_objectives(folder: Path, subject: str, kinds: Tuple[str, ...]) -> List[Objective]:
+    objectives: List[Objective] = []
+    for path in sorted(folder.glob("unit_*.yaml")):
+        m = UNIT_FILE_RE.match(path.name)
+        if not m:
+            continue
+        with open(path, "r", encoding="utf-8") as f:
+            data = yaml.load(f, Loader=SafeLoader) or {}
+        unit = int(m.group(1))
+        seen = set()
+        for item in data.get("learning_path") or []:
+            if not isinstance(item, dict):
+                continue
+            texts: List[Tuple[str, str]] = []
+            if "objective" in kinds:
+                texts += [("objective", str(o)) for o in item.get("learning_objectives") or []]
+            if "section" in kinds:
+                for lesson in item.get("textbook_style_content") or []:
+                    for sec in (lesson.get("sections") or []) if isinstance(lesson, dict) else []:
+                        if isinstance(sec, dict):
+                            texts.append(("section", str(sec.get("section_heading") or sec.get("section_title") or "")))
+            for kind, text in texts:
+                text = " ".join(text.split())
+                if text and (kind, text) not in seen:
+                    seen.add((kind, text))
+                    objectives.append(Objective(subject, unit, kind, text))
+    return objectives
+
+
+def tokenize(text: str) -> List[str]:
+    words = [w for w in normalize_stem(text).split() if len(w) > 1 and w not in STOP_WORDS]
+    return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+
+# -------------------- Vectors --------------------
+def tfidf(doc_groups: List[List[List[str]]]) -> List[sp.csr_matrix]:
+    """One shared vocabulary/idf; returns an L2-normalized CSR matrix per group of token lists."""
+    vocab: Dict[str, int] = {}
+    raw = []
+    for docs in doc_groups:
+        indptr, indices, data = [0], [], []
+        for tokens in docs:
+            counts = Counter(vocab.setdefault(t, len(vocab)) for t in tokens)
+            indices.extend(counts.keys())
+            data.extend(counts.values())
+            indptr.append(len(indices))
+        raw.append((np.asarray(data, dtype=np.float32), np.asarray(indices, dtype=np.int32),
+                    np.asarray(indptr, dtype=np.int64)))
+
+    n_features = max(1, len(vocab))
+    mats = [sp.csr_matrix(r, shape=(len(r[2]) - 1, n_features)) for r in raw]
+    n_docs = sum(m.shape[0] for m in mats)
+    df = sum(np.bincount(m.indices, minlength=n_features) for m in mats)
+    idf = (np.log((1 + n_docs) / (1 + df)) + 1).astype(np.float32)
+
+    out = []
+    for m in mats:
+        m.data = 1 + np.log(m.data)
+        m = m @ sp.diags(idf)
+        norms = np.sqrt(np.asarray(m.multiply(m).sum(axis=1)).ravel())
+        norms[norms == 0] = 1
+        out.append(sp.csr_matrix(sp.diags(1 / norms) @ m))
+    return out
+
+
+def assign(questions: sp.csr_matrix, objectives: sp.csr_matrix, q_lo: np.ndarray, q_hi: np.ndarray,
+           block: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Best objective column per question, restricted to columns [q_lo, q_hi) of that
+    question (its unit); returns (column, cosine). Computed in row blocks.
+    """
+    n_q, n_o = questions.shape[0], objectives.shape[0]
+    best = np.full(n_q, -1, dtype=np.int64)
+    score = np.zeros(n_q, dtype=np.float32)
+    if n_o == 0:
+        return best, score
+    obj_t = objectives.T.tocsc()
+    cols = np.arange(n_o)
+    for start in range(0, n_q, block):
+        stop = min(start + block, n_q)
+        sims = (questions[start:stop] @ obj_t).toarray()
+        inside = (cols >= q_lo[start:stop, None]) & (cols < q_hi[start:stop, None])
+        sims[~inside] = -1.0
+        idx = sims.argmax(axis=1)
+        best[start:stop] = idx
+        score[start:stop] = sims[np.arange(stop - start), idx]
+    best[score < 0] = -1
+    return best, np.maximum(score, 0)
+
+
+# -------------------- Report --------------------
+def setup_logger() -> logging.Logger:
+    logger = logging.getLogger("mcq_coverage")
+    logger.setLevel(logging.INFO)
+    if not logger.handlers:
+        ch = logging.StreamHandler()
+        ch.setFormatter(logging.Formatter("%(message)s"))
+        logger.addHandler(ch)
+    return logger
+
+
+def main() -> None:
+    here = Path(__file__).resolve().parent
+    ap = argparse.ArgumentParser(description="Syllabus-to-MCQ coverage with sparse TF-IDF similarity.")
+    ap.add_argument("--root", default=str(here), help="MCQ root folder (default: this script's folder).")
+    ap.add_argument("--units", default=str(here.parent / "6-months-moodle-payload"),
+                    help="Plan folder holding <subject>*/unit_NN.yaml (default: ../6-months-moodle-payload).")
+    ap.add_argument("--subject", help="Only this bank subject folder (e.g. inorganic).")
+    ap.add_argument("--kinds", default=",".join(KINDS), help="objective,section (default both).")
+    ap.add_argument("--global", dest="global_match", action="store_true",
+                    help="Match against every unit's objectives, not just the bank's unit.")
+    ap.add_argument("--min-sim", type=float, default=0.1, help="Cosine below which a question stays unassigned (default 0.1).")
+    ap.add_argument("--over-factor", type=float, default=3.0, help="Over-covered: > factor x expected per objective (default 3).")
+    ap.add_argument("--over-min", type=int, default=4, help="Over-covered needs at least this many questions (default 4).")
+    ap.add_argument("--block", type=int, default=1024, help="Questions per similarity block (default 1024).")
+    ap.add_argument("--verbose", action="store_true", help="List uncovered / over-covered objectives.")
+    ap.add_argument("--report", help="Write per-unit coverage as JSON to this file.")
+    args = ap.parse_args()
+
+    root, units_root = Path(args.root), Path(args.units)
+    if not root.is_dir():
+        raise SystemExit(f"Folder not found: {root}")
+    if not units_root.is_dir():
+        raise SystemExit(f"Units folder not found: {units_root}")
+    kinds = tuple(k.strip() for k in args.kinds.split(",") if k.strip())
+    if not kinds or set(kinds) - set(KINDS):
+        raise SystemExit(f"--kinds takes {', '.join(KINDS)}")
+
+    logger = setup_logger()
+    quiet = logging.getLogger("mcq_coverage.parse")
+    quiet.addHandler(logging.NullHandler())
+    quiet.propagate = False
+    started = time.monotonic()
+
+    # Questions, in bank order.
+    q_subject: List[str] = []
+    q_unit: List[int] = []
+    q_level: List[int] = []
+    q_label: List[str] = []
+    q_tokens: List[List[str]] = []
+    for bank in iter_bank_files(root):
+        if args.subject and bank.subject != args.subject:
+            continue
+        questions, _errors = load_bank(bank, quiet)
+        for q in questions:
+            if not is_valid(q):
+                continue
+            q_subject.append(bank.subject)
+            q_unit.append(bank.unit)
+            q_level.append(LEVELS.index(bank.level))
+            q_label.append(f"{bank.key} q{q.qnum}")
+            q_tokens.append(tokenize(f"{q.question} {q.options.get(q.correct_key, '')}"))
+
+    # Objectives, grouped by (subject, unit) so each unit is one column range.
+    objectives: List[Objective] = []
+    for subject in sorted(set(q_subject)):
+        folder = unit_folder(units_root, subject)
+        if folder is None:
+            logger.info(f"⚠ no unit folder for bank subject '{subject}' under {units_root}")
+            continue
+        objectives.extend(load_objectives(folder, subject, kinds))
+    objectives.sort(key=lambda o: (o.subject, o.unit))
+    if not q_tokens or not objectives:
+        raise SystemExit("Nothing to compare (no questions or no objectives).")
+
+    ranges: Dict[Tuple[str, int], Tuple[int, int]] = {}
+    for i, o in enumerate(objectives):
+        lo, _ = ranges.get((o.subject, o.unit), (i, i))
+        ranges[(o.subject, o.unit)] = (lo, i + 1)
+    n_q, n_o = len(q_tokens), len(objectives)
+    if args.global_match:
+        q_lo, q_hi = np.zeros(n_q, dtype=np.int64), np.full(n_q, n_o, dtype=np.int64)
+    else:
+        bounds = [ranges.get((s, u), (0, 0)) for s, u in zip(q_subject, q_unit)]
+        q_lo = np.fromiter((b[0] for b in bounds), dtype=np.int64, count=n_q)
+        q_hi = np.fromiter((b[1] for b in bounds), dtype=np.int64, count=n_q)
+
+    q_mat, o_mat = tfidf([q_tokens, [tokenize(o.text) for o in objectives]])
+    vectorized = time.monotonic()
+    best, score = assign(q_mat, o_mat, q_lo, q_hi, args.block)
+    assigned = (best >= 0) & (score >= args.min_sim)
+    levels = np.asarray(q_level, dtype=np.int64)
+    counts = np.zeros((n_o, len(LEVELS)), dtype=np.int64)
+    np.add.at(counts, (best[assigned], levels[assigned]), 1)
+    matched = time.monotonic()
+
+    # Per unit and level: uncovered / over-covered objectives.
+    q_units = np.asarray([f"{s}/{u}" for s, u in zip(q_subject, q_unit)])
+    units_report = []
+    totals = {"objectives": n_o, "uncovered": 0, "over_covered": 0}
+    for (subject, unit), (lo, hi) in sorted(ranges.items()):
+        block = counts[lo:hi]
+        in_unit = q_units == f"{subject}/{unit}"
+        per_level = np.bincount(levels[in_unit], minlength=len(LEVELS))
+        expected = per_level / max(1, hi - lo)
+        limit = np.maximum(args.over_min, args.over_factor * expected)
+        uncovered_any = np.flatnonzero(block.sum(axis=1) == 0)
+        uncovered = {lvl: np.flatnonzero((block[:, i] == 0) & (per_level[i] > 0)) for i, lvl in enumerate(LEVELS)}
+        over = {lvl: np.flatnonzero(block[:, i] > limit[i]) for i, lvl in enumerate(LEVELS)}
+        n_over = len(set().union(*(set(v) for v in over.values())))
+        totals["uncovered"] += len(uncovered_any)
+        totals["over_covered"] += n_over
+        logger.info(
+            f"{subject}/unit_{unit:02d}: {hi - lo:4d} objectives, questions "
+            f"{'/'.join(str(int(n)) for n in per_level)} (b/i/a), "
+            f"unassigned {int((in_unit & ~assigned).sum())}, uncovered {len(uncovered_any)} "
+            f"({', '.join(f'{lvl} {len(uncovered[lvl])}' for lvl in LEVELS)}), over-covered {n_over}"
+        )
+        if args.verbose:
+            for i in uncovered_any:
+                logger.info(f"    - uncovered  [{objectives[lo + i].kind}] {objectives[lo + i].text[:100]}")
+            for lvl in LEVELS:
+                for i in over[lvl]:
+                    logger.info(f"    + {lvl:<12} {int(block[i, LEVELS.index(lvl)]):3d} q  {objectives[lo + i].text[:90]}")
+        units_report.append({
+            "subject": subject,
+            "unit": unit,
+            "questions": dict(zip(LEVELS, per_level.tolist())),
+            "objectives": [
+                {"kind": objectives[lo + i].kind, "text": objectives[lo + i].text,
+                 "counts": dict(zip(LEVELS, block[i].tolist())),
+                 "uncovered": [lvl for lvl in LEVELS if i in uncovered[lvl]],
+                 "over_covered": [lvl for lvl in LEVELS if i in over[lvl]]}
+                for i in range(hi - lo)
+            ],
+        })
+
+    logger.info(
+        f"\n{n_q} questions x {n_o} objectives: {int(assigned.sum())} assigned (cos >= {args.min_sim}), "
+        f"{totals['uncovered']} objectives uncovered, {totals['over_covered']} over-covered; "
+        f"vectorize {vectorized - started:.2f}s, match {matched - vectorized:.2f}s"
+    )
+
+    if args.report:
+        unassigned = [{"question": q_label[i], "best_similarity": round(float(score[i]), 4)}
+                      for i in np.flatnonzero(~assigned)]
+        report = {"min_sim": args.min_sim, "global": args.global_match, "kinds": list(kinds),
+                  "units": units_report, "unassigned": unassigned}
+        Path(args.report).write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding="utf-8")
+        logger.info(f"Report: {args.report}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+# mcq_dedup.py
+#
+# Find near-duplicate MCQ stems across all banks with MinHash + LSH banding
+# (candidate pairs only, no all-pairs comparison).
+#
+# Usage:
+#   python mcq_dedup.py                                  # report clusters for ./*/ banks
+#   python mcq_dedup.py --threshold 0.6 --report dups.json
+#   python mcq_dedup.py --drop --out dedup_xml           # XML export without duplicates
+#
+# Requirements:
+#   pip install lxml
+#
+# Stems are normalized before shingling: \mathrm{...}/\text{...} wrappers and
+# \( \) delimiters are removed, Unicode sub/superscripts are folded (NFKC) and
+# case/punctuation are ignored, so "\(\mathrm{ECl_3}\)" and "ECl₃" compare equal.
+
+import argparse
+import hashlib
+import json
+import logging
+import random
+import re
+import unicodedata
+from collections import defaultdict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Set, Tuple
+
+from convert_txt_moodle_xml import MCQ, write_moodle_xml
+from mcq_bank import BankFile, is_valid, iter_bank_files, load_bank
+
+
+MERSENNE_PRIME = (1 << 61) - 1
+MAX_HASH = (1 << 32) - 1
+
+LATEX_WRAPPER_RE = re.compile(r"\\(?:mathrm|text|textrm|mathbf|mathit|operatorname)\s*\{([^{}]*)\}")
+LATEX_DELIM_RE = re.compile(r"\\[()\[\]]")
+LATEX_CMD_RE = re.compile(r"\\([A-Za-z]+)")
+NON_WORD_RE = re.compile(r"[^\w]+")
+
+
+@dataclass
+class Entry:
+    bank: BankFile
+    q: MCQ
+
+    @property
+    def label(self) -> str:
+        return f"{self.bank.key} q{self.q.qnum}"
+
+
+def normalize_stem(text: str) -> str:
+    """Strip LaTeX wrappers/delimiters, fold sub/superscripts, lowercase, collapse punctuation."""
+    text = unicodedata.normalize("NFKC", text)
+    prev = None
+    while prev != text:  # unwrap nested \mathrm{\mathrm{..}}
+        prev = text
+        text = LATEX_WRAPPER_RE.sub(r"\1", text)
+    text = LATEX_DELIM_RE.sub(" ", text)
+    text = LATEX_CMD_RE.sub(r" \1 ", text)
+    text = text.replace("_", "").replace("^", "")
+    text = NON_WORD_RE.sub(" ", text.lower())
+    return " ".join(text.split())
+
+
+def shingles(text: str, k: int = 3) -> Set[int]:
+    """Hashed word k-shingles (falls back to the whole text for very short stems)."""
+    words = text.split()
+    if len(words) < k:
+        grams = [" ".join(words)] if words else []
+    else:
+        grams = [" ".join(words[i:i + k]) for i in range(len(words) - k + 1)]
+    return {
+        int.from_bytes(hashlib.blake2b(g.encode("utf-8"), digest_size=4).digest(), "little")
+        for g in grams
+    }
+
+
+class MinHasher:
+    def __init__(self, num_perm: int = 128, seed: int = 1):
+        rng = random.Random(seed)
+        self.num_perm = num_perm
+        self.params = [(rng.randrange(1, MERSENNE_PRIME), rng.randrange(0, MERSENNE_PRIME)) for _ in range(num_perm)]
+
+    def signature(self, shingle_set: Set[int]) -> Tuple[int, ...]:
+        if not shingle_set:
+            return tuple([MAX_HASH] * self.num_perm)
+        return tuple(
+            min(((a * x + b) % MERSENNE_PRIME) & MAX_HASH for x in shingle_set)
+            for a, b in self.params
+        )
+
+
+def lsh_candidates(signatures: List[Tuple[int, ...]], bands: int) -> Set[Tuple[int, int]]:
+    """Pairs of indices that collide in at least one band."""
+    rows = len(signatures[0]) // bands
+    pairs: Set[Tuple[int, int]] = set()
+    for b in range(bands):
+        buckets: Dict[Tuple[int, ...], List[int]] = defaultdict(list)
+        lo, hi = b * rows, (b + 1) * rows
+        for idx, sig in enumerate(signatures):
+            buckets[sig[lo:hi]].append(idx)
+        for members in buckets.values():
+            if len(members) < 2:
+                continue
+            for i in range(len(members)):
+                for j in range(i + 1, len(members)):
+                    pairs.add((members[i], members[j]))
+    return pairs
+
+
+def jaccard(a: Set[int], b: Set[int]) -> float:
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+def find_clusters(entries: List[Entry], threshold: float, num_perm: int, bands: int) -> List[List[Tuple[int, float]]]:
+    """
+    Returns clusters as [(entry_index, similarity_to_first), ...], first = representative
+    (the earliest entry in bank order, which is the one kept by --drop). Clusters are
+    connected components, so a member reached through another member can be below
+    threshold to the representative; --drop keeps those.
+    """
+    hasher = MinHasher(num_perm=num_perm)
+    shingle_sets = [shingles(normalize_stem(e.q.question)) for e in entries]
+    signatures = [hasher.signature(s) for s in shingle_sets]
+
+    parent = list(range(len(entries)))
+
+    def find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    similarity: Dict[Tuple[int, int], float] = {}
+    for i, j in lsh_candidates(signatures, bands):
+        sim = jaccard(shingle_sets[i], shingle_sets[j])
+        if sim >= threshold:
+            similarity[(i, j)] = sim
+            ri, rj = find(i), find(j)
+            if ri != rj:
+                parent[max(ri, rj)] = min(ri, rj)
+
+    groups: Dict[int, List[int]] = defaultdict(list)
+    for i in range(len(entries)):
+        groups[find(i)].append(i)
+
+    clusters = []
+    for members in groups.values():
+        if len(members) < 2:
+            continue
+        members.sort()
+        rep = members[0]
+        cluster = [(rep, 1.0)]
+        for m in members[1:]:
+            sim = similarity.get((rep, m))
+            if sim is None:
+                sim = jaccard(shingle_sets[rep], shingle_sets[m])
+            cluster.append((m, sim))
+        clusters.append(cluster)
+    clusters.sort(key=lambda c: (-len(c), c[0][0]))
+    return clusters
+
+
+def setup_logger() -> logging.Logger:
+    logger = logging.getLogger("mcq_dedup")
+    logger.setLevel(logging.INFO)
+    if not logger.handlers:
+        ch = logging.StreamHandler()
+        ch.setFormatter(logging.Formatter("%(message)s"))
+        logger.addHandler(ch)
+    return logger
+
+
+def main() -> None:
+    here = Path(__file__).resolve().parent
+    ap = argparse.ArgumentParser(description="Near-duplicate MCQ detection with MinHash/LSH.")
+    ap.add_argument("--root", default=str(here), help="MCQ root folder (default: this script's folder).")
+    ap.add_argument("--threshold", type=float, default=0.7, help="Jaccard similarity of stems (default 0.7).")
+    ap.add_argument("--num-perm", type=int, default=128, help="MinHash permutations (default 128).")
+    ap.add_argument("--bands", type=int, default=32, help="LSH bands; must divide --num-perm (default 32).")
+    ap.add_argument("--report", help="Write clusters as JSON to this file.")
+    ap.add_argument("--drop", action="store_true", help="Write Moodle XML banks with duplicates removed.")
+    ap.add_argument("--out", help="Output folder for --drop (mirrors <subject>/<bank>.xml).")
+    args = ap.parse_args()
+
+    if args.num_perm % args.bands:
+        raise SystemExit("--bands must divide --num-perm")
+    if args.drop and not args.out:
+        raise SystemExit("--drop needs --out")
+
+    root = Path(args.root)
+    if not root.exists() or not root.is_dir():
+        raise SystemExit(f"Folder not found: {root}")
+
+    logger = setup_logger()
+    quiet = logging.getLogger("mcq_dedup.parse")
+    quiet.addHandler(logging.NullHandler())
+    quiet.propagate = False
+
+    banks = list(iter_bank_files(root))
+    entries: List[Entry] = []
+    for bank in banks:
+        questions, _errors = load_bank(bank, quiet)
+        entries.extend(Entry(bank, q) for q in questions if is_valid(q))
+    logger.info(f"Loaded {len(entries)} questions from {len(banks)} banks")
+    if not entries:
+        return
+
+    clusters = find_clusters(entries, args.threshold, args.num_perm, args.bands)
+    duplicates = sum(len(c) - 1 for c in clusters)
+    logger.info(f"Near-duplicate clusters: {len(clusters)} ({duplicates} duplicate questions)\n")
+
+    for n, cluster in enumerate(clusters, start=1):
+        rep = entries[cluster[0][0]]
+        logger.info(f"[{n}] {rep.label}: {' '.join(rep.q.question.split())[:100]}")
+        for idx, sim in cluster[1:]:
+            note = "" if sim >= args.threshold else "  (chained; below threshold to the first, kept by --drop)"
+            logger.info(f"     {sim:.2f}  {entries[idx].label}{note}")
+
+    if args.report:
+        report = [
+            [{"bank": entries[i].bank.key, "qnum": entries[i].q.qnum, "similarity": round(sim, 4)} for i, sim in c]
+            for c in clusters
+        ]
+        Path(args.report).write_text(json.dumps(report, indent=2), encoding="utf-8")
+        logger.info(f"\nReport: {args.report}")
+
+    if args.drop:
+        dropped = {i for c in clusters for i, sim in c[1:] if sim >= args.threshold}
+        kept: Dict[str, List[Entry]] = defaultdict(list)
+        for i, e in enumerate(entries):
+            if i not in dropped:
+                kept[e.bank.key].append(e)
+        out = Path(args.out)
+        for bank in banks:
+            items = kept.get(bank.key, [])
+            if not items:
+                continue
+            xml_path = out / bank.subject / f"{bank.path.stem}.xml"
+            xml_path.parent.mkdir(parents=True, exist_ok=True)
+            write_moodle_xml([e.q for e in items], xml_path, bank=bank.path.stem)
+        chained = duplicates - len(dropped)
+        logger.info(f"\nDropped {len(dropped)} duplicates (kept {chained} chained below {args.threshold}); "
+                    f"deduplicated XML written to {out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+# mcq_index.py
+#
+# Build / query a SQLite (FTS5) index over every MCQ bank in this folder tree.
+#
+# Usage:
+#   python mcq_index.py                                   # (re)index ./*/{advanced,basic,intermediate}_NN
+#   python mcq_index.py --search '\mathrm{ECl_3}' --level advanced
+#   python mcq_index.py --search 'hydrolysis halides' --subject inorganic --unit 3
+#   python mcq_index.py --search 'hydroly* NEAR(halide*)' --raw
+#
+# Requirements:
+#   pip install lxml
+#
+# Output:
+#   - mcq_index.sqlite3 next to this script (override with --db)
+#
+# Each bank is read from .txt via parse_questions, or from .xml when the XML is
+# newer. Banks whose file hash is unchanged since the last run are skipped, so
+# re-indexing after an edit only touches the edited bank.
+
+import argparse
+import json
+import logging
+import sqlite3
+import time
+from pathlib import Path
+from typing import List, Optional
+
+from mcq_bank import BankFile, file_sha256, is_valid, iter_bank_files, load_bank
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS banks (
+    bank_key   TEXT PRIMARY KEY,   -- inorganic/advanced_03
+    path       TEXT NOT NULL,
+    source     TEXT NOT NULL,      -- txt | xml
+    sha256     TEXT NOT NULL,
+    subject    TEXT NOT NULL,
+    level      TEXT NOT NULL,
+    unit       INTEGER NOT NULL,
+    indexed_at INTEGER NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS questions (
+    id          INTEGER PRIMARY KEY,
+    bank_key    TEXT NOT NULL REFERENCES banks(bank_key) ON DELETE CASCADE,
+    qnum        INTEGER NOT NULL,
+    subject     TEXT NOT NULL,
+    level       TEXT NOT NULL,
+    unit        INTEGER NOT NULL,
+    question    TEXT NOT NULL,
+    options     TEXT NOT NULL,     -- JSON {"A": "...", ...}
+    correct_key TEXT,
+    explanation TEXT NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS questions_bank ON questions(bank_key);
+CREATE INDEX IF NOT EXISTS questions_filter ON questions(level, subject, unit);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS questions_fts USING fts5(
+    question, options, explanation,
+    content='questions', content_rowid='id'
+);
+
+CREATE TRIGGER IF NOT EXISTS questions_ai AFTER INSERT ON questions BEGIN
+    INSERT INTO questions_fts(rowid, question, options, explanation)
+    VALUES (new.id, new.question, new.options, new.explanation);
+END;
+
+CREATE TRIGGER IF NOT EXISTS questions_ad AFTER DELETE ON questions BEGIN
+    INSERT INTO questions_fts(questions_fts, rowid, question, options, explanation)
+    VALUES ('delete', old.id, old.question, old.options, old.explanation);
+END;
+"""
+
+
+def connect(db_path: Path) -> sqlite3.Connection:
+    conn = sqlite3.connect(str(db_path))
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA foreign_keys = ON")
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("PRAGMA synchronous = NORMAL")
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def index_bank(conn: sqlite3.Connection, bank: BankFile, sha: str, logger: logging.Logger) -> int:
+    questions, _errors = load_bank(bank, logger)
+    valid = [q for q in questions if is_valid(q)]
+
+    conn.execute("DELETE FROM questions WHERE bank_key = ?", (bank.key,))
+    conn.execute(
+        "INSERT OR REPLACE INTO banks(bank_key, path, source, sha256, subject, level, unit, indexed_at) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+        (bank.key, str(bank.path), bank.source, sha, bank.subject, bank.level, bank.unit, int(time.time())),
+    )
+    conn.executemany(
+        "INSERT INTO questions(bank_key, qnum, subject, level, unit, question, options, correct_key, explanation) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        [
+            (
+                bank.key, q.qnum, bank.subject, bank.level, bank.unit, q.question,
+                json.dumps(q.options, ensure_ascii=False), q.correct_key, q.explanation,
+            )
+            for q in valid
+        ],
+    )
+    return len(valid)
+
+
+def update_index(conn: sqlite3.Connection, root: Path, logger: logging.Logger) -> None:
+    known = {row["bank_key"]: (row["path"], row["sha256"]) for row in conn.execute("SELECT bank_key, path, sha256 FROM banks")}
+    seen = set()
+    indexed = skipped = total_q = 0
+
+    with conn:
+        for bank in iter_bank_files(root):
+            seen.add(bank.key)
+            sha = file_sha256(bank.path)
+            if known.get(bank.key) == (str(bank.path), sha):
+                skipped += 1
+                continue
+            n = index_bank(conn, bank, sha, logger)
+            logger.info(f"Indexed {bank.key} ({bank.source}): {n} questions")
+            indexed += 1
+            total_q += n
+
+        removed = set(known) - seen
+        for key in removed:
+            conn.execute("DELETE FROM banks WHERE bank_key = ?", (key,))
+            logger.info(f"Removed {key}")
+
+    count = conn.execute("SELECT COUNT(*) FROM questions").fetchone()[0]
+    logger.info(f"Banks indexed: {indexed}, unchanged: {skipped}, removed: {len(removed)}")
+    logger.info(f"Questions in index: {count}")
+
+
+def to_fts_phrase(text: str) -> str:
+    """Quote user text as one FTS5 phrase so LaTeX like \\mathrm{ECl_3} is safe to search."""
+    return '"' + text.replace('"', '""') + '"'
+
+
+def search(
+    conn: sqlite3.Connection,
+    query: str,
+    raw: bool = False,
+    level: Optional[str] = None,
+    subject: Optional[str] = None,
+    unit: Optional[int] = None,
+    limit: int = 50,
+) -> List[sqlite3.Row]:
+    sql = (
+        "SELECT q.bank_key, q.qnum, q.subject, q.level, q.unit, q.question, q.correct_key "
+        "FROM questions_fts f JOIN questions q ON q.id = f.rowid "
+        "WHERE questions_fts MATCH ?"
+    )
+    params: list = [query if raw else to_fts_phrase(query)]
+    if level:
+        sql += " AND q.level = ?"
+        params.append(level)
+    if subject:
+        sql += " AND q.subject = ?"
+        params.append(subject)
+    if unit is not None:
+        sql += " AND q.unit = ?"
+        params.append(unit)
+    sql += " ORDER BY bm25(questions_fts) LIMIT ?"
+    params.append(limit)
+    return conn.execute(sql, params).fetchall()
+
+
+def setup_logger() -> logging.Logger:
+    logger = logging.getLogger("mcq_index")
+    logger.setLevel(logging.INFO)
+    if not logger.handlers:
+        ch = logging.StreamHandler()
+        ch.setFormatter(logging.Formatter("%(message)s"))
+        logger.addHandler(ch)
+    return logger
+
+
+def main() -> None:
+    here = Path(__file__).resolve().parent
+    ap = argparse.ArgumentParser(description="Index MCQ banks into SQLite FTS5 and search them.")
+    ap.add_argument("--root", default=str(here), help="MCQ root folder (default: this script's folder).")
+    ap.add_argument("--db", default=None, help="SQLite file (default: <root>/mcq_index.sqlite3).")
+    ap.add_argument("--search", help="Search text (matched as a phrase unless --raw).")
+    ap.add_argument("--raw", action="store_true", help="Pass --search through as an FTS5 query.")
+    ap.add_argument("--level", choices=["basic", "intermediate", "advanced"])
+    ap.add_argument("--subject", help="Subject folder, e.g. inorganic.")
+    ap.add_argument("--unit", type=int)
+    ap.add_argument("--limit", type=int, default=50)
+    ap.add_argument("--no-update", action="store_true", help="Search without refreshing the index first.")
+    args = ap.parse_args()
+
+    root = Path(args.root)
+    if not root.exists() or not root.is_dir():
+        raise SystemExit(f"Folder not found: {root}")
+    db_path = Path(args.db) if args.db else root / "mcq_index.sqlite3"
+
+    logger = setup_logger()
+    conn = connect(db_path)
+
+    if args.search is None or not args.no_update:
+        if args.search is not None:
+            logger.setLevel(logging.WARNING)
+        update_index(conn, root, logger)
+
+    if args.search is None:
+        return
+
+    t0 = time.perf_counter()
+    rows = search(conn, args.search, args.raw, args.level, args.subject, args.unit, args.limit)
+    elapsed_ms = (time.perf_counter() - t0) * 1000
+
+    for row in rows:
+        stem = " ".join(row["question"].split())
+        print(f"{row['bank_key']} q{row['qnum']} [{row['level']}, unit {row['unit']}] ({row['correct_key']}) {stem[:120]}")
+    print(f"\n{len(rows)} match(es) in {elapsed_ms:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
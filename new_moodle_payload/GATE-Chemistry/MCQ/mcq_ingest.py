@@ -0,0 +1,438 @@
+#!/usr/bin/env python3
+# mcq_ingest.py
+#
+# Turn dumps of LLM-generated MCQs into reviewable text banks + Moodle XML.
+#
+# Usage:
+#   python mcq_ingest.py dumps/*.jsonl --out generated
+#   python mcq_ingest.py ../../pregenerated/objects --out generated --per-bank 40 --jobs 8
+#   python mcq_ingest.py history.jsonl --out generated --subject organic --level basic
+#
+# Requirements:
+#   pip install lxml
+#
+# Accepted JSONL lines (one response per line; directories are scanned for *.jsonl / *.json):
+#   - chat completion:        {"choices": [{"message": {"content": "..."}}], ...}
+#   - pregenerate.py store:   {"content": "...", "level": "basic", ...}
+#   - widget / history JSON:  {"questions": [...]}  or  {"status": "success", "data": {"questions": [...]}}
+# The content may itself be widget JSON or the widget's text format
+#   Q1. stem / A. .. D. / **Answer: B** / **Explanation:** ... / ---
+# Options may be a list or a dict keyed "A", "a", "(A)", "option_a" ...; the correct
+# answer may be a letter, "Option B", "(b)" or the option text.
+#
+# Output (per subject folder, next free bank number, never overwrites):
+#   <out>/<subject>/<level>_NN.txt   same N) / A. / Correct answer: / Explanation: format as the curated banks
+#   <out>/<subject>/<level>_NN.xml   build_moodle_tree schema (idnumber = bank + question number)
+#   <out>/rejected.jsonl             questions that failed validation, with source line and reasons
+#
+# Every question is rendered to bank text and parsed back with parse_questions, so a
+# question is accepted only if the curated-bank parser reads it back identically.
+# Input is read lazily in chunks handed to worker processes with a bounded number of
+# chunks in flight; only the banks currently being filled are held in memory.
+
+import argparse
+import json
+import logging
+import os
+import re
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Deque, Dict, Iterator, List, Optional, Tuple
+
+from convert_txt_moodle_xml import MCQ, normalize_space, parse_questions, question_hash, write_moodle_xml
+from mcq_bank import LEVELS, parse_bank_name
+
+
+KEYS = ("A", "B", "C", "D")
+
+QSPLIT_RE = re.compile(r"(?m)^\s*(?:\*\*)?Q(?:uestion)?\s*(\d+)\s*(?:\([^)\n]*\)\s*)?[.:)]\s*(?:\*\*)?\s*")  # "Q5 (Advanced). "
+TEXT_OPT_RE = re.compile(r"^\s*\(?([A-Da-d])[\).:]\s*(.*)$")
+ANSWER_RE = re.compile(r"^\s*\**\s*(?:Correct\s+)?Answer\s*:?\s*\**\s*:?\s*(.+?)\s*\**\s*$", re.IGNORECASE)
+EXPL_RE = re.compile(r"^\s*\**\s*Explanation\s*:?\s*\**\s*:?\s*(.*)$", re.IGNORECASE)
+SEPARATOR_RE = re.compile(r"^\s*-{3,}\s*$")
+BULLET_RE = re.compile(r"^\s*[-•]\s*")
+OPTION_KEY_RE = re.compile(r"^[\W_]*(?:option[\W_]*)?([A-Da-d])[\W_]*$", re.IGNORECASE)
+OPTION_PREFIX_RE = re.compile(r"^\s*\(?[A-Da-d][\).]\s+")
+LETTER_RE = re.compile(r"^\s*(?:option\s*[:\-]?\s*)?\(?([A-D])\)?\s*[.:)]?\s*$", re.IGNORECASE)   # B / (b) / Option C
+LETTER_TEXT_RE = re.compile(r"^\s*\(?([A-D])[).:]\s+(.+)$", re.IGNORECASE | re.DOTALL)              # "B) <option text>"
+
+_quiet = logging.getLogger("mcq_ingest.parse")
+_quiet.addHandler(logging.NullHandler())
+_quiet.propagate = False
+
+
+@dataclass
+class Candidate:
+    source: str                 # "file:line"
+    subject: str
+    level: str
+    question: str
+    options: Dict[str, str]
+    correct: str                # raw correct value before mapping
+    explanation: str
+
+
+# -------------------- Response shapes --------------------
+def response_payloads(record) -> Tuple[List, Dict]:
+    """(list of question dicts or text blobs, metadata) from one JSONL record."""
+    meta: Dict = {}
+    if isinstance(record, dict):
+        if record.get("status") == "success" and isinstance(record.get("data"), dict):
+            record = record["data"]
+        meta = dict(record.get("metadata") or {})
+        for key in ("level", "subject", "topic"):
+            if record.get(key) and key not in meta:
+                meta[key] = record[key]
+        if isinstance(record.get("questions"), list):
+            return record["questions"], meta
+        content = None
+        try:
+            content = record["choices"][0]["message"]["content"]
+        except (KeyError, IndexError, TypeError):
+            content = record.get("content") or record.get("botresponse")
+        if isinstance(content, str):
+            stripped = content.strip()
+            if stripped.startswith("{"):
+                try:
+                    inner, inner_meta = response_payloads(json.loads(stripped))
+                    return inner, {**inner_meta, **meta}
+                except ValueError:
+                    pass
+            return [content], meta
+    elif isinstance(record, list):
+        return record, meta
+    return [], meta
+
+
+def parse_text_response(text: str) -> List[Dict]:
+    """Widget text format (see ajax/mcq_widget_ajax.php parse_mcq_text_to_json) -> question dicts."""
+    text = text.replace("**DONE**", "")
+    pieces = QSPLIT_RE.split(text)
+    out = []
+    # pieces = [preamble, num, body, num, body, ...]
+    for i in range(1, len(pieces) - 1, 2):
+        body = pieces[i + 1]
+        stem: List[str] = []
+        options: Dict[str, str] = {}
+        correct = ""
+        explanation: List[str] = []
+        section = "stem"
+        last_opt = None
+        for line in body.splitlines():
+            if SEPARATOR_RE.match(line):
+                if section == "explanation":
+                    break
+                continue
+            m = ANSWER_RE.match(line) if section != "explanation" else None
+            if m:
+                correct = m.group(1).strip("* ")
+                section = "answer"
+                continue
+            m = EXPL_RE.match(line)
+            if m and section in ("answer", "options"):
+                section = "explanation"
+                if m.group(1).strip():
+                    explanation.append(BULLET_RE.sub("", m.group(1)).rstrip())
+                continue
+            if section == "explanation":
+                if line.strip():
+                    explanation.append(BULLET_RE.sub("", line).rstrip())
+                continue
+            m = TEXT_OPT_RE.match(line) if section in ("stem", "options") else None
+            if m and (section == "options" or stem):
+                last_opt = m.group(1).upper()
+                options[last_opt] = m.group(2).strip()
+                section = "options"
+                continue
+            if not line.strip():
+                continue
+            if section == "stem":
+                stem.append(line.strip())
+            elif section == "options" and last_opt:
+                options[last_opt] = (options[last_opt] + " " + line.strip()).strip()
+        out.append({
+            "question": "\n".join(stem),
+            "options": options,
+            "correct": correct,
+            "explanation": "\n".join(explanation),
+        })
+    return out
+
+
+def normalize_options(raw) -> Dict[str, str]:
+    """List or dict of options -> {"A": text, ...} (keys A-D, "A. " prefixes removed)."""
+    options: Dict[str, str] = {}
+    if isinstance(raw, list):
+        for key, value in zip(KEYS, raw):
+            if isinstance(value, dict):
+                value = value.get("text", "")
+            options[key] = OPTION_PREFIX_RE.sub("", str(value)).strip()
+    elif isinstance(raw, dict):
+        for k, value in raw.items():
+            m = OPTION_KEY_RE.match(str(k))
+            if m:
+                options[m.group(1).upper()] = OPTION_PREFIX_RE.sub("", str(value)).strip()
+    return {k: options[k] for k in KEYS if options.get(k)}
+
+
+def map_correct(raw, options: Dict[str, str]) -> Optional[str]:
+    """
+    Option key of the correct answer. The answer is matched against the option texts
+    first (exact, then normalized), so "a decrease in entropy" or "D-glucose" are not
+    read as letters; a letter is only accepted on its own ("B", "(b)", "Option C") or
+    in front of that option's own text ("B) 4.90 BM").
+    """
+    if isinstance(raw, int) and 0 <= raw < len(KEYS):
+        return KEYS[raw]
+    token = str(raw or "").strip()
+    for key, text in options.items():
+        if text == token:
+            return key
+    wanted = normalize_space(token).lower()
+    for key, text in options.items():
+        if normalize_space(text).lower() == wanted:
+            return key
+    m = LETTER_RE.match(token)
+    if m:
+        return m.group(1).upper()
+    m = LETTER_TEXT_RE.match(token)
+    if m and normalize_space(options.get(m.group(1).upper(), "")).lower() == normalize_space(m.group(2)).lower():
+        return m.group(1).upper()
+    return None
+
+
+# -------------------- Bank text round trip --------------------
+def one_line(text: str) -> str:
+    """Options and correct answers are single bank lines."""
+    return normalize_space(text)
+
+
+def format_bank_text(q: MCQ) -> str:
+    """Curated bank text for one question."""
+    lines = [f"{q.qnum}) {q.question}"]
+    for key in KEYS:
+        if key in q.options:
+            lines.append(f"{key}. {q.options[key]}")
+    lines.append("")
+    lines.append(f"Correct answer: {q.correct_key}")
+    lines.append("")
+    lines.append(f"Explanation: {q.explanation}")
+    lines.append("")
+    return "\n".join(lines) + "\n"
+
+
+def check_round_trip(q: MCQ) -> List[str]:
+    parsed, errors = parse_questions(format_bank_text(q).splitlines(True), _quiet, "generated")
+    problems = [e.split(": ", 1)[-1] for e in errors]
+    if not problems and (len(parsed) != 1 or question_hash(parsed[0]) != question_hash(q)):
+        problems.append("does not read back identically from bank text (option/answer-like line in a field?)")
+    return problems
+
+
+def candidate_to_mcq(c: Candidate) -> Tuple[Optional[MCQ], List[str]]:
+    options = normalize_options(c.options)
+    options = {k: one_line(v) for k, v in options.items()}
+    q = MCQ(qnum=1, question=c.question.strip(), options=options,
+            correct_key=map_correct(c.correct, options), explanation=c.explanation.strip())
+    if q.correct_key is None and str(c.correct).strip():
+        return None, [f"cannot map correct answer '{c.correct}' to an option"]
+    problems = check_round_trip(q)
+    return (None, problems) if problems else (q, [])
+
+
+# -------------------- Workers --------------------
+def _ingest_chunk(job) -> Tuple[List[Tuple[str, str, Dict]], List[Dict], int]:
+    """Parse + validate a chunk of (source, line) pairs. Returns (accepted, rejected, skipped)."""
+    chunk, default_subject, default_level = job
+    accepted, rejected = [], []
+    skipped = 0
+    for source, line in chunk:
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            rejected.append({"source": source, "reasons": [f"invalid JSON: {e}"]})
+            continue
+        if isinstance(record, dict) and record.get("function", "mcq_widget") not in ("mcq_widget", "mcq"):
+            skipped += 1      # e.g. ask_agent notes in a pregenerate.py store
+            continue
+        items, meta = response_payloads(record)
+        level = str(meta.get("level") or default_level).lower()
+        subject = default_subject or str(meta.get("subject") or "generated")
+        subject = re.sub(r"[^\w.-]+", "_", subject).strip("_") or "generated"
+        if level not in LEVELS:
+            rejected.append({"source": source, "reasons": [f"unknown level '{level}'"]})
+            continue
+        questions: List[Dict] = []
+        for item in items:
+            if isinstance(item, str):
+                questions.extend(parse_text_response(item))
+            elif isinstance(item, dict):
+                questions.append(item)
+        if not questions:
+            rejected.append({"source": source, "reasons": ["no questions found"]})
+            continue
+        for n, item in enumerate(questions, start=1):
+            cand = Candidate(
+                source=f"{source}#q{n}",
+                subject=subject,
+                level=level,
+                question=str(item.get("question") or item.get("stem") or ""),
+                options=item.get("options") or {},
+                correct=item.get("correct", item.get("answer", "")),
+                explanation=str(item.get("explanation") or ""),
+            )
+            q, problems = candidate_to_mcq(cand)
+            if q is None:
+                rejected.append({"source": cand.source, "question": cand.question[:200], "reasons": problems})
+            else:
+                accepted.append((subject, level, {
+                    "question": q.question, "options": q.options,
+                    "correct": q.correct_key, "explanation": q.explanation,
+                    "hash": question_hash(q),
+                }))
+    return accepted, rejected, skipped
+
+
+def iter_input_lines(paths: List[Path]) -> Iterator[Tuple[str, str]]:
+    for path in paths:
+        files = sorted(p for p in path.rglob("*") if p.suffix in (".jsonl", ".json")) if path.is_dir() else [path]
+        for f in files:
+            with open(f, "r", encoding="utf-8") as fh:
+                if f.suffix == ".json":
+                    yield f"{f}:1", fh.read()
+                    continue
+                for lineno, line in enumerate(fh, start=1):
+                    if line.strip():
+                        yield f"{f}:{lineno}", line
+
+
+def iter_chunks(lines: Iterator[Tuple[str, str]], size: int) -> Iterator[List[Tuple[str, str]]]:
+    chunk: List[Tuple[str, str]] = []
+    for item in lines:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+# -------------------- Bank writer --------------------
+class BankWriter:
+    """Fills <out>/<subject>/<level>_NN banks of at most per_bank questions each."""
+
+    def __init__(self, out: Path, per_bank: int):
+        self.out = out
+        self.per_bank = per_bank
+        self.open: Dict[Tuple[str, str], Tuple[str, List[MCQ]]] = {}
+        self.seen: set = set()
+        self.written: List[Path] = []
+        self.duplicates = 0
+
+    def _next_stem(self, subject: str, level: str) -> str:
+        folder = self.out / subject
+        used = [0]
+        if folder.is_dir():
+            for p in folder.iterdir():
+                parsed = parse_bank_name(p.stem)
+                if parsed and parsed[0] == level:
+                    used.append(parsed[1])
+        return f"{level}_{max(used) + 1:02d}"
+
+    def add(self, subject: str, level: str, fields: Dict) -> None:
+        q = MCQ(qnum=0, question=fields["question"], options=fields["options"],
+                correct_key=fields["correct"], explanation=fields["explanation"])
+        digest = fields["hash"]        # computed in the worker
+        if digest in self.seen:
+            self.duplicates += 1
+            return
+        self.seen.add(digest)
+        key = (subject, level)
+        if key not in self.open:
+            (self.out / subject).mkdir(parents=True, exist_ok=True)
+            stem = self._next_stem(subject, level)
+            (self.out / subject / f"{stem}.txt").write_text("", encoding="utf-8")   # reserve the number
+            self.open[key] = (stem, [])
+        stem, questions = self.open[key]
+        q.qnum = len(questions) + 1
+        questions.append(q)
+        with open(self.out / subject / f"{stem}.txt", "a", encoding="utf-8") as f:
+            f.write(format_bank_text(q) + "\n")
+        if len(questions) >= self.per_bank:
+            self._flush(key)
+
+    def _flush(self, key: Tuple[str, str]) -> None:
+        stem, questions = self.open.pop(key)
+        xml_path = self.out / key[0] / f"{stem}.xml"
+        write_moodle_xml(questions, xml_path, bank=stem)
+        self.written.append(xml_path)
+
+    def close(self) -> None:
+        for key in list(self.open):
+            self._flush(key)
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Ingest LLM-generated MCQ dumps into text + Moodle XML banks.")
+    ap.add_argument("inputs", nargs="+", help="JSONL/JSON files or folders (e.g. a pregenerate.py store).")
+    ap.add_argument("--out", required=True, help="Output folder (<subject>/<level>_NN.txt|xml).")
+    ap.add_argument("--subject", default="", help="Subject folder for every bank (default: metadata.subject or 'generated').")
+    ap.add_argument("--level", default="basic", choices=LEVELS, help="Level when a record has none.")
+    ap.add_argument("--per-bank", type=int, default=50, help="Questions per bank file.")
+    ap.add_argument("--chunk-size", type=int, default=200, help="Input lines per worker task.")
+    ap.add_argument("--jobs", type=int, default=os.cpu_count() or 1, help="Worker processes.")
+    args = ap.parse_args()
+
+    inputs = [Path(p) for p in args.inputs]
+    missing = [str(p) for p in inputs if not p.exists()]
+    if missing:
+        print(f"Not found: {', '.join(missing)}", file=sys.stderr)
+        return 1
+
+    out = Path(args.out)
+    out.mkdir(parents=True, exist_ok=True)
+    writer = BankWriter(out, args.per_bank)
+    accepted_total = 0
+    rejected_total = 0
+    skipped_total = 0
+
+    with open(out / "rejected.jsonl", "w", encoding="utf-8") as rejects, \
+            ProcessPoolExecutor(max_workers=max(1, args.jobs)) as pool:
+
+        def consume(result) -> None:
+            nonlocal accepted_total, rejected_total, skipped_total
+            accepted, rejected, skipped = result
+            skipped_total += skipped
+            for subject, level, fields in accepted:
+                writer.add(subject, level, fields)
+            accepted_total += len(accepted)
+            for item in rejected:
+                rejects.write(json.dumps(item, ensure_ascii=False) + "\n")
+            rejected_total += len(rejected)
+
+        # Bounded in-flight window, consumed in submission order (deterministic bank numbering).
+        window: Deque = deque()
+        max_in_flight = max(2, args.jobs * 2)
+        for chunk in iter_chunks(iter_input_lines(inputs), args.chunk_size):
+            window.append(pool.submit(_ingest_chunk, (chunk, args.subject, args.level)))
+            if len(window) >= max_in_flight:
+                consume(window.popleft().result())
+        while window:
+            consume(window.popleft().result())
+
+    writer.close()
+    print(f"Accepted questions: {accepted_total - writer.duplicates} "
+          f"({writer.duplicates} exact duplicates skipped)")
+    print(f"Rejected:           {rejected_total} (see {out / 'rejected.jsonl'})")
+    print(f"Skipped non-MCQ:    {skipped_total}")
+    print(f"Banks written:      {len(writer.written)}")
+    for path in writer.written:
+        print(f"  {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+# mcq_lint.py
+#
+# Lint MCQ text banks without writing any XML.
+#
+# Usage:
+#   python mcq_lint.py                                  # every *.txt bank under this folder
+#   python mcq_lint.py inorganic/advanced_03.txt        # single file (editor on-save hook)
+#   python mcq_lint.py inorganic organic --jobs 8
+#
+# Output:
+#   compiler-style diagnostics, one per line:
+#     inorganic/advanced_03.txt:41: q5 missing 'Correct answer:' line
+#   exit status 1 when any diagnostic is printed or a path does not exist (pre-commit friendly)
+#
+# Checks are the ones convert_txt_moodle_xml.py applies before writing XML: the
+# parse_questions validation plus identity_problems (repeated question numbers or
+# repeated content, which make the converter refuse the whole bank).
+# Results are cached per file content hash in .mcq_lint_cache.json, so only edited
+# files are re-parsed; uncached files are parsed in parallel worker processes.
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from convert_txt_moodle_xml import exportable, identity_problems, parse_questions
+
+
+# Bump when parse_questions/validate_question/identity_problems rules change so stale verdicts are dropped.
+LINT_VERSION = 2
+CACHE_FILENAME = ".mcq_lint_cache.json"
+
+_null_logger = logging.getLogger("mcq_lint.parse")
+_null_logger.addHandler(logging.NullHandler())
+_null_logger.propagate = False
+
+
+def lint_text(data: bytes, display_name: str) -> List[str]:
+    lines = data.decode("utf-8").splitlines(True)
+    questions, errors = parse_questions(lines, _null_logger, display_name)
+    for lineno, problem in identity_problems(exportable(questions)):
+        errors.append(f"{display_name}:{lineno}: {problem} (the converter skips this bank)")
+    return errors
+
+
+def _lint_job(job: Tuple[str, str]) -> Tuple[str, str, List[str]]:
+    path, display_name = job
+    data = Path(path).read_bytes()
+    digest = hashlib.sha256(data).hexdigest()
+    try:
+        return path, digest, lint_text(data, display_name)
+    except UnicodeDecodeError as e:
+        return path, digest, [f"{display_name}:1: file is not valid UTF-8 ({e.reason})"]
+
+
+def collect_files(targets: List[Path]) -> List[Path]:
+    files: List[Path] = []
+    for t in targets:
+        if t.is_dir():
+            files.extend(sorted(p for p in t.rglob("*.txt") if p.is_file()))
+        elif t.is_file():
+            files.append(t)
+    seen = set()
+    unique = []
+    for f in files:
+        key = f.resolve()
+        if key not in seen:
+            seen.add(key)
+            unique.append(f)
+    return unique
+
+
+def load_cache(cache_path: Path) -> Dict[str, List[str]]:
+    try:
+        data = json.loads(cache_path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(data, dict) or data.get("version") != LINT_VERSION:
+        return {}
+    return data.get("entries", {})
+
+
+def save_cache(cache_path: Path, entries: Dict[str, List[str]]) -> None:
+    tmp = cache_path.with_name(cache_path.name + ".tmp")
+    tmp.write_text(json.dumps({"version": LINT_VERSION, "entries": entries}), encoding="utf-8")
+    tmp.replace(cache_path)
+
+
+def main() -> int:
+    here = Path(__file__).resolve().parent
+    ap = argparse.ArgumentParser(description="Validate MCQ text banks (no XML output).")
+    ap.add_argument("paths", nargs="*", help="Files or folders (default: this script's folder).")
+    ap.add_argument("--jobs", type=int, default=os.cpu_count() or 1, help="Worker processes.")
+    ap.add_argument("--cache", default=str(here / CACHE_FILENAME), help="Cache file.")
+    ap.add_argument("--no-cache", action="store_true", help="Ignore and do not update the cache.")
+    args = ap.parse_args()
+
+    targets = [Path(p) for p in args.paths] or [here]
+    missing = [t for t in targets if not t.exists()]
+    for t in missing:
+        print(f"{t}: no such file or folder", file=sys.stderr)
+    files = collect_files(targets)
+    if not files:
+        print("No .txt files found", file=sys.stderr)
+        return 1 if missing else 0
+
+    cache_path = Path(args.cache)
+    cache = {} if args.no_cache else load_cache(cache_path)
+
+    cwd = Path.cwd()
+
+    def display(p: Path) -> str:
+        try:
+            return os.path.relpath(p, cwd)
+        except ValueError:
+            return str(p)
+
+    # Cache key = content hash + display path (diagnostics embed the path).
+    diagnostics: Dict[str, List[str]] = {}
+    todo: List[Tuple[str, str]] = []
+    keys: Dict[str, str] = {}
+    for f in files:
+        data = f.read_bytes()
+        key = hashlib.sha256(data).hexdigest() + ":" + display(f)
+        keys[str(f)] = key
+        if key in cache:
+            diagnostics[str(f)] = cache[key]
+        else:
+            todo.append((str(f), display(f)))
+
+    if len(todo) > 1 and args.jobs > 1:
+        with ProcessPoolExecutor(max_workers=min(args.jobs, len(todo))) as pool:
+            results = list(pool.map(_lint_job, todo, chunksize=max(1, len(todo) // (args.jobs * 4))))
+    else:
+        results = [_lint_job(job) for job in todo]
+
+    for path, digest, errors in results:
+        diagnostics[path] = errors
+        keys[path] = digest + ":" + display(Path(path))
+
+    total = 0
+    for f in files:
+        for msg in diagnostics[str(f)]:
+            print(msg)
+            total += 1
+
+    if not args.no_cache:
+        live = {keys[str(f)]: diagnostics[str(f)] for f in files}
+        # Keep verdicts for files outside this run (e.g. linting a single file),
+        # drop stale verdicts for files that were checked now.
+        checked = {display(f) for f in files}
+        merged = {k: v for k, v in cache.items() if k.split(":", 1)[1] not in checked}
+        merged.update(live)
+        save_cache(cache_path, merged)
+
+    print(f"{len(files)} file(s) checked ({len(todo)} parsed, {len(files) - len(todo)} cached), "
+          f"{total} problem(s)", file=sys.stderr)
+    return 1 if total or missing else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+# mcq_pack.py
+#
+# Pack converted MCQ banks into compact JSON flashcard packs that
+# blocks/ai_assistant/ajax/mcq_widget_ajax.php can serve without an LLM call.
+#
+# Usage:
+#   python mcq_pack.py --bank inorganic \
+#       --payload ../6-months-moodle-payload/inorganic_chemistry \
+#       --out packs/GATECHEM100
+#
+# Requirements:
+#   pip install lxml pyyaml
+#
+# Output (copy --out to blocks/ai_assistant/mcq_packs/<mainsubject>/):
+#   - <subject_key>/<topic_key>/<level>.json   {"questions": [...], "metadata": {...}}
+#   - index.json                               lookup by subject_key|topic_key|level and by tag
+#
+# Bank unit NN is matched to the unit_NN row of the payload's batch.csv, so
+# subject_key/topic_key/tags are exactly the data-subject/data-topic/data-tags
+# values the generated lesson links send to the widget.
+
+import argparse
+import csv
+import json
+import logging
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import yaml
+
+from convert_txt_moodle_xml import MCQ
+from mcq_bank import BankFile, file_sha256, is_valid, iter_bank_files, load_bank
+
+
+PACK_FORMAT_VERSION = "1.0"
+WIDGET_OPTIONS = 4          # the widget's parser expects exactly options A-D
+
+
+def convert_to_snake_case(text):
+    """Convert text to snake_case (same rule as the *_moodle_payload_create.py link generators)."""
+    return text.lower().replace(' ', '_').replace('-', '_')
+
+
+def load_csv_mapping(csv_path: Path) -> Dict[str, str]:
+    """Load batch.csv and create mapping of filename_prefix -> topic (lesson_topic)."""
+    mapping = {}
+    with open(csv_path, 'r', encoding='utf-8') as f:
+        reader = csv.reader(f)
+        for row in reader:
+            if len(row) >= 2:
+                mapping[row[1].strip()] = row[0].strip()
+    return mapping
+
+
+def load_unit_info(yaml_path: Path) -> Tuple[str, List[str]]:
+    """Return (subject, tags) of a unit_NN.yaml; tags are collected from learning_path items."""
+    if not yaml_path.exists():
+        return "", []
+    with open(yaml_path, encoding="utf-8") as f:
+        data = yaml.safe_load(f) or {}
+
+    subject = str((data.get("metadata") or {}).get("subject", "")).strip()
+    tags: List[str] = []
+    for item in data.get("learning_path") or []:
+        if not isinstance(item, dict):
+            continue
+        item_tags = item.get("tags") or []
+        if not isinstance(item_tags, list):
+            item_tags = [item_tags]
+        for t in item_tags:
+            t = str(t).strip()
+            if t and t not in tags:
+                tags.append(t)
+    return subject, tags
+
+
+def mcq_to_widget_question(q: MCQ) -> Dict:
+    """Shape of one entry in mcq_widget_ajax.php's data.questions[]."""
+    keys = sorted(q.options)
+    options = [" ".join(q.options[k].split()) for k in keys]
+    correct = chr(ord("A") + keys.index(q.correct_key))
+    return {
+        "question": q.question.strip(),
+        "options": options[:WIDGET_OPTIONS],
+        "correct": correct,
+        "explanation": q.explanation.strip() or "No explanation provided.",
+    }
+
+
+def build_pack(bank: BankFile, questions: List[MCQ], subject: str, topic: str, tags: List[str]) -> Dict:
+    items = [mcq_to_widget_question(q) for q in questions]
+    return {
+        "questions": items,
+        "metadata": {
+            "level": bank.level,
+            "count": len(items),
+            "subject": subject,
+            "topic": topic,
+            "tags": ",".join(tags),
+            "source": bank.key,
+            "is_dummy": False,
+            "format_version": PACK_FORMAT_VERSION,
+        },
+    }
+
+
+def load_index(index_path: Path) -> Dict:
+    if index_path.exists():
+        try:
+            index = json.loads(index_path.read_text(encoding="utf-8"))
+            if isinstance(index, dict) and "packs" in index:
+                return index
+        except ValueError:
+            pass
+    return {"format_version": PACK_FORMAT_VERSION, "packs": {}, "tags": {}}
+
+
+def rebuild_tag_map(index: Dict) -> None:
+    """tags[<tag>|<level>] -> [pack keys]; the widget uses it when subject/topic do not match."""
+    tag_map: Dict[str, List[str]] = {}
+    for key, entry in sorted(index["packs"].items()):
+        for tag in entry.get("tags", []):
+            tag_map.setdefault(f"{tag}|{entry['level']}", []).append(key)
+    index["tags"] = tag_map
+
+
+def setup_logger() -> logging.Logger:
+    logger = logging.getLogger("mcq_pack")
+    logger.setLevel(logging.INFO)
+    if not logger.handlers:
+        ch = logging.StreamHandler()
+        ch.setFormatter(logging.Formatter("%(message)s"))
+        logger.addHandler(ch)
+    return logger
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Build mcq_widget flashcard packs from converted MCQ banks.")
+    ap.add_argument("--bank", required=True, help="MCQ subject folder, e.g. inorganic.")
+    ap.add_argument("--payload", required=True, help="Payload folder with batch.csv and unit_NN.yaml.")
+    ap.add_argument("--out", required=True, help="Output folder for packs and index.json.")
+    ap.add_argument("--subject", default="", help="Subject name when unit YAML has none (e.g. 'Inorganic Chemistry').")
+    args = ap.parse_args()
+
+    bank_folder = Path(args.bank)
+    payload = Path(args.payload)
+    out = Path(args.out)
+    for folder in (bank_folder, payload):
+        if not folder.exists() or not folder.is_dir():
+            raise SystemExit(f"Folder not found: {folder}")
+    csv_path = payload / "batch.csv"
+    if not csv_path.exists():
+        raise SystemExit(f"batch.csv not found in {payload}")
+
+    logger = setup_logger()
+    mapping = load_csv_mapping(csv_path)
+    index_path = out / "index.json"
+    index = load_index(index_path)
+
+    written = 0
+    for bank in iter_bank_files(bank_folder):
+        if bank.subject != bank_folder.name:
+            continue
+        prefix = f"unit_{bank.unit:02d}"
+        topic = mapping.get(prefix)
+        if not topic:
+            logger.info(f"Skipping {bank.key}: no {prefix} row in batch.csv")
+            continue
+
+        subject, tags = load_unit_info(payload / f"{prefix}.yaml")
+        subject = subject or args.subject
+        if not subject:
+            logger.info(f"Skipping {bank.key}: no subject in {prefix}.yaml (use --subject)")
+            continue
+
+        questions, _errors = load_bank(bank, logger)
+        valid = [q for q in questions if is_valid(q)]
+        short = [q for q in valid if len(q.options) < WIDGET_OPTIONS]
+        for q in short:
+            logger.info(f"Refusing {bank.key} q{q.qnum}: {len(q.options)} options, the widget needs {WIDGET_OPTIONS}")
+        valid = [q for q in valid if len(q.options) >= WIDGET_OPTIONS]
+        if not valid:
+            logger.info(f"Skipping {bank.key}: no valid questions")
+            continue
+
+        subject_key = convert_to_snake_case(subject)
+        topic_key = convert_to_snake_case(topic)
+        pack = build_pack(bank, valid, subject_key, topic_key, tags)
+
+        rel = Path(subject_key) / topic_key / f"{bank.level}.json"
+        pack_path = out / rel
+        pack_path.parent.mkdir(parents=True, exist_ok=True)
+        pack_path.write_text(json.dumps(pack, ensure_ascii=False, separators=(",", ":")), encoding="utf-8")
+
+        index["packs"][f"{subject_key}|{topic_key}|{bank.level}"] = {
+            "file": rel.as_posix(),
+            "level": bank.level,
+            "count": len(valid),
+            "tags": tags,
+            "source": bank.key,
+            "source_sha256": file_sha256(bank.path),
+        }
+        written += 1
+        logger.info(f"Packed {bank.key} -> {rel.as_posix()} ({len(valid)} questions)")
+
+    rebuild_tag_map(index)
+    out.mkdir(parents=True, exist_ok=True)
+    index_path.write_text(json.dumps(index, ensure_ascii=False, indent=1, sort_keys=True), encoding="utf-8")
+    logger.info(f"\nPacks written: {written}; packs in index: {len(index['packs'])}")
+    logger.info(f"Index: {index_path}")
+
+
+if __name__ == "__main__":
+    main()
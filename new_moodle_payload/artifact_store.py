@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Content-addressed store for generated artifacts (lesson HTML, JSON), so a
+page rendered from the same inputs is built and stored once however many
+exam/plan folders carry it.
+
+  <store>/objects/ab/<sha256 of content>    read-only blob
+  <store>/keys/ab/<sha256 of render key>    content sha256 the key produced
+
+A render key hashes the renderer identity and every input (unit YAML bytes,
+profile, topic). On a key hit the tool skips parsing and rendering and just
+places the blob. Placing hardlinks the blob into the output folder (copy
+when the store is on another filesystem); output files are always replaced
+by rename, never edited in place, so a hardlinked blob cannot be changed
+through a payload folder.
+
+Usage:
+  python artifact_store.py stats --store new_moodle_payload/.artifact_store
+  python artifact_store.py gc --store ...          # drop blobs no folder links to any more
+  python derive_plans.py --master ... --store new_moodle_payload/.artifact_store
+
+Requirements:
+  (standard library only)
+"""
+
+import argparse
+import hashlib
+import os
+import shutil
+import stat
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Union
+
+from output_sink import write_atomic
+
+
+HERE = Path(__file__).resolve().parent
+DEFAULT_STORE = HERE / ".artifact_store"
+
+
+def sha256_bytes(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def render_key(*parts: Union[str, bytes]) -> str:
+    """Stable key over renderer id and inputs (length-prefixed so parts cannot run together)."""
+    h = hashlib.sha256()
+    for part in parts:
+        raw = part.encode("utf-8") if isinstance(part, str) else part
+        h.update(len(raw).to_bytes(8, "little"))
+        h.update(raw)
+    return h.hexdigest()
+
+
+def source_fingerprint(paths: Iterable[Path]) -> str:
+    """Renderer identity: hash of the code that renders (change the code, miss the cache)."""
+    return render_key(*(Path(p).read_bytes() for p in paths))
+
+
+class ArtifactStore:
+    def __init__(self, root):
+        self.root = Path(root)
+        self.objects = self.root / "objects"
+        self.keys = self.root / "keys"
+        self.objects.mkdir(parents=True, exist_ok=True)
+        self.keys.mkdir(parents=True, exist_ok=True)
+        self.counts: Dict[str, int] = {"hits": 0, "misses": 0, "stored": 0, "linked": 0, "copied": 0, "in_place": 0}
+
+    def object_path(self, digest: str) -> Path:
+        return self.objects / digest[:2] / digest
+
+    def _key_path(self, key: str) -> Path:
+        return self.keys / key[:2] / key
+
+    def lookup(self, key: str) -> Optional[str]:
+        """Content digest for a render key, if both the key and its blob exist."""
+        try:
+            digest = self._key_path(key).read_text(encoding="ascii").strip()
+        except OSError:
+            self.counts["misses"] += 1
+            return None
+        if not self.object_path(digest).exists():
+            self.counts["misses"] += 1
+            return None
+        self.counts["hits"] += 1
+        return digest
+
+    def put(self, data: bytes, key: Optional[str] = None) -> str:
+        """Store data once (by content); remember key -> digest when given."""
+        digest = sha256_bytes(data)
+        path = self.object_path(digest)
+        if not path.exists():
+            write_atomic(path, data)
+            os.chmod(path, stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH)
+            self.counts["stored"] += 1
+        if key is not None:
+            write_atomic(self._key_path(key), digest.encode("ascii"))
+        return digest
+
+    def read(self, digest: str) -> bytes:
+        return self.object_path(digest).read_bytes()
+
+    def place(self, digest: str, dest) -> bool:
+        """Make dest hold the blob (hardlink, else copy). Returns False when it already did."""
+        dest = Path(dest)
+        blob = self.object_path(digest)
+        try:
+            dst = dest.stat()
+            if os.path.samestat(dst, blob.stat()):
+                self.counts["in_place"] += 1
+                return False
+            same_bytes = dst.st_size == blob.stat().st_size and dest.read_bytes() == blob.read_bytes()
+        except FileNotFoundError:
+            same_bytes = False
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        tmp = dest.with_name(f"{dest.name}.{os.getpid()}.tmp")
+        try:
+            os.link(blob, tmp)
+            self.counts["linked"] += 1
+        except OSError:
+            shutil.copyfile(blob, tmp)
+            self.counts["copied"] += 1
+        tmp.replace(dest)
+        # Identical bytes now share the blob's inode: the content did not change.
+        return not same_bytes
+
+    def summary(self) -> str:
+        return ", ".join(f"{k} {v}" for k, v in self.counts.items() if v)
+
+    def stats(self) -> Dict[str, int]:
+        objects = size = unlinked = 0
+        for path in self.objects.glob("*/*"):
+            st = path.stat()
+            objects += 1
+            size += st.st_size
+            if st.st_nlink == 1:
+                unlinked += 1
+        keys = sum(1 for _ in self.keys.glob("*/*"))
+        return {"objects": objects, "bytes": size, "keys": keys, "objects_without_links": unlinked}
+
+    def gc(self) -> Dict[str, int]:
+        """
+        Remove blobs with no hardlink outside the store, then keys pointing at
+        removed blobs. Blobs placed by copy look unlinked; the next build stores them again.
+        """
+        removed = kept_keys = dropped_keys = 0
+        for path in self.objects.glob("*/*"):
+            if path.stat().st_nlink == 1:
+                path.unlink()
+                removed += 1
+        for path in self.keys.glob("*/*"):
+            digest = path.read_text(encoding="ascii").strip()
+            if self.object_path(digest).exists():
+                kept_keys += 1
+            else:
+                path.unlink()
+                dropped_keys += 1
+        return {"objects_removed": removed, "keys_kept": kept_keys, "keys_removed": dropped_keys}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect or clean the content-addressed artifact store.")
+    parser.add_argument("command", choices=["stats", "gc"])
+    parser.add_argument("--store", default=str(DEFAULT_STORE))
+    args = parser.parse_args()
+
+    if not Path(args.store).exists():
+        print(f"Error: store '{args.store}' does not exist")
+        return
+    store = ArtifactStore(args.store)
+    result = store.stats() if args.command == "stats" else store.gc()
+    for key, value in result.items():
+        print(f"{key:22s} {value}")
+
+
+if __name__ == "__main__":
+    main()
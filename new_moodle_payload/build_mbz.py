@@ -0,0 +1,516 @@
+#!/usr/bin/env python3
+"""
+Build a restorable Moodle course backup (.mbz) from one payload folder.
+
+  section 0           General (empty)
+  section 1..N        one per batch.csv row (topic), in CSV order
+    page activity     the unit's generated HTML (<prefix>_learning.html / _concepts.html)
+  question bank       Moodle XML banks (<level>_NN.xml, e.g. GATE-Chemistry/MCQ/inorganic) as
+                      course-context categories: <course> -> Unit NN: <topic> -> Basic/Intermediate/Advanced
+
+The archive is the standard moodle2 format (moodle_backup.xml + course/,
+sections/, activities/, questions.xml ...) written as a streamed tar.gz, so
+"-" can pipe straight to a file on the Moodle host. Like Moodle's own
+tgz_packer it starts with a .ARCHIVE_INDEX member listing every file with its
+size, which restore uses to list the archive without reading it through; the
+members are therefore built in memory and written once the index is known.
+Restore it with Site administration > Courses > Restore course (or
+admin/cli/restore_backup.php).
+Moodle 5.0 moves the restored course-context categories into a qbank module.
+
+Usage:
+  python build_mbz.py --folder GATE-Chemistry/6-months-moodle-payload/inorganic_chemistry \\
+      --mcq GATE-Chemistry/MCQ/inorganic --shortname GATECHEM-INORG-6M --out inorganic_6m.mbz
+  python build_mbz.py --folder ... --out - | ssh moodle 'cat > /tmp/course.mbz'
+
+Requirements:
+  pip install lxml pyyaml
+"""
+
+import argparse
+import hashlib
+import io
+import re
+import sys
+import tarfile
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+from xml.sax.saxutils import escape
+
+from lxml import etree as ET
+
+from payload_lib import LEVELS, PLAN_PROFILES, load_csv_mapping, plan_for_folder
+
+
+# Backups made by 4.3 restore on 4.3+ and 5.x.
+BACKUP_VERSION = "2023100900"
+BACKUP_RELEASE = "4.3"
+NULL = "$@NULL@$"
+ARCHIVE_INDEX = ".ARCHIVE_INDEX"
+ARCHIVE_INDEX_PREFIX = "Moodle archive file index. Count: "
+
+SYSTEM_CONTEXTID = 1
+COURSE_ID = 2
+COURSE_CONTEXTID = 20
+MODULE_CONTEXT_BASE = 1000
+
+BANK_RE = re.compile(r"^(advanced|basic|intermediate)_(\d+)$")
+CONTROL_CHARS_RE = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+
+# -------------------- Model --------------------
+@dataclass
+class Unit:
+    number: int            # section number
+    prefix: str            # unit_01
+    topic: str
+    html: str
+
+
+@dataclass
+class Answer:
+    text: str
+    fraction: str
+    feedback: str
+
+
+@dataclass
+class Question:
+    name: str
+    text: str
+    feedback: str
+    idnumber: str
+    single: str
+    shuffle: str
+    numbering: str
+    answers: List[Answer]
+
+
+@dataclass
+class Category:
+    id: int
+    name: str
+    parent: int
+    info: str = ""
+    questions: List[Question] = field(default_factory=list)
+
+
+# -------------------- XML helpers --------------------
+def x(value) -> str:
+    """Escape text the way backup_xml_writer does (NULL marker for None)."""
+    if value is None:
+        return NULL
+    return escape(CONTROL_CHARS_RE.sub("", str(value)))
+
+
+def tag(name: str, value, indent: int = 0) -> str:
+    return f"{' ' * indent}<{name}>{x(value)}</{name}>"
+
+
+def doc(lines: List[str]) -> bytes:
+    return ('<?xml version="1.0" encoding="UTF-8"?>\n' + "\n".join(lines) + "\n").encode("utf-8")
+
+
+def stamp(*parts) -> str:
+    return "examcatalyst+" + hashlib.sha1("|".join(str(p) for p in parts).encode("utf-8")).hexdigest()[:20]
+
+
+# -------------------- Input --------------------
+def load_units(folder: Path, plan: str) -> List[Unit]:
+    suffix = PLAN_PROFILES[plan]["html_suffix"]
+    units = []
+    for prefix, topic in load_csv_mapping(folder / "batch.csv").items():
+        if prefix == "filename_prefix":       # header row
+            continue
+        html_path = folder / f"{prefix}{suffix}"
+        if not html_path.exists():
+            print(f"⚠ WARNING: {html_path.name} not found; section '{topic}' gets an empty page", file=sys.stderr)
+            html = ""
+        else:
+            html = html_path.read_text(encoding="utf-8")
+        units.append(Unit(len(units) + 1, prefix, topic, html))
+    return units
+
+
+def _text(el: Optional[ET._Element]) -> str:
+    if el is None:
+        return ""
+    t = el.find("text")
+    return (t.text or "") if t is not None else (el.text or "")
+
+
+def read_moodle_xml_bank(path: Path) -> List[Question]:
+    """Multichoice questions of a Moodle XML file (convert_txt_moodle_xml.py output)."""
+    tree = ET.parse(str(path), ET.XMLParser(strip_cdata=False, resolve_entities=False))
+    out = []
+    for q in tree.getroot().iter("question"):
+        if q.get("type") != "multichoice":
+            continue
+        answers = [
+            Answer(_text(a), f"{float(a.get('fraction', '0')) / 100:.7f}", _text(a.find("feedback")))
+            for a in q.findall("answer")
+        ]
+        out.append(Question(
+            name=_text(q.find("name")) or "Question",
+            text=_text(q.find("questiontext")),
+            feedback=_text(q.find("generalfeedback")),
+            idnumber=(q.findtext("idnumber") or "").strip(),
+            single=(q.findtext("single") or "true").strip(),
+            shuffle=(q.findtext("shuffleanswers") or "1").strip(),
+            numbering=(q.findtext("answernumbering") or "ABCD").strip(),
+            answers=answers,
+        ))
+    return out
+
+
+def load_categories(mcq_dir: Optional[Path], units: List[Unit], course_name: str) -> List[Category]:
+    """top -> course -> unit -> level categories holding the banks' questions."""
+    if mcq_dir is None:
+        return []
+    topics = {int(u.prefix.rsplit("_", 1)[-1]): u.topic for u in units if re.search(r"_\d+$", u.prefix)}
+    banks: Dict[int, Dict[str, Path]] = {}
+    for path in sorted(mcq_dir.glob("*.xml")):
+        m = BANK_RE.match(path.stem)
+        if m:
+            banks.setdefault(int(m.group(2)), {})[m.group(1)] = path
+    if not banks:
+        print(f"⚠ WARNING: no <level>_NN.xml banks in {mcq_dir}", file=sys.stderr)
+        return []
+
+    top = Category(1, "top", 0)
+    root = Category(2, course_name, 1, info=f"Imported from {mcq_dir.name}")
+    categories = [top, root]
+    for unit_no in sorted(banks):
+        label = f"Unit {unit_no:02d}: {topics[unit_no]}" if unit_no in topics else f"Unit {unit_no:02d}"
+        unit_cat = Category(len(categories) + 1, label, root.id)
+        categories.append(unit_cat)
+        for level in LEVELS:
+            path = banks[unit_no].get(level)
+            if path is None:
+                continue
+            level_cat = Category(len(categories) + 1, level.capitalize(), unit_cat.id, info=path.name)
+            level_cat.questions = read_moodle_xml_bank(path)
+            categories.append(level_cat)
+    return categories
+
+
+# -------------------- Backup documents --------------------
+def moodle_backup_xml(args, units: List[Unit], filename: str, now: int) -> bytes:
+    L = ["<moodle_backup>", "  <information>"]
+    info = [
+        ("name", filename), ("moodle_version", BACKUP_VERSION), ("moodle_release", BACKUP_RELEASE),
+        ("backup_version", BACKUP_VERSION), ("backup_release", BACKUP_RELEASE), ("backup_date", now),
+        ("mnet_remoteusers", 0), ("include_files", 1), ("include_file_references_to_external_content", 0),
+        ("original_wwwroot", "https://examcatalyst.invalid"),
+        ("original_site_identifier_hash", hashlib.md5(b"examcatalyst-payload").hexdigest()),
+        ("original_course_id", COURSE_ID), ("original_course_format", "topics"),
+        ("original_course_fullname", args.fullname), ("original_course_shortname", args.shortname),
+        ("original_course_startdate", now), ("original_course_enddate", 0),
+        ("original_course_contextid", COURSE_CONTEXTID), ("original_system_contextid", SYSTEM_CONTEXTID),
+    ]
+    L += [tag(k, v, 4) for k, v in info]
+    L += ["    <details>",
+          f'      <detail backup_id="{hashlib.md5(filename.encode()).hexdigest()}">',
+          tag("type", "course", 8), tag("format", "moodle2", 8), tag("interactive", 1, 8),
+          tag("mode", 10, 8), tag("execution", 1, 8), tag("executiontime", 0, 8),
+          "      </detail>", "    </details>", "    <contents>", "      <activities>"]
+    for u in units:
+        L += ["        <activity>", tag("moduleid", u.number, 10), tag("sectionid", u.number + 1, 10),
+              tag("modulename", "page", 10), tag("title", u.topic, 10),
+              tag("directory", f"activities/page_{u.number}", 10), "        </activity>"]
+    L += ["      </activities>", "      <sections>"]
+    for sid, title in [(1, "0")] + [(u.number + 1, str(u.number)) for u in units]:
+        L += ["        <section>", tag("sectionid", sid, 10), tag("title", title, 10),
+              tag("directory", f"sections/section_{sid}", 10), "        </section>"]
+    L += ["      </sections>", "      <course>", tag("courseid", COURSE_ID, 8), tag("title", args.shortname, 8),
+          tag("directory", "course", 8), "      </course>", "    </contents>", "    <settings>"]
+    root_settings = [
+        ("filename", filename), ("imscc11", 0), ("users", 0), ("anonymize", 0), ("role_assignments", 0),
+        ("activities", 1), ("blocks", 0), ("files", 1), ("filters", 0), ("comments", 0), ("badges", 0),
+        ("calendarevents", 0), ("userscompletion", 0), ("logs", 0), ("grade_histories", 0),
+        ("questionbank", 1), ("groups", 0), ("competencies", 0), ("customfield", 0),
+        ("contentbankcontent", 0), ("xapistate", 0), ("legacyfiles", 0),
+    ]
+    for name, value in root_settings:
+        L += ["      <setting>", tag("level", "root", 8), tag("name", name, 8), tag("value", value, 8), "      </setting>"]
+    for sid in [1] + [u.number + 1 for u in units]:
+        for kind, value in (("included", 1), ("userinfo", 0)):
+            L += ["      <setting>", tag("level", "section", 8), tag("section", f"section_{sid}", 8),
+                  tag("name", f"section_{sid}_{kind}", 8), tag("value", value, 8), "      </setting>"]
+    for u in units:
+        for kind, value in (("included", 1), ("userinfo", 0)):
+            L += ["      <setting>", tag("level", "activity", 8), tag("activity", f"page_{u.number}", 8),
+                  tag("name", f"page_{u.number}_{kind}", 8), tag("value", value, 8), "      </setting>"]
+    L += ["    </settings>", "  </information>", "</moodle_backup>"]
+    return doc(L)
+
+
+def course_xml(args, now: int) -> bytes:
+    fields = [
+        ("shortname", args.shortname), ("fullname", args.fullname), ("idnumber", ""), ("summary", ""),
+        ("summaryformat", 1), ("format", "topics"), ("showgrades", 1), ("newsitems", 0), ("startdate", now),
+        ("enddate", 0), ("marker", 0), ("maxbytes", 0), ("legacyfiles", 0), ("showreports", 0),
+        ("visible", 1), ("groupmode", 0), ("groupmodeforce", 0), ("defaultgroupingid", 0), ("lang", ""),
+        ("theme", ""), ("timecreated", now), ("timemodified", now), ("requested", 0),
+        ("showactivitydates", 0), ("showcompletionconditions", None), ("pdfexportfont", None),
+        ("enablecompletion", 0), ("completionnotify", 0),
+    ]
+    L = [f'<course id="{COURSE_ID}" contextid="{COURSE_CONTEXTID}">']
+    L += [tag(k, v, 2) for k, v in fields]
+    L += ['  <category id="1">', tag("name", "Miscellaneous", 4), tag("description", None, 4), "  </category>",
+          "  <tags>", "  </tags>", "  <customfields>", "  </customfields>", "  <courseformatoptions>"]
+    for name, value in (("hiddensections", 0), ("coursedisplay", 0)):
+        L += ["    <courseformatoption>", tag("format", "topics", 6), tag("sectionid", 0, 6),
+              tag("name", name, 6), tag("value", value, 6), "    </courseformatoption>"]
+    L += ["  </courseformatoptions>", "</course>"]
+    return doc(L)
+
+
+def section_xml(sid: int, number: int, name: Optional[str], sequence: str, now: int) -> bytes:
+    return doc([f'<section id="{sid}">', tag("number", number, 2), tag("name", name, 2), tag("summary", "", 2),
+                tag("summaryformat", 1, 2), tag("sequence", sequence, 2), tag("visible", 1, 2),
+                tag("availabilityjson", None, 2), tag("component", None, 2), tag("itemid", None, 2),
+                tag("timemodified", now, 2), "</section>"])
+
+
+def module_xml(u: Unit, now: int) -> bytes:
+    fields = [
+        ("modulename", "page"), ("sectionid", u.number + 1), ("sectionnumber", u.number), ("idnumber", ""),
+        ("added", now), ("score", 0), ("indent", 0), ("visible", 1), ("visibleoncoursepage", 1),
+        ("visibleold", 1), ("groupmode", 0), ("groupingid", 0), ("completion", 0),
+        ("completiongradeitemnumber", None), ("completionpassgrade", 0), ("completionview", 0),
+        ("completionexpected", 0), ("availability", None), ("showdescription", 0), ("downloadcontent", 1),
+        ("lang", ""),
+    ]
+    L = [f'<module id="{u.number}" version="{BACKUP_VERSION}">'] + [tag(k, v, 2) for k, v in fields]
+    L += ["  <tags>", "  </tags>", "</module>"]
+    return doc(L)
+
+
+def page_xml(u: Unit, now: int) -> bytes:
+    options = 'a:3:{s:12:"printheading";s:1:"1";s:10:"printintro";s:1:"0";s:17:"printlastmodified";s:1:"1";}'
+    fields = [
+        ("name", u.topic), ("intro", ""), ("introformat", 1), ("content", u.html), ("contentformat", 1),
+        ("legacyfiles", 0), ("legacyfileslast", None), ("display", 5), ("displayoptions", options),
+        ("revision", 1), ("timemodified", now),
+    ]
+    L = [f'<activity id="{u.number}" moduleid="{u.number}" modulename="page" '
+         f'contextid="{MODULE_CONTEXT_BASE + u.number}">', f'  <page id="{u.number}">']
+    L += [tag(k, v, 4) for k, v in fields]
+    L += ["  </page>", "</activity>"]
+    return doc(L)
+
+
+def inforef_xml(category_ids: List[int]) -> bytes:
+    L = ["<inforef>"]
+    if category_ids:
+        L.append("  <question_categoryref>")
+        for cid in category_ids:
+            L += ["    <question_category>", tag("id", cid, 6), "    </question_category>"]
+        L.append("  </question_categoryref>")
+    L.append("</inforef>")
+    return doc(L)
+
+
+def iter_questions_xml(categories: List[Category], now: int) -> Iterator[str]:
+    """questions.xml line by line; build() joins it into one member, since a tar entry needs its size up front."""
+    yield '<?xml version="1.0" encoding="UTF-8"?>'
+    yield "<question_categories>"
+    qid = aid = 0
+    for cat in categories:
+        yield f'  <question_category id="{cat.id}">'
+        for k, v in (("name", cat.name), ("contextid", COURSE_CONTEXTID), ("contextlevel", 50),
+                     ("contextinstanceid", COURSE_ID), ("info", cat.info), ("infoformat", 0),
+                     ("stamp", stamp("cat", cat.id, cat.name)), ("parent", cat.parent), ("sortorder", 999 if cat.parent else 0),
+                     ("idnumber", None)):
+            yield tag(k, v, 4)
+        yield "    <question_bank_entries>"
+        for q in cat.questions:
+            qid += 1
+            yield f'      <question_bank_entry id="{qid}">'
+            yield tag("questioncategoryid", cat.id, 8)
+            yield tag("idnumber", q.idnumber or None, 8)
+            yield tag("ownerid", None, 8)
+            yield "        <question_version>"
+            yield f'          <question_versions id="{qid}">'
+            yield tag("version", 1, 12)
+            yield tag("status", "ready", 12)
+            yield "            <questions>"
+            yield f'              <question id="{qid}">'
+            for k, v in (("parent", 0), ("name", q.name), ("questiontext", q.text), ("questiontextformat", 1),
+                         ("generalfeedback", q.feedback), ("generalfeedbackformat", 1),
+                         ("defaultmark", "1.0000000"), ("penalty", "0.3333333"), ("qtype", "multichoice"),
+                         ("length", 1), ("stamp", stamp("q", cat.id, q.idnumber or qid, q.text)),
+                         ("timecreated", now), ("timemodified", now), ("createdby", None), ("modifiedby", None)):
+                yield tag(k, v, 16)
+            yield "                <plugin_qtype_multichoice_question>"
+            yield "                  <answers>"
+            for a in q.answers:
+                aid += 1
+                yield f'                    <answer id="{aid}">'
+                for k, v in (("answertext", a.text), ("answerformat", 1), ("fraction", a.fraction),
+                             ("feedback", a.feedback), ("feedbackformat", 1)):
+                    yield tag(k, v, 22)
+                yield "                    </answer>"
+            yield "                  </answers>"
+            yield f'                  <multichoice id="{qid}">'
+            single = "1" if q.single.lower() in ("true", "1") else "0"
+            for k, v in (("layout", 0), ("single", single), ("shuffleanswers", q.shuffle),
+                         ("correctfeedback", ""), ("correctfeedbackformat", 1),
+                         ("partiallycorrectfeedback", ""), ("partiallycorrectfeedbackformat", 1),
+                         ("incorrectfeedback", ""), ("incorrectfeedbackformat", 1),
+                         ("answernumbering", q.numbering), ("shownumcorrect", 0), ("showstandardinstruction", 0)):
+                yield tag(k, v, 20)
+            yield "                  </multichoice>"
+            yield "                </plugin_qtype_multichoice_question>"
+            yield "                <question_hints>"
+            yield "                </question_hints>"
+            yield "                <tags>"
+            yield "                </tags>"
+            yield "              </question>"
+            yield "            </questions>"
+            yield "          </question_versions>"
+            yield "        </question_version>"
+            yield "      </question_bank_entry>"
+        yield "    </question_bank_entries>"
+        yield "  </question_category>"
+    yield "</question_categories>"
+
+
+# -------------------- Archive --------------------
+EMPTY_FILES = {
+    "files.xml": "<files>\n</files>",
+    "users.xml": "<users>\n</users>",
+    "roles.xml": "<roles_definition>\n</roles_definition>",
+    "scales.xml": "<scales_definition>\n</scales_definition>",
+    "outcomes.xml": "<outcomes_definition>\n</outcomes_definition>",
+    "groups.xml": "<groups>\n  <groupings>\n  </groupings>\n</groups>",
+    "course/enrolments.xml": "<enrolments>\n  <enrols>\n  </enrols>\n</enrolments>",
+    "course/roles.xml": "<roles>\n  <role_overrides>\n  </role_overrides>\n  <role_assignments>\n  </role_assignments>\n</roles>",
+    "course/filters.xml": "<filters>\n  <filter_actives>\n  </filter_actives>\n  <filter_configs>\n  </filter_configs>\n</filters>",
+    "course/calendar.xml": "<events>\n</events>",
+    "course/completiondefaults.xml": "<course_completion_defaults>\n</course_completion_defaults>",
+    "course/competencies.xml": "<course_competencies>\n  <competencies>\n  </competencies>\n  <user_competencies>\n  </user_competencies>\n</course_competencies>",
+    "course/contentbank.xml": "<contents>\n</contents>",
+}
+
+EMPTY_ACTIVITY_FILES = {
+    "inforef.xml": "<inforef>\n</inforef>",
+    "grades.xml": "<activity_gradebook>\n  <grade_items>\n  </grade_items>\n  <grade_letters>\n  </grade_letters>\n</activity_gradebook>",
+    "roles.xml": "<roles>\n  <role_overrides>\n  </role_overrides>\n  <role_assignments>\n  </role_assignments>\n</roles>",
+    "filters.xml": "<filters>\n  <filter_actives>\n  </filter_actives>\n  <filter_configs>\n  </filter_configs>\n</filters>",
+    "calendar.xml": "<events>\n</events>",
+    "competencies.xml": "<course_module_competencies>\n  <competencies>\n  </competencies>\n</course_module_competencies>",
+}
+
+
+class MbzWriter:
+    """
+    Collects members and streams them into a tar.gz on close(), behind the
+    .ARCHIVE_INDEX that Moodle's tgz_packer writes first: a count line, then
+    "<path>\t<size>\t<mtime>" per file.
+    """
+
+    def __init__(self, fileobj, now: int):
+        self.fileobj = fileobj
+        self.now = now
+        self.pending: List[Tuple[str, bytes]] = []
+
+    @property
+    def members(self) -> int:
+        return len(self.pending)
+
+    def add(self, name: str, data: bytes) -> None:
+        self.pending.append((name, data))
+
+    def index(self) -> bytes:
+        lines = [f"{ARCHIVE_INDEX_PREFIX}{len(self.pending)}"]
+        lines += [f"{name}\t{len(data)}\t{self.now}" for name, data in self.pending]
+        return ("\n".join(lines) + "\n").encode("utf-8")
+
+    def _write(self, tar: tarfile.TarFile, name: str, data: bytes) -> None:
+        info = tarfile.TarInfo(name)
+        info.size = len(data)
+        info.mtime = self.now
+        info.mode = 0o644
+        tar.addfile(info, io.BytesIO(data))
+
+    def close(self) -> None:
+        with tarfile.open(fileobj=self.fileobj, mode="w|gz") as tar:
+            self._write(tar, ARCHIVE_INDEX, self.index())
+            for name, data in self.pending:
+                self._write(tar, name, data)
+
+
+def build(args, out_stream) -> Tuple[int, int, int]:
+    folder = Path(args.folder)
+    plan = args.plan or plan_for_folder(folder)
+    if plan not in PLAN_PROFILES:
+        raise SystemExit(f"Cannot tell the plan from '{folder}'; pass --plan 1_month|3_months|6_months")
+    now = int(time.time())
+    units = load_units(folder, plan)
+    categories = load_categories(Path(args.mcq) if args.mcq else None, units, args.fullname)
+    filename = Path(args.out).name if args.out != "-" else f"{args.shortname}.mbz"
+
+    w = MbzWriter(out_stream, now)
+    w.add("moodle_backup.xml", moodle_backup_xml(args, units, filename, now))
+    for name, body in EMPTY_FILES.items():
+        w.add(name, doc([body]))
+    w.add("course/course.xml", course_xml(args, now))
+    w.add("course/inforef.xml", inforef_xml([c.id for c in categories]))
+
+    w.add("sections/section_1/section.xml", section_xml(1, 0, None, "", now))
+    w.add("sections/section_1/inforef.xml", inforef_xml([]))
+    for u in units:
+        sid = u.number + 1
+        w.add(f"sections/section_{sid}/section.xml", section_xml(sid, u.number, u.topic, str(u.number), now))
+        w.add(f"sections/section_{sid}/inforef.xml", inforef_xml([]))
+        base = f"activities/page_{u.number}"
+        w.add(f"{base}/page.xml", page_xml(u, now))
+        w.add(f"{base}/module.xml", module_xml(u, now))
+        for name, body in EMPTY_ACTIVITY_FILES.items():
+            w.add(f"{base}/{name}", doc([body]))
+
+    w.add("questions.xml", ("\n".join(iter_questions_xml(categories, now)) + "\n").encode("utf-8"))
+    w.close()
+    return len(units), len(categories), sum(len(c.questions) for c in categories)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build a Moodle course backup (.mbz) from a payload folder.")
+    parser.add_argument("--folder", required=True, help="Payload folder with batch.csv and generated HTML")
+    parser.add_argument("--mcq", help="Folder with <level>_NN.xml question banks (optional)")
+    parser.add_argument("--plan", choices=sorted(PLAN_PROFILES), help="Default: from the folder name")
+    parser.add_argument("--shortname", help="Course short name (default: folder name)")
+    parser.add_argument("--fullname", help="Course full name (default: short name)")
+    parser.add_argument("--out", required=True, help="Output .mbz path or - for stdout")
+    args = parser.parse_args()
+
+    folder = Path(args.folder)
+    if not (folder / "batch.csv").exists():
+        print(f"Error: '{folder}' has no batch.csv")
+        sys.exit(1)
+    if args.mcq and not Path(args.mcq).is_dir():
+        print(f"Error: MCQ folder '{args.mcq}' does not exist")
+        sys.exit(1)
+    args.shortname = args.shortname or folder.name
+    args.fullname = args.fullname or args.shortname
+
+    if args.out == "-":
+        sections, categories, questions = build(args, sys.stdout.buffer)
+        out_label = "stdout"
+    else:
+        tmp = Path(args.out + ".tmp")
+        with open(tmp, "wb") as f:
+            sections, categories, questions = build(args, f)
+        tmp.replace(args.out)
+        out_label = args.out
+
+    print(f"✓ {out_label}: {sections} sections/pages, {categories} question categories, {questions} questions",
+          file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+Cross-unit concept graph: resolve concepts.core / concepts.related names across
+every unit, subject and exam by a normalized key, and precompute the top-k
+related lessons for each lesson page.
+
+A lesson is what one page shows, keyed the way the page's links are:
+"<data-subject>/<data-topic>" (e.g. "inorganic_chemistry/organometallic_compounds").
+Plan copies of a unit (1/3/6 months) collapse into one lesson; its concept set
+is the union. Two lessons are related through the concepts they share, each
+shared concept weighted by role (core 2, related 1) and rarity (idf), so
+"Crystal field and ligand field theory" core in one unit and related in
+another links them more strongly than a concept every unit mentions.
+
+Output JSON (compact, loaded once):
+  concepts         [normalized key | "~ " two-word term]    concept_names  [first spelling seen]
+  lessons          [{key, subject, topic, title, exams: [every exam a copy comes from], units: [relative paths]}]
+  lesson_concepts  CSR over lessons: indptr, indices (concept ids), role (2 core / 1 related, halved for terms)
+  related          {lesson key: [[lesson id, score, [shared concept ids]], ...]}   top-k, best first
+so "related lessons" for a page is one dict lookup: graph["related"][f"{subject}/{topic}"].
+
+Usage:
+  python concept_graph.py build --root .. --out concept_graph.json --top-k 5
+  python concept_graph.py query --graph concept_graph.json --subject inorganic_chemistry --topic organometallic_compounds
+
+Requirements:
+  pip install pyyaml
+"""
+
+import argparse
+import json
+import math
+import re
+import sys
+import time
+import unicodedata
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Dict, Iterator, List, Tuple
+
+from output_sink import write_atomic
+from payload_lib import convert_to_snake_case, iter_payload_folders, iter_unit_files, load_csv_mapping
+from section_corpus import derive_mapping, section_units
+from unit_model import Unit, load_unit_model
+
+
+HERE = Path(__file__).resolve().parent
+DEFAULT_ROOT = HERE.parent
+SKIP_DIRS = {".git", "__pycache__", ".artifact_store"}
+PAYLOAD_TREES = {HERE.name, "moodle_payload"}     # containers whose children are exams
+ROLE_WEIGHT = {"core": 2, "related": 1}
+STOP_WORDS = {"a", "an", "and", "the", "of", "in", "on", "for", "to", "with", "its", "their"}
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+PAREN_RE = re.compile(r"\([^)]*\)")
+TERM_WEIGHT = 0.5
+MAX_DF = 0.15
+
+
+# -------------------- Keys --------------------
+def _tokens(name: str) -> List[str]:
+    text = unicodedata.normalize("NFKD", name).encode("ascii", "ignore").decode("ascii").lower()
+    bare = PAREN_RE.sub(" ", text)
+    if TOKEN_RE.search(bare):
+        text = bare                       # "Crystal Field Theory (CFT)" -> "crystal field theory"
+    tokens = []
+    for token in TOKEN_RE.findall(text.replace("&", " and ")):
+        if token in STOP_WORDS:
+            continue
+        if len(token) > 3 and token.endswith("ies"):
+            token = token[:-3] + "y"
+        elif len(token) > 3 and token.endswith("s") and not token.endswith(("ss", "us", "is")):
+            token = token[:-1]
+        tokens.append(token)
+    return tokens
+
+
+def concept_key(name: str) -> str:
+    """'Crystal Field & Ligand-Field Theories' -> 'crystal field ligand field theory'."""
+    return " ".join(_tokens(name))
+
+
+def concept_keys(name: str) -> List[Tuple[str, float]]:
+    """
+    The full key, plus its two-word terms ("~ crystal field") at TERM_WEIGHT, so
+    "Crystal field and ligand field theory" meets "Crystal Field Theory (CFT)".
+    """
+    tokens = _tokens(name)
+    if not tokens:
+        return []
+    keys = [(" ".join(tokens), 1.0)]
+    if len(tokens) > 2:
+        keys.extend((f"~ {a} {b}", TERM_WEIGHT) for a, b in sorted(set(zip(tokens, tokens[1:]))))
+    return keys
+
+
+def lesson_key(unit: Unit, topic: str) -> Tuple[str, str, str]:
+    subject = convert_to_snake_case(unit.subject)
+    topic_snake = convert_to_snake_case(topic)
+    return f"{subject}/{topic_snake}", subject, topic_snake
+
+
+# -------------------- Corpus --------------------
+def iter_lesson_units(root: Path) -> Iterator[Tuple[Path, str]]:
+    """(unit path, lesson topic) for batch.csv folders and section_NN.yaml corpora without one."""
+    seen_dirs = set()
+    for folder in iter_payload_folders(root):
+        if SKIP_DIRS & set(folder.parts):
+            continue
+        seen_dirs.add(folder.resolve())
+        mapping = load_csv_mapping(folder / "batch.csv")
+        for path in iter_unit_files(folder, mapping):
+            yield path, mapping[path.stem]
+    for marker in sorted(root.rglob("section_*.yaml")):
+        folder = marker.parent.resolve()
+        if folder in seen_dirs or SKIP_DIRS & set(folder.parts):
+            continue
+        seen_dirs.add(folder)
+        units = section_units(folder)
+        for path, topic in zip(units, derive_mapping(units).values()):
+            yield path, topic
+
+
+def exam_of(path: Path, root: Path) -> str:
+    """First folder below root, e.g. 'new_moodle_payload/GATE-Chemistry/...' -> 'GATE-Chemistry'
+    (the legacy 'moodle_payload/CSIRCHEM/...' tree -> 'CSIRCHEM')."""
+    parts = path.resolve().relative_to(root.resolve()).parts
+    if parts and parts[0] in PAYLOAD_TREES and len(parts) > 1:
+        return parts[1]
+    return parts[0] if parts else ""
+
+
+# -------------------- Build --------------------
+def build_graph(root: Path, top_k: int) -> Dict:
+    concept_ids: Dict[str, int] = {}
+    concept_names: List[str] = []
+    lesson_ids: Dict[str, int] = {}
+    lessons: List[Dict] = []
+    roles: List[Dict[int, float]] = []         # per lesson: key id -> strongest role weight
+
+    for path, topic in iter_lesson_units(root):
+        unit = load_unit_model(path)
+        key, subject, topic_snake = lesson_key(unit, topic)
+        if key not in lesson_ids:
+            lesson_ids[key] = len(lessons)
+            lessons.append({"key": key, "subject": subject, "topic": topic_snake, "title": topic,
+                            "exams": [], "units": []})
+            roles.append({})
+        lid = lesson_ids[key]
+        exam = exam_of(path, root)
+        if exam not in lessons[lid]["exams"]:
+            lessons[lid]["exams"].append(exam)
+        lessons[lid]["units"].append(path.resolve().relative_to(root.resolve()).as_posix())
+        for role, concepts in (("core", unit.core), ("related", unit.related)):
+            for concept in concepts:
+                for ckey, scale in concept_keys(concept.name):
+                    cid = concept_ids.get(ckey)
+                    if cid is None:
+                        cid = concept_ids[ckey] = len(concept_names)
+                        concept_names.append(concept.name if scale == 1.0 else ckey[2:])
+                    roles[lid][cid] = max(roles[lid].get(cid, 0), ROLE_WEIGHT[role] * scale)
+
+    # CSR lesson -> concepts and the inverted lists concept -> lessons.
+    indptr, indices, role_weights = [0], [], []
+    postings: List[List[int]] = [[] for _ in concept_names]
+    for lid, concept_roles in enumerate(roles):
+        for cid in sorted(concept_roles):
+            indices.append(cid)
+            role_weights.append(concept_roles[cid])
+            postings[cid].append(lid)
+        indptr.append(len(indices))
+
+    n_lessons = max(1, len(lessons))
+    idf = [math.log(1 + n_lessons / len(p)) if p else 0.0 for p in postings]
+    max_df = max(2, int(n_lessons * MAX_DF))     # keys on more lessons than this say nothing about relatedness
+
+    related: Dict[str, List] = {}
+    for lid in range(len(lessons)):
+        scores: Dict[int, float] = defaultdict(float)
+        shared: Dict[int, List[int]] = defaultdict(list)
+        for pos in range(indptr[lid], indptr[lid + 1]):
+            cid, weight = indices[pos], role_weights[pos]
+            if not 2 <= len(postings[cid]) <= max_df:
+                continue
+            for other in postings[cid]:
+                if other != lid:
+                    scores[other] += weight * roles[other][cid] * idf[cid]
+                    shared[other].append(cid)
+        best = sorted(scores.items(), key=lambda kv: (-kv[1], kv[0]))[:top_k]
+        related[lessons[lid]["key"]] = [[other, round(score, 3), shared[other]] for other, score in best]
+
+    return {
+        "version": 2,
+        "top_k": top_k,
+        "concepts": list(concept_ids),
+        "concept_names": concept_names,
+        "lessons": lessons,
+        "lesson_concepts": {"indptr": indptr, "indices": indices, "role": role_weights},
+        "related": related,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or query the cross-unit concept graph.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    b = sub.add_parser("build", help="Scan the corpus and write the graph JSON")
+    b.add_argument("--root", default=str(DEFAULT_ROOT), help="Corpus root")
+    b.add_argument("--out", default="concept_graph.json", help="Output JSON")
+    b.add_argument("--top-k", type=int, default=5, help="Related lessons kept per lesson")
+    q = sub.add_parser("query", help="Related lessons of one page")
+    q.add_argument("--graph", default="concept_graph.json")
+    q.add_argument("--subject", required=True, help="data-subject (snake_case)")
+    q.add_argument("--topic", required=True, help="data-topic (snake_case)")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        started = time.monotonic()
+        graph = build_graph(Path(args.root), args.top_k)
+        write_atomic(args.out, json.dumps(graph, ensure_ascii=False, separators=(",", ":")))
+        linked = sum(1 for v in graph["related"].values() if v)
+        shared = sum(1 for n in Counter(graph["lesson_concepts"]["indices"]).values() if n > 1)
+        print(f"✓ {len(graph['lessons'])} lessons, {len(graph['concepts'])} concepts ({shared} in 2+ lessons), "
+              f"{linked} lessons with related lessons -> {args.out} in {time.monotonic() - started:.1f}s")
+        return
+
+    graph = json.loads(Path(args.graph).read_text(encoding="utf-8"))
+    key = f"{args.subject}/{args.topic}"
+    if key not in graph["related"]:
+        print(f"❌ no lesson '{key}' in {args.graph}")
+        sys.exit(1)
+    for lid, score, shared in graph["related"][key]:
+        lesson = graph["lessons"][lid]
+        names = ", ".join(graph["concept_names"][c] for c in shared[:4])
+        print(f"{score:7.2f}  {', '.join(lesson['exams']):<24} {lesson['key']:<60} ({names}{', ...' if len(shared) > 4 else ''})")
+
+
+if __name__ == "__main__":
+    main()
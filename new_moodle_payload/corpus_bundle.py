@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+"""
+Compile the whole corpus (unit YAML, batch.csv mappings, MCQ banks) into one
+memory-mapped bundle so tools can load a single unit by key without walking
+folders or parsing YAML.
+
+Layout:
+  b"ECBUNDLE" | record | record | ... | index | footer
+  record  msgpack {"key", "kind", "data"}
+            kind yaml  -> parsed YAML (what payload_lib.load_unit returns; dates and
+                          datetimes travel as msgpack ext types 1 and 2)
+            kind batch -> {filename_prefix: topic}
+            kind mcq   -> bank file text (<level>_NN.txt / .xml)
+  index   msgpack {"version", "root", "created", "records": {key: [offset, length, kind, size, mtime_ns]}}
+  footer  <QQ8s: index offset, index length, b"ECBUNDLE"
+
+Keys are POSIX paths relative to --root, e.g.
+  new_moodle_payload/GATE-Chemistry/6-months-moodle-payload/inorganic_chemistry/unit_01.yaml
+
+payload_lib.load_unit() serves units from the bundle named by
+$EXAMCATALYST_BUNDLE when the source file's size and mtime still match, and
+parses the file otherwise.
+
+Usage:
+  python corpus_bundle.py compile                       # -> new_moodle_payload/corpus.bundle
+  python corpus_bundle.py ls --prefix new_moodle_payload/GATE-Physics/
+  python corpus_bundle.py get new_moodle_payload/GATE-Physics/1-month-moodle-payload/unit_01.yaml
+  python corpus_bundle.py verify                        # list sources changed since compile
+  export EXAMCATALYST_BUNDLE=new_moodle_payload/corpus.bundle
+
+Requirements:
+  pip install msgpack pyyaml
+"""
+
+import argparse
+import datetime
+import json
+import mmap
+import os
+import re
+import struct
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import msgpack
+
+from payload_lib import load_csv_mapping, load_unit
+
+
+MAGIC = b"ECBUNDLE"
+FOOTER = struct.Struct("<QQ8s")
+BUNDLE_VERSION = 2
+EXT_DATE = 1
+EXT_DATETIME = 2
+MCQ_BANK_RE = re.compile(r"^(?:basic|intermediate|advanced)_\d+\.(?:txt|xml)$")
+SKIP_DIRS = {".git", "__pycache__", ".venv", "venv", "node_modules"}
+
+HERE = Path(__file__).resolve().parent
+DEFAULT_ROOT = HERE.parent
+DEFAULT_BUNDLE = HERE / "corpus.bundle"
+
+
+def _default(obj):
+    # safe_load yields dates/datetimes for unquoted timestamps; carry them as ext types so
+    # a unit read from the bundle has the same types as one parsed from its file.
+    if isinstance(obj, datetime.datetime):
+        return msgpack.ExtType(EXT_DATETIME, obj.isoformat().encode("ascii"))
+    if isinstance(obj, datetime.date):
+        return msgpack.ExtType(EXT_DATE, obj.isoformat().encode("ascii"))
+    raise TypeError(f"cannot bundle {type(obj).__name__}")
+
+
+def _ext_hook(code: int, data: bytes):
+    if code == EXT_DATETIME:
+        return datetime.datetime.fromisoformat(data.decode("ascii"))
+    if code == EXT_DATE:
+        return datetime.date.fromisoformat(data.decode("ascii"))
+    return msgpack.ExtType(code, data)
+
+
+def iter_sources(root: Path) -> Iterator[Tuple[str, Path]]:
+    """(kind, path) for every file the bundle holds, in a stable order."""
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = sorted(d for d in dirnames if d not in SKIP_DIRS)
+        in_mcq = "MCQ" in Path(dirpath).relative_to(root).parts
+        for name in sorted(filenames):
+            if name.endswith(".yaml"):
+                yield "yaml", Path(dirpath) / name
+            elif name == "batch.csv":
+                yield "batch", Path(dirpath) / name
+            elif in_mcq and MCQ_BANK_RE.match(name):
+                yield "mcq", Path(dirpath) / name
+
+
+def read_source(kind: str, path: Path):
+    if kind == "yaml":
+        return load_unit(path, use_bundle=False)
+    if kind == "batch":
+        return load_csv_mapping(path)
+    return path.read_text(encoding="utf-8")
+
+
+def compile_bundle(root: Path, out: Path) -> Tuple[int, int, List[str]]:
+    """Write the bundle atomically; returns (records, bytes, errors)."""
+    root = root.resolve()
+    records: Dict[str, List] = {}
+    errors: List[str] = []
+    tmp = out.with_name(out.name + ".tmp")
+    with open(tmp, "wb") as f:
+        f.write(MAGIC)
+        for kind, path in iter_sources(root):
+            key = path.relative_to(root).as_posix()
+            st = path.stat()
+            try:
+                data = read_source(kind, path)
+                blob = msgpack.packb({"key": key, "kind": kind, "data": data}, default=_default, use_bin_type=True)
+            except Exception as e:  # malformed YAML, bad encoding, odd YAML types: leave the file to the slow path
+                errors.append(f"{key}: {type(e).__name__}: {str(e).splitlines()[0] if str(e) else ''}")
+                continue
+            records[key] = [f.tell(), len(blob), kind, st.st_size, st.st_mtime_ns]
+            f.write(blob)
+        index = msgpack.packb({"version": BUNDLE_VERSION, "root": str(root), "created": int(time.time()),
+                               "records": records}, use_bin_type=True)
+        index_offset = f.tell()
+        f.write(index)
+        f.write(FOOTER.pack(index_offset, len(index), MAGIC))
+        size = f.tell()
+    tmp.replace(out)
+    return len(records), size, errors
+
+
+class CorpusBundle:
+    """Read-only, memory-mapped view of a compiled bundle. Lookups touch one record."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._file = open(self.path, "rb")
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._mm) < len(MAGIC) + FOOTER.size or self._mm[:len(MAGIC)] != MAGIC:
+            self.close()
+            raise ValueError(f"{self.path} is not a corpus bundle")
+        index_offset, index_length, magic = FOOTER.unpack_from(self._mm, len(self._mm) - FOOTER.size)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"{self.path} is truncated")
+        index = msgpack.unpackb(self._mm[index_offset:index_offset + index_length], raw=False)
+        if index.get("version") != BUNDLE_VERSION:
+            self.close()
+            raise ValueError(f"{self.path}: unsupported bundle version {index.get('version')}")
+        self.root = Path(index["root"])
+        self.created = index["created"]
+        self.records: Dict[str, List] = index["records"]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self) -> None:
+        if getattr(self, "_mm", None) is not None:
+            self._mm.close()
+            self._mm = None
+        self._file.close()
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.records
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def keys(self, prefix: str = "", kind: Optional[str] = None) -> List[str]:
+        return [k for k, rec in self.records.items() if k.startswith(prefix) and (kind is None or rec[2] == kind)]
+
+    def key_for(self, path) -> Optional[str]:
+        try:
+            return Path(path).resolve().relative_to(self.root).as_posix()
+        except ValueError:
+            return None
+
+    def get(self, key: str):
+        offset, length = self.records[key][:2]
+        return msgpack.unpackb(self._mm[offset:offset + length], raw=False, ext_hook=_ext_hook)["data"]
+
+    def is_fresh(self, key: str, st: os.stat_result) -> bool:
+        rec = self.records.get(key)
+        return rec is not None and rec[3] == st.st_size and rec[4] == st.st_mtime_ns
+
+    def get_fresh(self, path):
+        """Record for path if the bundle holds it and the file is unchanged since compile, else None."""
+        key = self.key_for(path)
+        if key is None:
+            return None
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return self.get(key) if self.is_fresh(key, st) else None
+
+    def stale(self) -> List[str]:
+        """Keys whose source changed or vanished, plus new sources the bundle lacks."""
+        out = []
+        for key in self.records:
+            path = self.root / key
+            if not path.exists() or not self.is_fresh(key, path.stat()):
+                out.append(key)
+        for _, path in iter_sources(self.root):
+            key = path.relative_to(self.root).as_posix()
+            if key not in self.records:
+                out.append(key)
+        return out
+
+
+_env_bundle: Optional[CorpusBundle] = None
+_env_bundle_path: Optional[str] = None
+
+
+def env_bundle() -> Optional[CorpusBundle]:
+    """Bundle named by $EXAMCATALYST_BUNDLE, opened once per process (None if unset/unusable)."""
+    global _env_bundle, _env_bundle_path
+    path = os.environ.get("EXAMCATALYST_BUNDLE")
+    if not path:
+        return None
+    if path != _env_bundle_path:
+        _env_bundle_path = path
+        try:
+            _env_bundle = CorpusBundle(path)
+        except (OSError, ValueError) as e:
+            print(f"⚠ WARNING: ignoring EXAMCATALYST_BUNDLE={path}: {e}", file=sys.stderr)
+            _env_bundle = None
+    return _env_bundle
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compile and query the single-file corpus bundle.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("compile", help="Pack every unit YAML, batch.csv and MCQ bank below --root")
+    p.add_argument("--root", default=str(DEFAULT_ROOT), help="Corpus root (default: repository root)")
+    p.add_argument("--out", default=str(DEFAULT_BUNDLE))
+
+    for name, help_text in (("ls", "List keys"), ("get", "Print one record as JSON"),
+                            ("verify", "List sources changed since compile")):
+        p = sub.add_parser(name, help=help_text)
+        p.add_argument("--bundle", default=os.environ.get("EXAMCATALYST_BUNDLE", str(DEFAULT_BUNDLE)))
+        if name == "ls":
+            p.add_argument("--prefix", default="")
+            p.add_argument("--kind", choices=["yaml", "batch", "mcq"])
+        if name == "get":
+            p.add_argument("key")
+    args = parser.parse_args()
+
+    if args.command == "compile":
+        started = time.monotonic()
+        count, size, errors = compile_bundle(Path(args.root), Path(args.out))
+        for err in errors:
+            print(f"⚠ WARNING: skipped {err}")
+        print(f"✓ {args.out}: {count} records, {size / 1e6:.1f} MB in {time.monotonic() - started:.1f}s")
+        return
+
+    if not Path(args.bundle).exists():
+        print(f"Error: bundle '{args.bundle}' not found; run 'corpus_bundle.py compile' first")
+        sys.exit(1)
+    with CorpusBundle(args.bundle) as bundle:
+        if args.command == "ls":
+            for key in bundle.keys(args.prefix, args.kind):
+                print(key)
+        elif args.command == "get":
+            if args.key not in bundle:
+                print(f"Error: no record '{args.key}'")
+                sys.exit(1)
+            print(json.dumps(bundle.get(args.key), ensure_ascii=False, indent=2, default=str))
+        else:
+            stale = bundle.stale()
+            for key in stale:
+                print(key)
+            print(f"{'⚠' if stale else '✓'} {len(stale)} of {len(bundle)} record(s) stale", file=sys.stderr)
+            sys.exit(1 if stale else 0)
+
+
+if __name__ == "__main__":
+    main()
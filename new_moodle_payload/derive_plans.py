@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+Render the 1-month, 3-month and 6-month lesson pages of a subject from one
+master folder (batch.csv + unit_XX.yaml), parsing every unit once.
+
+What each plan shows is the plan profile in payload_lib.PLAN_PROFILES:
+  source       concepts | learning_objectives | sections   (content depth)
+  counts       data-number per MCQ level
+  notes_text / mcq_text, html_suffix, dir
+  item_lesson  topic (default) | name    data-lesson of a learning_objectives item
+--profiles takes a JSON file merged over those defaults, e.g.
+  {"3_months": {"counts": {"basic": 10}}, "6_months": {"source": "learning_objectives"}}
+
+1_month_/3_month_/6_month_moodle_payload_create.py render through
+render_page below, so their pages are the same bytes and the plan folders no
+longer need their own unit copies: output goes to
+<exam-root>/<plan dir>/<subject>/ with batch.csv.
+
+Usage:
+  python derive_plans.py --master CSIR-Chemical_Sciences/6-months-moodle-payload/organic_chemistry
+  python derive_plans.py --master ... --plans 1_month,3_months --exam-root /tmp/csir
+  python derive_plans.py --master ... --check        # compare with the existing pages, write nothing
+  python derive_plans.py --master ... --store .artifact_store   # build each page once, hardlink it everywhere
+
+Requirements:
+  pip install pyyaml
+"""
+
+import argparse
+import copy
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import payload_lib
+import unit_model
+from artifact_store import ArtifactStore, render_key, source_fingerprint
+from output_sink import OutputSink, write_atomic
+from payload_lib import (
+    PLAN_DIR_RE,
+    PLAN_PROFILES,
+    Link,
+    iter_page_blocks,
+    iter_unit_files,
+    load_csv_mapping,
+)
+from unit_model import Unit, load_unit_model
+
+
+LEVEL_LABELS = {"basic": "MCQ Basic", "intermediate": "MCQ Intermediate", "advanced": "MCQ Advanced"}
+
+
+# -------------------- Rendering --------------------
+def render_anchor(link: Link, sep: str) -> str:
+    """One <a>; sep is what follows the data-subject/topic/lesson/tags lines (" \\n" or "\\n")."""
+    if link.function == "ask_agent":
+        head = '<a href="#" \nclass="notes-link" \ndata-function="ask_agent" \n'
+        label = "Study Notes"
+    else:
+        head = (f'<a href="#" \nclass="mcq-flashcard-link" \ndata-function="mcq_widget"\n'
+                f'data-level="{link.level}"\ndata-number="{link.number}" \n')
+        label = LEVEL_LABELS[link.level]
+    return (f'{head}data-subject="{link.subject}"{sep}data-topic="{link.topic}"{sep}'
+            f'data-lesson="{link.lesson}"{sep}data-tags="{link.tags}"{sep}'
+            f'data-agent-text="{link.agent_text}">{label}</a>')
+
+
+def render_concepts_page(unit: Unit, profile: Dict, lesson_topic: str) -> str:
+    """1_month_moodle_payload_create.py layout: Core / Related Concepts lists."""
+    html = f'<h4><blockquote>{unit.syllabus_line}</blockquote></h4><hr><br>\n'
+    for block, sets in iter_page_blocks(unit, profile, lesson_topic):
+        if not sets:
+            continue
+        html += f'<h3>{block.capitalize()} Concepts</h3>\n<ol>\n'
+        for links in sets:
+            first = links[0]
+            anchors = " | ".join(render_anchor(link, " \n") for link in links)
+            all_links = (f"<i class=\"fa fa-asterisk\" style=\"color: green\"></i>  Topic: {lesson_topic}\n "
+                         f"<i class=\"fa fa-pen-to-square\" style=\"color: tomato\"></i>  Lesson: {first.lesson} \n "
+                         f"<i class=\"fa fa-angles-right\" style=\"color: blue\"></i>  Clarification: {first.clarification} \n "
+                         f"Show: {anchors}")
+            html += f"<li style=\"white-space: pre;\">{all_links}</li><br><br>\n"
+        html += "</ol>\n\n" if block == "core" else "</ol>"
+    return html
+
+
+def render_learning_page(unit: Unit, profile: Dict, lesson_topic: str) -> str:
+    """3_month_/6_month_moodle_payload_create.py layout: one list over the learning_path."""
+    html = f'<h4><blockquote>{unit.syllabus_line}</blockquote></h4>\n<h3>Core Concepts</h3>\n<ol>\n'
+    for _, sets in iter_page_blocks(unit, profile, lesson_topic):
+        lis = []
+        for links in sets:
+            first = links[0]
+            anchors = " | ".join(render_anchor(link, "\n") for link in links)
+            all_links = (f"Topic: {lesson_topic}\n\n Lesson: {first.lesson} \n\n"
+                         f" Clarification: {first.clarification} \n\n GET|| {anchors}")
+            lis.append(f'<li style="white-space: pre;">{all_links}</li><br><br>')
+        html += "\n".join(lis) + "\n"
+    return html + "</ol>"
+
+
+def render_page(unit: Unit, profile: Dict, lesson_topic: str) -> str:
+    if profile["source"] == "concepts":
+        return render_concepts_page(unit, profile, lesson_topic)
+    return render_learning_page(unit, profile, lesson_topic)
+
+
+# -------------------- Profiles / paths --------------------
+def merge(base: Dict, override: Dict) -> Dict:
+    out = copy.deepcopy(base)
+    for key, value in override.items():
+        if isinstance(value, dict) and isinstance(out.get(key), dict):
+            out[key] = merge(out[key], value)
+        else:
+            out[key] = value
+    return out
+
+
+def load_profiles(path) -> Dict[str, Dict]:
+    profiles = copy.deepcopy(PLAN_PROFILES)
+    if path:
+        overrides = json.loads(Path(path).read_text(encoding="utf-8"))
+        for plan, override in overrides.items():
+            profiles[plan] = merge(profiles.get(plan, {}), override)
+    return profiles
+
+
+def default_exam_root(master: Path) -> Path:
+    """CSIR-Chemical_Sciences/6-months-moodle-payload/organic_chemistry -> CSIR-Chemical_Sciences."""
+    master = master.resolve()
+    if PLAN_DIR_RE.match(master.parent.name):
+        return master.parent.parent
+    return master.parent
+
+
+# -------------------- Build --------------------
+def derive(master: Path, exam_root: Path, plans: List[str], profiles: Dict[str, Dict], check: bool,
+           store: Optional[ArtifactStore] = None, workers: int = 4) -> int:
+    mapping = load_csv_mapping(master / "batch.csv")
+    batch_bytes = (master / "batch.csv").read_bytes()
+    targets = {plan: exam_root / profiles[plan]["dir"] / master.name for plan in plans}
+    counts = {"parsed": 0, "written": 0, "unchanged": 0, "differs": 0, "missing": 0, "redundant_yaml": 0}
+    renderer = source_fingerprint([Path(__file__), Path(payload_lib.__file__), Path(unit_model.__file__)]) if store else ""
+    sink = OutputSink(workers, announce="Generated")
+
+    for yaml_path in iter_unit_files(master, mapping):
+        source_bytes = yaml_path.read_bytes()
+        lesson_topic = mapping[yaml_path.stem]
+        keys: Dict[str, str] = {}
+        digests: Dict[str, Optional[str]] = {}
+        if store is not None:
+            for plan in plans:
+                keys[plan] = render_key(renderer, json.dumps(profiles[plan], sort_keys=True), lesson_topic,
+                                        source_bytes)
+                digests[plan] = store.lookup(keys[plan])
+
+        unit = None
+        for plan in plans:
+            profile = profiles[plan]
+            out_path = targets[plan] / f"{yaml_path.stem}{profile['html_suffix']}"
+            if digests.get(plan) is None:
+                if unit is None:
+                    unit = load_unit_model(yaml_path)
+                    counts["parsed"] += 1
+                page = render_page(unit, profile, lesson_topic).encode("utf-8")
+                if store is not None:
+                    digests[plan] = store.put(page, keys[plan])
+            else:
+                page = store.read(digests[plan]) if check else None
+
+            if check:
+                copy_path = targets[plan] / yaml_path.name
+                if copy_path.resolve() != yaml_path.resolve() and copy_path.exists() \
+                        and copy_path.read_bytes() == source_bytes:
+                    counts["redundant_yaml"] += 1
+                if not out_path.exists():
+                    counts["missing"] += 1
+                    print(f"⚠ missing   {out_path}")
+                elif out_path.read_bytes() != page:
+                    counts["differs"] += 1
+                    print(f"⚠ differs   {out_path}")
+                else:
+                    counts["unchanged"] += 1
+                continue
+            if store is None:
+                sink.write(out_path, page)
+            elif store.place(digests[plan], out_path):
+                counts["written"] += 1
+                print(f"Generated: {out_path}")
+            else:
+                counts["unchanged"] += 1
+
+    sink.close()
+    if not check:
+        for plan in plans:
+            write_atomic(targets[plan] / "batch.csv", batch_bytes)
+    counts["written"] += sink.counts["written"]
+    counts["unchanged"] += sink.counts["unchanged"]
+    counts["failed"] = sink.counts["failed"]
+
+    summary = ", ".join(f"{k} {v}" for k, v in counts.items() if v or k == "parsed")
+    print(f"✓ {master.name}: {summary} ({len(plans)} plan(s) from one parse per unit)")
+    if store is not None:
+        print(f"  store {store.root}: {store.summary()}")
+    if check and counts["redundant_yaml"]:
+        print(f"  {counts['redundant_yaml']} plan-folder unit YAML file(s) are identical copies of the master")
+    return 1 if counts["failed"] or (check and (counts["differs"] or counts["missing"])) else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Derive 1/3/6-month lesson pages from one master unit folder.")
+    parser.add_argument("--master", required=True, help="Folder with batch.csv and the master unit_XX.yaml files")
+    parser.add_argument("--exam-root", help="Where <plan dir>/<subject>/ are written (default: the master's exam folder)")
+    parser.add_argument("--plans", default=",".join(PLAN_PROFILES), help="Comma list of plans")
+    parser.add_argument("--profiles", help="JSON file with per-plan profile overrides")
+    parser.add_argument("--check", action="store_true", help="Compare with the existing pages instead of writing")
+    parser.add_argument("--store", help="Content-addressed artifact store (artifact_store.py); pages are hardlinked from it")
+    parser.add_argument("--workers", type=int, default=4, help="Writer threads (output_sink.py)")
+    args = parser.parse_args()
+
+    master = Path(args.master)
+    if not (master / "batch.csv").exists():
+        print(f"Error: batch.csv not found in '{master}'")
+        sys.exit(1)
+    profiles = load_profiles(args.profiles)
+    plans = [p.strip() for p in args.plans.split(",") if p.strip()]
+    unknown = [p for p in plans if p not in profiles]
+    if unknown:
+        print(f"Error: unknown plan(s) {', '.join(unknown)}; known: {', '.join(profiles)}")
+        sys.exit(1)
+
+    started = time.monotonic()
+    exam_root = Path(args.exam_root) if args.exam_root else default_exam_root(master)
+    store = ArtifactStore(args.store) if args.store else None
+    rc = derive(master, exam_root, plans, profiles, args.check, store, args.workers)
+    print(f"Done in {time.monotonic() - started:.2f}s")
+    sys.exit(rc)
+
+
+if __name__ == "__main__":
+    main()
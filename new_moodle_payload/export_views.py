@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Materialize derived unit views (*_concept.yaml, *_concepts.yaml,
+*_learning.yaml) on request.
+
+The build no longer needs these files: tools read a view straight from the
+unit with payload_lib.load_view(). Export only when someone wants the files
+themselves (review, hand-off); the YAML is the same as the old
+yaml_concept_extractor.py / parse_concept_title_yaml.py output, written with
+the libyaml emitter and only when the bytes change.
+
+Usage:
+  python export_views.py --folder GATE-Chemistry/6-months-moodle-payload/organic_chemistry
+  python export_views.py --folder ... --views concepts,learning --out /tmp/views
+  python export_views.py --folder ... --check     # report stale/missing view files, write nothing
+
+Requirements:
+  pip install pyyaml
+"""
+
+import argparse
+import sys
+from pathlib import Path
+from typing import List
+
+from output_sink import OutputSink
+from payload_lib import DERIVED_VIEWS, dump_view, load_view, view_name
+
+
+def source_units(folder: Path) -> List[Path]:
+    """Unit YAML files in folder (batch.csv not required; existing view files are skipped)."""
+    return [p for p in sorted(folder.glob("*.yaml")) + sorted(folder.glob("*.yml")) if view_name(p) is None]
+
+
+def export(folder: Path, views: List[str], out_dir: Path, check: bool) -> int:
+    counts = {"written": 0, "unchanged": 0, "stale": 0, "missing": 0, "failed": 0}
+    sink = OutputSink(announce="✓ Created")
+    for unit_path in source_units(folder):
+        for view in views:
+            suffix = DERIVED_VIEWS[view][0]
+            out_path = out_dir / f"{unit_path.stem}{suffix}"
+            try:
+                data = dump_view(load_view(unit_path, view)).encode("utf-8")
+            except Exception as e:
+                counts["failed"] += 1
+                print(f"❌ {unit_path.name}: {e}")
+                break
+            if check:
+                if not out_path.exists():
+                    counts["missing"] += 1
+                elif out_path.read_bytes() != data:
+                    counts["stale"] += 1
+                    print(f"⚠ stale     {out_path}")
+                else:
+                    counts["unchanged"] += 1
+                continue
+            sink.write(out_path, data)
+
+    sink.close()
+    for key in ("written", "unchanged", "failed"):
+        counts[key] += sink.counts[key]
+    print(f"✓ {folder}: " + ", ".join(f"{k} {v}" for k, v in counts.items() if v or k == "written"))
+    return 1 if counts["failed"] or (check and counts["stale"]) else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write derived unit views (*_concept(s).yaml, *_learning.yaml) on request.")
+    parser.add_argument("--folder", required=True, help="Folder with unit YAML files")
+    parser.add_argument("--views", default=",".join(DERIVED_VIEWS), help=f"Comma list of {', '.join(DERIVED_VIEWS)}")
+    parser.add_argument("--out", help="Output folder (default: next to the units)")
+    parser.add_argument("--check", action="store_true", help="Compare with existing view files instead of writing")
+    args = parser.parse_args()
+
+    folder = Path(args.folder)
+    if not folder.is_dir():
+        print(f"Error: Folder '{folder}' does not exist.")
+        sys.exit(1)
+    views = [v.strip() for v in args.views.split(",") if v.strip()]
+    unknown = [v for v in views if v not in DERIVED_VIEWS]
+    if unknown:
+        print(f"Error: unknown view(s) {', '.join(unknown)}; known: {', '.join(DERIVED_VIEWS)}")
+        sys.exit(1)
+    sys.exit(export(folder, views, Path(args.out) if args.out else folder, args.check))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,465 @@
+#!/usr/bin/env python3
+"""
+Single-flight caching proxy for the chat endpoint used by
+local_ai_functions_call_endpoint().
+
+Point the agent's config_data endpoint at this proxy instead of the LLM:
+  {"ask_agent": {"endpoint": "http://127.0.0.1:8780/chat/completions", "api_key": "..."},
+   "mcq":       {"endpoint": "http://127.0.0.1:8780/chat/completions", "api_key": "..."}}
+
+- identical in-flight requests (same body) share ONE upstream call
+- streaming (SSE) chunks are fanned out to every waiter as they arrive;
+  late joiners get the chunks so far replayed first
+- completed 200 responses go into response_cache.py as answer text under the
+  key the block reads: the system message is matched against the block's
+  prompts/*.txt, which gives the function (ask_agent / mcq_widget), level,
+  question count and template version. Requests no prompt matches are cached
+  for the proxy only (function "proxy", keyed by messages plus body parameters).
+- GET /metrics -> JSON counters, hit/coalesce rates, p50/p95/p99 latency
+
+The upstream call runs detached from the client that started it, so a
+student closing the tab does not cancel the answer for everyone else.
+
+Usage:
+  python llm_proxy.py --upstream https://models.example.com/chat/completions --cache /var/moodledata/ai_assistant_response_cache
+  python llm_proxy.py --mock-upstream                      # bundled mock_llm_server in-process
+  python llm_proxy.py --upstream ... --cache DIR --prompts /path/to/blocks/ai_assistant/prompts
+  curl -s localhost:8780/metrics
+
+Requirements:
+  pip install aiohttp
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import re
+import time
+from pathlib import Path
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+
+import aiohttp
+from aiohttp import web
+
+from payload_lib import LEVELS
+from pregenerate import extract_content, sse_delta
+from prompt_manifest import DEFAULT_PROMPTS_DIR, PromptTemplates
+from response_cache import ResponseCache, cache_key
+
+
+FORWARD_HEADERS = ("Authorization", "api-key", "Content-Type")
+LATENCY_SAMPLES = 2000
+PLACEHOLDER_RE = re.compile(r"\{([A-Z_]+)\}")
+MCQ_COUNT_RE = re.compile(r"^Generate (\d+) MCQs on: ")
+
+
+def body_params_hash(body: Dict) -> str:
+    """Everything except the messages, so max_tokens/temperature/model/stream changes miss the cache."""
+    params = {k: v for k, v in body.items() if k != "messages"}
+    return hashlib.sha256(json.dumps(params, sort_keys=True).encode("utf-8")).hexdigest()[:12]
+
+
+def proxy_cache_entry(body: Dict) -> Tuple[str, str, int, str]:
+    return "proxy", "", 0, body_params_hash(body)
+
+
+def template_regex(template: str) -> "re.Pattern":
+    """Matches what str_replace() makes of the template; a repeated placeholder must repeat its value."""
+    parts, seen, pos = [], set(), 0
+    for m in PLACEHOLDER_RE.finditer(template):
+        parts.append(re.escape(template[pos:m.start()]))
+        name = m.group(1)
+        parts.append(f"(?P={name})" if name in seen else f"(?P<{name}>.*?)")
+        seen.add(name)
+        pos = m.end()
+    parts.append(re.escape(template[pos:]))
+    return re.compile("".join(parts), re.DOTALL)
+
+
+class PromptMatcher:
+    """Recognizes the block prompt behind a request, to cache it under the key PHP looks up."""
+
+    def __init__(self, prompts_dir):
+        templates = PromptTemplates(Path(prompts_dir))
+        self.patterns = []          # (function, level, template version, regex)
+        names = [("ask_agent", "", "ask_agent_instruction.txt")]
+        names += [("mcq_widget", level, f"mcq_{level}.txt") for level in LEVELS]
+        for function, level, name in names:
+            try:
+                text, version = templates.get(name)
+            except OSError:
+                continue
+            self.patterns.append((function, level, version, template_regex(text)))
+
+    def identify(self, body: Dict) -> Optional[Tuple[str, str, int, str]]:
+        """(function, level, number, template version) of a block request, None for anything else."""
+        messages = body.get("messages") or []
+        if len(messages) != 2 or not all(isinstance(m, dict) for m in messages):
+            return None
+        system, user = (str(m.get("content", "")) for m in messages)
+        for function, level, version, pattern in self.patterns:
+            m = pattern.fullmatch(system)
+            if m is None or m.groupdict().get("LEVEL", level) != level:
+                continue
+            number = 0
+            if function == "mcq_widget":
+                count = MCQ_COUNT_RE.match(user)
+                if count is None:
+                    continue
+                number = int(count.group(1))
+            return function, level, number, version
+        return None
+
+
+def sse_chunk(model: str, content: str, finish: bool = False) -> bytes:
+    event = {
+        "id": "chatcmpl-cache",
+        "object": "chat.completion.chunk",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{"index": 0, "delta": {} if finish else {"content": content},
+                     "finish_reason": "stop" if finish else None}],
+    }
+    return b"data: " + json.dumps(event, ensure_ascii=False).encode("utf-8") + b"\n\n"
+
+
+def percentile(samples: List[float], pct: float) -> Optional[float]:
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    idx = min(len(ordered) - 1, max(0, int(round(pct / 100.0 * len(ordered) + 0.5)) - 1))
+    return round(ordered[idx], 1)
+
+
+class Metrics:
+    def __init__(self):
+        self.counters: Dict[str, int] = {
+            "requests": 0, "cache_hits": 0, "coalesced": 0, "upstream_calls": 0,
+            "upstream_errors": 0, "client_disconnects": 0,
+        }
+        self.in_flight = 0
+        self.ttfb_ms: Dict[str, Deque[float]] = {}
+        self.total_ms: Dict[str, Deque[float]] = {}
+
+    def observe(self, outcome: str, ttfb: float, total: float) -> None:
+        self.ttfb_ms.setdefault(outcome, deque(maxlen=LATENCY_SAMPLES)).append(ttfb * 1000)
+        self.total_ms.setdefault(outcome, deque(maxlen=LATENCY_SAMPLES)).append(total * 1000)
+
+    def snapshot(self) -> Dict:
+        c = self.counters
+        served = c["requests"] or 1
+        out = dict(c)
+        out["in_flight_upstream"] = self.in_flight
+        out["hit_rate_pct"] = round(100.0 * c["cache_hits"] / served, 1)
+        out["coalesce_rate_pct"] = round(100.0 * c["coalesced"] / served, 1)
+        out["latency_ms"] = {
+            outcome: {
+                "count": len(self.total_ms[outcome]),
+                "ttfb_p50": percentile(list(self.ttfb_ms[outcome]), 50),
+                "ttfb_p95": percentile(list(self.ttfb_ms[outcome]), 95),
+                "ttfb_p99": percentile(list(self.ttfb_ms[outcome]), 99),
+                "total_p50": percentile(list(self.total_ms[outcome]), 50),
+                "total_p95": percentile(list(self.total_ms[outcome]), 95),
+                "total_p99": percentile(list(self.total_ms[outcome]), 99),
+            }
+            for outcome in sorted(self.total_ms)
+        }
+        return out
+
+
+class Flight:
+    """One upstream call shared by every identical request that arrives while it runs."""
+
+    def __init__(self, stream: bool):
+        self.stream = stream
+        self.status = 0
+        self.content_type = "application/json"
+        self.chunks: List[bytes] = []      # raw upstream bytes, in order
+        self.done = False
+        self.changed = asyncio.Condition()
+
+    async def publish(self, chunk: bytes = b"", status: int = 0, content_type: str = "", done: bool = False):
+        async with self.changed:
+            if status:
+                self.status = status
+            if content_type:
+                self.content_type = content_type
+            if chunk:
+                self.chunks.append(chunk)
+            if done:
+                self.done = True
+            self.changed.notify_all()
+
+    async def follow(self):
+        """Yield chunks from the beginning, waiting for new ones until the flight is done."""
+        index = 0
+        while True:
+            async with self.changed:
+                await self.changed.wait_for(lambda: self.done or len(self.chunks) > index)
+                pending = self.chunks[index:]
+                finished = self.done
+            for chunk in pending:
+                yield chunk
+            index += len(pending)
+            if finished and index >= len(self.chunks):
+                return
+
+
+class LLMProxy:
+    def __init__(self, upstream: str, cache: Optional[ResponseCache], session: aiohttp.ClientSession,
+                 upstream_key: str = "", cache_ttl: Optional[int] = None,
+                 matcher: Optional[PromptMatcher] = None):
+        self.upstream = upstream
+        self.cache = cache
+        self.matcher = matcher
+        self.session = session
+        self.upstream_key = upstream_key
+        self.cache_ttl = cache_ttl
+        self.flights: Dict[str, Flight] = {}
+        self.metrics = Metrics()
+        self._tasks = set()
+
+    def cache_entry(self, body: Dict) -> Tuple[str, str, int, str]:
+        """(function, level, number, template version) the answer is cached under."""
+        entry = self.matcher.identify(body) if self.matcher is not None else None
+        return entry or proxy_cache_entry(body)
+
+    # ---------- upstream ----------
+
+    async def _fly(self, key: str, entry: Tuple[str, str, int, str], flight: Flight, body: Dict, headers: Dict[str, str],
+                   query: str) -> None:
+        self.metrics.counters["upstream_calls"] += 1
+        self.metrics.in_flight += 1
+        url = self.upstream + (("&" if "?" in self.upstream else "?") + query if query else "")
+        collected: List[bytes] = []
+        status = 502
+        complete = False
+        try:
+            async with self.session.post(url, json=body, headers=headers) as resp:
+                status = resp.status
+                await flight.publish(status=resp.status,
+                                     content_type=resp.headers.get("Content-Type", "application/json"))
+                async for chunk in resp.content.iter_any():
+                    collected.append(chunk)
+                    await flight.publish(chunk)
+            complete = True
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            status = 502
+            payload = json.dumps({"error": {"message": f"upstream: {type(e).__name__}: {e}"}}).encode("utf-8")
+            if not flight.status:
+                await flight.publish(payload, status=502, content_type="application/json")
+        finally:
+            self.metrics.in_flight -= 1
+            try:
+                if complete and status == 200 and collected:
+                    self._store(entry, body, b"".join(collected), flight.stream)
+                else:
+                    self.metrics.counters["upstream_errors"] += 1
+            finally:
+                # Only now release the flight: a request arriving in between finds the cache entry.
+                self.flights.pop(key, None)
+                await flight.publish(status=flight.status or status, done=True)
+
+    def _store(self, entry: Tuple[str, str, int, str], body: Dict, raw: bytes, stream: bool) -> None:
+        """Cache the answer text, the form response_cache_get() hands to the PHP endpoints."""
+        if self.cache is None:
+            return
+        try:
+            if stream:
+                text = []
+                for block in raw.decode("utf-8").split("\n\n"):
+                    for line in block.splitlines():
+                        if line.startswith("data:") and line[5:].strip() not in ("", "[DONE]"):
+                            text.append(sse_delta(json.loads(line[5:].strip()), False))
+                content = "".join(text)
+            else:
+                content = extract_content(json.loads(raw.decode("utf-8")), False)
+        except ValueError:
+            return
+        if content:
+            function, level, number, version = entry
+            self.cache.put(cache_key(*entry, body.get("messages") or []), content, function, level, number,
+                           version, ttl=self.cache_ttl)
+
+    # ---------- handlers ----------
+
+    async def handle(self, request: web.Request) -> web.StreamResponse:
+        started = time.monotonic()
+        self.metrics.counters["requests"] += 1
+        try:
+            body = await request.json()
+        except ValueError:
+            return web.json_response({"error": {"message": "invalid JSON"}}, status=400)
+        stream = bool(body.get("stream"))
+
+        entry = self.cache_entry(body)
+        cached = None
+        if self.cache is not None:
+            cached = self.cache.get(cache_key(*entry, body.get("messages") or []))
+        if cached is not None:
+            self.metrics.counters["cache_hits"] += 1
+            return await self._serve_cached(request, body, cached, stream, started)
+
+        key = hashlib.sha256(
+            (request.path + "\n" + json.dumps(body, sort_keys=True)).encode("utf-8")
+        ).hexdigest()
+        flight = self.flights.get(key)
+        if flight is None:
+            flight = self.flights[key] = Flight(stream)
+            headers = {h: request.headers[h] for h in FORWARD_HEADERS if h in request.headers}
+            if self.upstream_key:
+                headers["Authorization"] = f"Bearer {self.upstream_key}"
+            task = asyncio.create_task(self._fly(key, entry, flight, body, headers, request.query_string))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+            outcome = "upstream"
+        else:
+            self.metrics.counters["coalesced"] += 1
+            outcome = "coalesced"
+
+        return await self._serve_flight(request, flight, outcome, started)
+
+    async def _serve_flight(self, request, flight: Flight, outcome: str, started: float) -> web.StreamResponse:
+        if not flight.stream:
+            chunks = [c async for c in flight.follow()]
+            ttfb = time.monotonic() - started
+            resp = web.Response(body=b"".join(chunks), status=flight.status or 502,
+                                content_type=flight.content_type.split(";")[0])
+            self.metrics.observe(outcome, ttfb, ttfb)
+            return resp
+
+        resp = None
+        ttfb = None
+        try:
+            async for chunk in flight.follow():
+                if resp is None:
+                    resp = web.StreamResponse(status=flight.status or 502, headers={
+                        "Content-Type": flight.content_type, "Cache-Control": "no-cache",
+                    })
+                    await resp.prepare(request)
+                if ttfb is None:
+                    ttfb = time.monotonic() - started
+                await resp.write(chunk)
+        except (ConnectionResetError, asyncio.CancelledError):
+            self.metrics.counters["client_disconnects"] += 1
+            raise
+        if resp is None:
+            return web.json_response({"error": {"message": "empty upstream response"}}, status=502)
+        await resp.write_eof()
+        self.metrics.observe(outcome, ttfb or 0.0, time.monotonic() - started)
+        return resp
+
+    async def _serve_cached(self, request, body: Dict, cached: str, stream: bool, started: float):
+        if not stream:
+            completion = {"object": "chat.completion", "model": body.get("model", "") or "response_cache",
+                          "choices": [{"index": 0, "message": {"role": "assistant", "content": cached},
+                                       "finish_reason": "stop"}]}
+            resp = web.json_response(completion)
+            elapsed = time.monotonic() - started
+            self.metrics.observe("cache", elapsed, elapsed)
+            return resp
+        model = body.get("model", "")
+        resp = web.StreamResponse(headers={"Content-Type": "text/event-stream", "Cache-Control": "no-cache"})
+        await resp.prepare(request)
+        ttfb = time.monotonic() - started
+        for start in range(0, len(cached), 512):
+            await resp.write(sse_chunk(model, cached[start:start + 512]))
+        await resp.write(sse_chunk(model, "", finish=True))
+        await resp.write(b"data: [DONE]\n\n")
+        await resp.write_eof()
+        self.metrics.observe("cache", ttfb, time.monotonic() - started)
+        return resp
+
+    async def handle_metrics(self, request: web.Request) -> web.Response:
+        snapshot = self.metrics.snapshot()
+        if self.cache is not None:
+            snapshot["cache"] = self.cache.stats()
+        return web.json_response(snapshot)
+
+
+def create_app(proxy: LLMProxy) -> web.Application:
+    app = web.Application(client_max_size=16 * 1024 * 1024)
+    app["proxy"] = proxy
+    app.router.add_get("/metrics", proxy.handle_metrics)
+    app.router.add_post("/{tail:.*}", proxy.handle)
+    return app
+
+
+async def start_proxy(upstream: str, cache_dir: Optional[str] = None, host: str = "127.0.0.1", port: int = 0,
+                      concurrency: int = 64, timeout: float = 600.0, upstream_key: str = "",
+                      cache_ttl: Optional[int] = None, prompts_dir=DEFAULT_PROMPTS_DIR):
+    """Start in the running loop; returns (runner, base_url, proxy). Call runner.cleanup() to stop."""
+    cache = ResponseCache(cache_dir) if cache_dir else None
+    session = aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(limit=concurrency, limit_per_host=concurrency, keepalive_timeout=60),
+        timeout=aiohttp.ClientTimeout(total=timeout),
+    )
+    matcher = PromptMatcher(prompts_dir) if prompts_dir else None
+    proxy = LLMProxy(upstream, cache, session, upstream_key=upstream_key, cache_ttl=cache_ttl, matcher=matcher)
+    app = create_app(proxy)
+
+    async def close(_app):
+        await session.close()
+        if cache is not None:
+            cache.close()
+
+    app.on_cleanup.append(close)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    actual_port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://{host}:{actual_port}", proxy
+
+
+async def serve(args) -> None:
+    mock_runner = None
+    upstream = args.upstream
+    if args.mock_upstream:
+        from mock_llm_server import DEFAULT_RESPONSE_FILE, MockConfig, load_response_text, start_mock_server
+        mock_runner, base = await start_mock_server(MockConfig(response_text=load_response_text(DEFAULT_RESPONSE_FILE),
+                                                               first_token_latency=0.5, token_latency=0.02))
+        upstream = f"{base}/chat/completions"
+        print(f"Mock upstream at {upstream}")
+
+    runner, base_url, _proxy = await start_proxy(
+        upstream, args.cache, args.host, args.port, args.concurrency, args.timeout,
+        args.upstream_key, args.cache_ttl or None, args.prompts,
+    )
+    print(f"LLM proxy listening on {base_url} -> {upstream}")
+    print(f"Metrics: {base_url}/metrics")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()
+        if mock_runner is not None:
+            await mock_runner.cleanup()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Single-flight caching proxy for the LLM chat endpoint.")
+    parser.add_argument("--upstream", help="Upstream chat completions URL (query string is forwarded)")
+    parser.add_argument("--upstream-key", default="", help="Replace the client's Authorization with this key")
+    parser.add_argument("--cache", help="response_cache.py folder (omit to only coalesce)")
+    parser.add_argument("--cache-ttl", type=int, default=0, help="Seconds; 0 = cache default")
+    parser.add_argument("--prompts", default=str(DEFAULT_PROMPTS_DIR),
+                        help="blocks/ai_assistant/prompts folder, to cache under the block's keys")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8780)
+    parser.add_argument("--concurrency", type=int, default=64, help="Max upstream connections")
+    parser.add_argument("--timeout", type=float, default=600.0, help="Upstream timeout in seconds")
+    parser.add_argument("--mock-upstream", action="store_true", help="Use the bundled mock_llm_server")
+    args = parser.parse_args()
+
+    if not args.upstream and not args.mock_upstream:
+        parser.error("--upstream or --mock-upstream is required")
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,328 @@
+#!/usr/bin/env python3
+"""
+Load test: a class of students clicking lesson links at the same time.
+
+Clicks are drawn from the real payload anchors (payload_lib.iter_links over
+the unit YAML of one payload folder): each student opens one of a few
+"lessons of the day" (unit files, Zipf-weighted) and clicks its links with a
+configurable ask_agent / MCQ level mix and think time.
+
+Targets:
+  local  (default)  requests rendered exactly as ask_agent_ajax.php /
+                    mcq_widget_ajax.php send them (prompt_manifest.build_request)
+                    go to the bundled mock_llm_server, optionally through
+                    llm_proxy.py (--via-proxy). No external services.
+  moodle            GET blocks/ai_assistant/ajax/{ask_agent,mcq_widget}_ajax.php
+                    on a running site with the block's query parameters
+                    (--moodle-url, --cookie, --sesskey, --courseid ...).
+
+Reports per click type and overall: p50/p95/p99 time to first byte (first
+body chunk, i.e. first SSE event for ask_agent) and total latency, errors,
+and throughput.
+
+Usage:
+  python loadtest.py --folder GATE-Chemistry/3-months-moodle-payload/organic_chemistry --students 60
+  python loadtest.py --folder ... --students 200 --token-latency 0.03 --chunk-words 2 --via-proxy
+  python loadtest.py --folder ... --target moodle --moodle-url https://lms.example.com \\
+      --cookie 'MoodleSession=...' --sesskey abc123 --courseid 5 --mainsubject GATECHEM100 --agent-key chem_ai
+
+Requirements:
+  pip install aiohttp pyyaml
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import aiohttp
+
+from llm_proxy import percentile, start_proxy
+from mock_llm_server import DEFAULT_RESPONSE_FILE, MockConfig, load_response_text, start_mock_server
+from payload_lib import Link, iter_links, iter_unit_files, load_csv_mapping, load_unit, plan_for_folder
+from prompt_manifest import DEFAULT_PROMPTS_DIR, DEFAULT_TARGET, PromptTemplates, build_request
+
+
+DEFAULT_MIX = "ask_agent=4,basic=3,intermediate=2,advanced=1"
+
+
+@dataclass
+class Sample:
+    kind: str            # ask_agent | mcq_basic | ...
+    ok: bool
+    ttfb: float
+    total: float
+    status: int
+
+
+def parse_mix(text: str) -> Dict[str, float]:
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        mix[name.strip()] = float(weight or 1)
+    return mix
+
+
+def load_lessons(folder: Path) -> List[Tuple[str, List[Link]]]:
+    """[(unit file stem, links rendered on that unit's page)] for one payload folder."""
+    plan = plan_for_folder(folder)
+    if plan is None:
+        raise SystemExit(f"Cannot tell the plan (1/3/6 months) from folder name: {folder}")
+    mapping = load_csv_mapping(folder / "batch.csv")
+    lessons = []
+    for yaml_path in iter_unit_files(folder, mapping):
+        links = list(iter_links(load_unit(yaml_path), plan, mapping[yaml_path.stem]))
+        if links:
+            lessons.append((yaml_path.stem, links))
+    return lessons
+
+
+def link_kind(link: Link) -> str:
+    return "ask_agent" if link.function == "ask_agent" else link.level
+
+
+def plan_clicks(lessons, args, rng: random.Random) -> List[List[Link]]:
+    """Per student, the ordered list of links they will click."""
+    todays = rng.sample(lessons, min(args.lessons, len(lessons)))
+    weights = [1.0 / (rank + 1) for rank in range(len(todays))]      # Zipf: most students on lesson 1
+    mix = parse_mix(args.mix)
+    students = []
+    for _ in range(args.students):
+        _stem, links = rng.choices(todays, weights=weights)[0]
+        by_kind: Dict[str, List[Link]] = defaultdict(list)
+        for link in links:
+            by_kind[link_kind(link)].append(link)
+        kinds = [k for k in mix if by_kind.get(k)]
+        if not kinds:
+            students.append([])
+            continue
+        clicks = []
+        for _ in range(args.clicks):
+            kind = rng.choices(kinds, weights=[mix[k] for k in kinds])[0]
+            # Early links on a page get most clicks.
+            candidates = by_kind[kind]
+            clicks.append(candidates[min(int(rng.expovariate(1 / 3.0)), len(candidates) - 1)])
+        students.append(clicks)
+    return students
+
+
+class LocalTarget:
+    def __init__(self, url: str, templates: PromptTemplates, target_exam: str):
+        self.url = url
+        self.templates = templates
+        self.target_exam = target_exam
+
+    def request(self, link: Link):
+        payload = build_request(link, self.target_exam, self.templates)["payload"]
+        return "POST", self.url, {"json": payload, "headers": {"Authorization": "Bearer loadtest"}}
+
+
+class MoodleTarget:
+    def __init__(self, args):
+        base = args.moodle_url.rstrip("/") + "/blocks/ai_assistant/ajax/"
+        self.urls = {"ask_agent": base + "ask_agent_ajax.php", "mcq_widget": base + "mcq_widget_ajax.php"}
+        self.common = {"sesskey": args.sesskey, "agent_config_key": args.agent_key}
+        self.args = args
+        self.headers = {"Cookie": args.cookie} if args.cookie else {}
+
+    def request(self, link: Link):
+        params = dict(self.common)
+        params.update({"agent_text": link.agent_text, "subject": link.subject, "topic": link.topic,
+                       "lesson": link.lesson, "tags": link.tags})
+        if self.args.target_exam:
+            params["target"] = self.args.target_exam
+        if link.function == "mcq_widget":
+            params.update({"level": link.level, "number": str(link.number),
+                           "mainsubject": self.args.mainsubject, "courseid": str(self.args.courseid)})
+        return "GET", self.urls[link.function], {"params": params, "headers": self.headers}
+
+
+async def click(session: aiohttp.ClientSession, target, link: Link) -> Sample:
+    kind = "ask_agent" if link.function == "ask_agent" else f"mcq_{link.level}"
+    method, url, kwargs = target.request(link)
+    started = time.monotonic()
+    ttfb = None
+    status = 0
+    ok = False
+    try:
+        async with session.request(method, url, **kwargs) as resp:
+            status = resp.status
+            async for _chunk in resp.content.iter_any():
+                if ttfb is None:
+                    ttfb = time.monotonic() - started
+            ok = status == 200
+    except (aiohttp.ClientError, asyncio.TimeoutError):
+        ok = False
+    total = time.monotonic() - started
+    return Sample(kind, ok, ttfb if ttfb is not None else total, total, status)
+
+
+async def student(session, target, clicks: List[Link], start_delay: float, think: float,
+                  rng: random.Random, samples: List[Sample]) -> None:
+    await asyncio.sleep(start_delay)
+    for i, link in enumerate(clicks):
+        if i and think:
+            await asyncio.sleep(rng.expovariate(1 / think))
+        samples.append(await click(session, target, link))
+
+
+def summarize(samples: List[Sample], wall: float) -> Dict:
+    groups: Dict[str, List[Sample]] = defaultdict(list)
+    for s in samples:
+        groups[s.kind].append(s)
+        groups["ALL"].append(s)
+    report = {"wall_seconds": round(wall, 2), "groups": {}}
+    for kind in sorted(groups, key=lambda k: (k == "ALL", k)):
+        items = groups[kind]
+        good = [s for s in items if s.ok]
+        ttfb = [s.ttfb * 1000 for s in good]
+        total = [s.total * 1000 for s in good]
+        report["groups"][kind] = {
+            "requests": len(items),
+            "errors": len(items) - len(good),
+            "ttfb_ms": {f"p{p}": percentile(ttfb, p) for p in (50, 95, 99)},
+            "total_ms": {f"p{p}": percentile(total, p) for p in (50, 95, 99)},
+            "throughput_rps": round(len(good) / wall, 2) if wall else 0.0,
+        }
+    return report
+
+
+def print_report(report: Dict) -> None:
+    print("=" * 96)
+    print(f"{'click':<16}{'reqs':>6}{'err':>5}  {'ttfb p50':>9}{'p95':>9}{'p99':>9}  "
+          f"{'total p50':>10}{'p95':>9}{'p99':>9}  {'req/s':>7}")
+    print("-" * 96)
+
+    def fmt(v):
+        return f"{v:.0f}" if v is not None else "-"
+
+    for kind, g in report["groups"].items():
+        t, tt = g["ttfb_ms"], g["total_ms"]
+        print(f"{kind:<16}{g['requests']:>6}{g['errors']:>5}  {fmt(t['p50']):>9}{fmt(t['p95']):>9}{fmt(t['p99']):>9}  "
+              f"{fmt(tt['p50']):>10}{fmt(tt['p95']):>9}{fmt(tt['p99']):>9}  {g['throughput_rps']:>7}")
+    print("=" * 96)
+    print(f"Latencies in ms; wall time {report['wall_seconds']} s")
+
+
+async def run(args) -> Dict:
+    rng = random.Random(args.seed)
+    lessons = load_lessons(Path(args.folder))
+    if not lessons:
+        raise SystemExit(f"No unit YAML with links in {args.folder}")
+    plans = plan_clicks(lessons, args, rng)
+    total_clicks = sum(len(p) for p in plans)
+    print(f"{args.students} students, {total_clicks} clicks over {min(args.lessons, len(lessons))} lesson(s) "
+          f"from {args.folder}")
+
+    runners = []
+    extra: Dict = {}
+    try:
+        if args.target == "moodle":
+            if not args.moodle_url:
+                raise SystemExit("--target moodle needs --moodle-url")
+            target = MoodleTarget(args)
+        else:
+            mock_config = MockConfig(
+                response_text=load_response_text(args.response_file),
+                first_token_latency=args.first_token_latency,
+                token_latency=args.token_latency,
+                chunk_words=args.chunk_words,
+                fail_rate=args.fail_rate,
+            )
+            mock_runner, mock_base = await start_mock_server(mock_config)
+            runners.append(mock_runner)
+            url = f"{mock_base}/chat/completions"
+            proxy = None
+            if args.via_proxy:
+                cache_dir = tempfile.mkdtemp(prefix="loadtest_cache_") if args.proxy_cache else None
+                proxy_runner, proxy_base, proxy = await start_proxy(url, cache_dir)
+                runners.insert(0, proxy_runner)
+                url = f"{proxy_base}/chat/completions"
+            target = LocalTarget(url, PromptTemplates(Path(args.prompts)), args.target_exam or DEFAULT_TARGET)
+            extra["mock"] = mock_config.stats
+            if proxy is not None:
+                extra["proxy"] = proxy.metrics
+
+        samples: List[Sample] = []
+        connector = aiohttp.TCPConnector(limit=0, force_close=args.no_keepalive)
+        timeout = aiohttp.ClientTimeout(total=args.timeout)
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+            started = time.monotonic()
+            await asyncio.gather(*[
+                student(session, target, clicks, rng.uniform(0, args.ramp), args.think, rng, samples)
+                for clicks in plans
+            ])
+            wall = time.monotonic() - started
+    finally:
+        for runner in runners:
+            await runner.cleanup()
+
+    report = summarize(samples, wall)
+    if "mock" in extra:
+        report["mock_llm"] = dict(extra["mock"])
+    if "proxy" in extra:
+        snap = extra["proxy"].snapshot()
+        report["proxy"] = {k: snap[k] for k in ("upstream_calls", "coalesced", "cache_hits",
+                                                 "hit_rate_pct", "coalesce_rate_pct")}
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate a class clicking AI assistant lesson links.")
+    parser.add_argument("--folder", required=True, help="Payload folder with batch.csv and unit YAML")
+    parser.add_argument("--students", type=int, default=40)
+    parser.add_argument("--clicks", type=int, default=3, help="Clicks per student")
+    parser.add_argument("--lessons", type=int, default=3, help="Distinct lessons open today")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"Click weights (default {DEFAULT_MIX})")
+    parser.add_argument("--ramp", type=float, default=5.0, help="Students start uniformly within N seconds")
+    parser.add_argument("--think", type=float, default=2.0, help="Mean seconds between a student's clicks")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--timeout", type=float, default=600.0)
+    parser.add_argument("--no-keepalive", action="store_true", help="New connection per click (browser-like)")
+    parser.add_argument("--json", help="Also write the report as JSON")
+    parser.add_argument("--target", choices=("local", "moodle"), default="local")
+    parser.add_argument("--target-exam", default="", help="data-target sent with clicks")
+    # local target (mock LLM)
+    parser.add_argument("--prompts", default=str(DEFAULT_PROMPTS_DIR), help="blocks/ai_assistant/prompts folder")
+    parser.add_argument("--response-file", default=str(DEFAULT_RESPONSE_FILE))
+    parser.add_argument("--first-token-latency", type=float, default=0.8, help="Mock seconds before first chunk")
+    parser.add_argument("--token-latency", type=float, default=0.02, help="Mock seconds between chunks")
+    parser.add_argument("--chunk-words", type=int, default=4, help="Mock words per SSE chunk")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="Mock 429/500 fraction")
+    parser.add_argument("--via-proxy", action="store_true", help="Put llm_proxy.py between clicks and the mock")
+    parser.add_argument("--proxy-cache", action="store_true", help="Give the proxy a (temporary) response cache")
+    # moodle target
+    parser.add_argument("--moodle-url")
+    parser.add_argument("--cookie", default="", help="e.g. 'MoodleSession=...'")
+    parser.add_argument("--sesskey", default="")
+    parser.add_argument("--agent-key", default="", help="agent_config_key")
+    parser.add_argument("--courseid", default="1")
+    parser.add_argument("--mainsubject", default="")
+    args = parser.parse_args()
+
+    if not Path(args.folder, "batch.csv").exists():
+        print(f"Error: '{args.folder}' has no batch.csv")
+        sys.exit(1)
+
+    report = asyncio.run(run(args))
+    print_report(report)
+    if "mock_llm" in report:
+        m = report["mock_llm"]
+        print(f"Mock LLM: {m['requests']} requests, max {m['max_in_flight']} in flight, {m['failed']} injected failures")
+    if "proxy" in report:
+        p = report["proxy"]
+        print(f"Proxy: {p['upstream_calls']} upstream calls, {p['coalesced']} coalesced, {p['cache_hits']} cache hits")
+    if args.json:
+        Path(args.json).write_text(json.dumps(report, indent=2), encoding="utf-8")
+        print(f"✓ Report: {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+Turn reorganized syllabus sections in Markdown (GATE-Physics/sections/section_N_<slug>.md)
+into skeleton unit YAML plus batch.csv rows, one unit per section file.
+
+Input (only the "### Reorganized Units" block is read; "Logic Behind the Split" is skipped):
+  **Unit 4.1: Foundations of Quantum Mechanics**
+
+  - Postulates of quantum mechanics; uncertainty principle
+  - Schrodinger equation
+
+Output, section layout (same keys as the hand-written section_N.yaml units):
+  metadata       subject, target, syllabus_line ("Section 4: Quantum Mechanics - <all bullets>")
+  concepts.core      one per unit: name = unit title, clarifier = its bullets
+  concepts.related   one per bullet item (split on ";"): clarifier = the unit title
+  learning_path  one item per unit: id, title, learning_objectives = bullets,
+                 textbook_style_content = [{topic: title, sections: [{section_title, section_type}]}]
+  batch.csv      topic,filename_prefix  (section_4 -> "Quantum Mechanics" from the file slug)
+
+Existing unit files are kept (hand-written content wins) unless --force; existing
+batch.csv rows keep their topic name and new prefixes are appended. Files are
+parsed in parallel, one process per file.
+
+Usage:
+  python md_sections_to_yaml.py --sections GATE-Physics/sections
+  python md_sections_to_yaml.py --sections ... --out /tmp/physics --subject Physics
+  python md_sections_to_yaml.py --sections ... --force      # overwrite existing section_N.yaml
+
+Requirements:
+  pip install pyyaml
+"""
+
+import argparse
+import csv
+import io
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import yaml
+
+from output_sink import write_atomic
+from payload_lib import Dumper
+
+
+SECTION_FILE_RE = re.compile(r"^section_(\d+)_(.+)\.md$")
+UNIT_RE = re.compile(r"^\*\*\s*Unit\s+(\d+(?:\.\d+)*)\s*:\s*(.+?)\s*\*\*\s*$")
+BULLET_RE = re.compile(r"^\s*[-*+]\s+(.*\S)\s*$")
+HEADING_RE = re.compile(r"^#{1,6}\s+(.*\S)\s*$")
+UNITS_HEADING = "reorganized units"
+SMALL_WORDS = {"and", "of", "in", "the", "for", "to", "with", "on", "a", "an"}
+
+
+@dataclass
+class MdUnit:
+    number: str
+    title: str
+    bullets: List[str] = field(default_factory=list)
+
+
+# -------------------- Parsing --------------------
+def topic_from_slug(slug: str) -> str:
+    """'thermodynamics_statistical_physics' -> 'Thermodynamics Statistical Physics'."""
+    words = slug.replace("-", "_").split("_")
+    return " ".join(w if (i and w in SMALL_WORDS) else w.capitalize() for i, w in enumerate(words) if w)
+
+
+def parse_units(lines) -> List[MdUnit]:
+    """One pass over the lines; bullets attach to the last **Unit x.y: ...** line."""
+    units: List[MdUnit] = []
+    in_block = None     # None: no "Reorganized Units" heading seen yet (then read the whole file)
+    for raw in lines:
+        line = raw.rstrip("\n")
+        heading = HEADING_RE.match(line)
+        if heading:
+            in_block = heading.group(1).strip().lower() == UNITS_HEADING
+            continue
+        if in_block is False:
+            continue
+        unit = UNIT_RE.match(line.strip())
+        if unit:
+            units.append(MdUnit(unit.group(1), unit.group(2)))
+            continue
+        bullet = BULLET_RE.match(line)
+        if bullet and units:
+            units[-1].bullets.append(bullet.group(1))
+        elif units and units[-1].bullets and line.startswith((" ", "\t")) and line.strip():
+            units[-1].bullets[-1] += " " + line.strip()     # wrapped bullet
+    return units
+
+
+def split_items(bullet: str) -> List[str]:
+    items = [part.strip() for part in bullet.split(";") if part.strip()]
+    return [item[0].upper() + item[1:] for item in items]
+
+
+# -------------------- Building --------------------
+def build_unit(section_no: str, topic: str, units: List[MdUnit], subject: str, target: str) -> Dict:
+    bullets = [b for u in units for b in u.bullets]
+    syllabus_line = f"Section {section_no}: {topic}"
+    if bullets:
+        syllabus_line += " - " + ", ".join(bullets)
+    core, related, learning_path = [], [], []
+    for index, unit in enumerate(units, start=1):
+        core.append({"name": unit.title, "clarifier": "; ".join(unit.bullets) or unit.title})
+        items = [item for bullet in unit.bullets for item in split_items(bullet)]
+        related.extend({"name": item, "clarifier": unit.title} for item in items)
+        learning_path.append({
+            "id": index,
+            "title": unit.title,
+            "learning_objectives": list(unit.bullets) or [unit.title],
+            "textbook_style_content": [{
+                "topic": unit.title,
+                "sections": [{"section_title": item, "section_type": "core_theory"} for item in items or [unit.title]],
+            }],
+        })
+    return {
+        "metadata": {"subject": subject, "target": target, "syllabus_line": syllabus_line},
+        "concepts": {"core": core, "related": related},
+        "learning_path": learning_path,
+    }
+
+
+def convert_file(path: str, subject: str, target: str) -> Tuple[str, str, int, str]:
+    """Worker: (filename_prefix, topic, unit count, YAML text) for one section file."""
+    m = SECTION_FILE_RE.match(os.path.basename(path))
+    section_no, slug = m.group(1), m.group(2)
+    with open(path, "r", encoding="utf-8") as f:
+        units = parse_units(f)
+    topic = topic_from_slug(slug)
+    data = build_unit(section_no, topic, units, subject, target)
+    text = yaml.dump(data, Dumper=Dumper, default_flow_style=False, sort_keys=False, allow_unicode=True)
+    return f"section_{section_no}", topic, len(units), text
+
+
+# -------------------- batch.csv --------------------
+BATCH_HEADER = ("topic", "filename_prefix")
+
+
+def read_batch(path: Path) -> Optional[List[Tuple[str, str]]]:
+    """Rows of an existing batch.csv (header row included when present), None when there is none."""
+    if not path.exists():
+        return None
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        return [(r[0].strip(), r[1].strip()) for r in csv.reader(f) if len(r) >= 2]
+
+
+def merge_batch(existing: Optional[List[Tuple[str, str]]], generated: List[Tuple[str, str]]) -> str:
+    rows = [BATCH_HEADER] if existing is None else list(existing)
+    known = {prefix for _, prefix in rows}
+    rows += [row for row in generated if row[1] not in known]
+    out = io.StringIO()
+    csv.writer(out, lineterminator="\n").writerows(rows)
+    return out.getvalue()
+
+
+def section_sort_key(path: Path) -> Tuple[int, str]:
+    m = SECTION_FILE_RE.match(path.name)
+    return int(m.group(1)), path.name
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate unit YAML skeletons and batch.csv from Markdown syllabus sections.")
+    parser.add_argument("--sections", required=True, help="Folder with section_N_<slug>.md files")
+    parser.add_argument("--out", help="Payload folder to write (default: <exam>/6-months-moodle-payload)")
+    parser.add_argument("--subject", help="metadata.subject (default: from the exam folder, GATE-Physics -> Physics)")
+    parser.add_argument("--target", help="metadata.target (default: 'GATE <subject> Examination')")
+    parser.add_argument("--force", action="store_true", help="Overwrite existing unit YAML files")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Worker processes")
+    args = parser.parse_args()
+
+    sections = Path(args.sections)
+    files = sorted((p for p in sections.glob("section_*.md") if SECTION_FILE_RE.match(p.name)), key=section_sort_key)
+    if not files:
+        print(f"Error: no section_N_<slug>.md files in '{sections}'")
+        sys.exit(1)
+    exam_dir = sections.resolve().parent
+    out = Path(args.out) if args.out else exam_dir / "6-months-moodle-payload"
+    subject = args.subject or exam_dir.name.split("-", 1)[-1].replace("_", " ")
+    target = args.target or f"GATE {subject} Examination"
+
+    started = time.monotonic()
+    with ProcessPoolExecutor(max_workers=max(1, min(args.workers, len(files)))) as pool:
+        results = list(pool.map(convert_file, [str(p) for p in files],
+                                [subject] * len(files), [target] * len(files)))
+
+    counts = {"written": 0, "unchanged": 0, "kept": 0, "empty": 0}
+    rows = []
+    for md_path, (prefix, topic, n_units, text) in zip(files, results):
+        if not n_units:
+            counts["empty"] += 1
+            print(f"⚠ {md_path.name}: no '**Unit x.y: ...**' lines found")
+            continue
+        # Every path below leaves a unit file behind (written, unchanged or kept),
+        # so only those prefixes get a batch.csv row.
+        rows.append((topic, prefix))
+        unit_path = out / f"{prefix}.yaml"
+        if unit_path.exists() and not args.force:
+            if unit_path.read_text(encoding="utf-8") == text:
+                counts["unchanged"] += 1
+            else:
+                counts["kept"] += 1
+                print(f"⚠ kept      {unit_path} (exists; --force to overwrite)")
+            continue
+        if write_atomic(unit_path, text):
+            counts["written"] += 1
+            print(f"✓ {unit_path}  ({n_units} units, topic '{topic}')")
+        else:
+            counts["unchanged"] += 1
+
+    batch_path = out / "batch.csv"
+    if write_atomic(batch_path, merge_batch(read_batch(batch_path), rows)):
+        print(f"✓ {batch_path}")
+    summary = ", ".join(f"{k} {v}" for k, v in counts.items() if v or k == "written")
+    print(f"✓ {len(files)} section file(s): {summary} in {time.monotonic() - started:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the OpenAI-compatible chat endpoint configured in
+local_ai_functions_agents (what local_ai_functions_call_endpoint() calls).
+
+- stream=false -> chat.completion JSON (choices[0].message.content)
+- stream=true  -> SSE chat.completion.chunk events, then "data: [DONE]"
+
+The reply text is moodle-blocks-ai_assistant/ajax/sample_botresponse.txt, so
+mcq_widget's parser sees a realistic answer. Latency, chunking and failures
+are configurable for load tests and retry tests.
+
+Usage:
+  python mock_llm_server.py --port 8765 --first-token-latency 0.3 --token-latency 0.02 --chunk-words 3
+  curl -s localhost:8765/stats
+
+Requirements:
+  pip install aiohttp
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List
+
+from aiohttp import web
+
+
+DEFAULT_RESPONSE_FILE = (
+    Path(__file__).resolve().parent.parent / "moodle-blocks-ai_assistant" / "ajax" / "sample_botresponse.txt"
+)
+
+
+@dataclass
+class MockConfig:
+    response_text: str = ""
+    first_token_latency: float = 0.2   # seconds before the first byte/chunk
+    token_latency: float = 0.01        # seconds between streamed chunks (and per chunk for stream=false)
+    chunk_words: int = 4               # words per streamed chunk
+    fail_rate: float = 0.0             # fraction of requests answered with 429/500
+    model: str = "mock-llm"
+    stats: Dict[str, int] = field(default_factory=lambda: {
+        "requests": 0, "streamed": 0, "failed": 0, "in_flight": 0, "max_in_flight": 0,
+    })
+
+
+def load_response_text(path) -> str:
+    p = Path(path)
+    if p.exists():
+        return p.read_text(encoding="utf-8")
+    return "Q1. Mock question?\nA. One\nB. Two\nC. Three\nD. Four\n**Answer: A**\n\n**Explanation:** Mock.\n"
+
+
+def split_chunks(text: str, words_per_chunk: int) -> List[str]:
+    """Split keeping whitespace so the chunks concatenate back to text exactly."""
+    pieces: List[str] = []
+    buf: List[str] = []
+    count = 0
+    words = text.split(" ")
+    for i, w in enumerate(words):
+        buf.append(w + (" " if i < len(words) - 1 else ""))
+        count += 1
+        if count >= max(1, words_per_chunk):
+            pieces.append("".join(buf))
+            buf, count = [], 0
+    if buf:
+        pieces.append("".join(buf))
+    return pieces
+
+
+def completion_body(config: MockConfig, text: str, payload: Dict) -> Dict:
+    return {
+        "id": f"chatcmpl-{uuid.uuid4().hex[:24]}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": payload.get("model") or config.model,
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": text},
+            "finish_reason": "stop",
+        }],
+        "usage": {
+            "prompt_tokens": sum(len(str(m.get("content", "")).split()) for m in payload.get("messages", [])),
+            "completion_tokens": len(text.split()),
+            "total_tokens": 0,
+        },
+    }
+
+
+def chunk_event(chunk_id: str, model: str, content: str, finish: bool = False) -> bytes:
+    body = {
+        "id": chunk_id,
+        "object": "chat.completion.chunk",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{
+            "index": 0,
+            "delta": {} if finish else {"content": content},
+            "finish_reason": "stop" if finish else None,
+        }],
+    }
+    return b"data: " + json.dumps(body, ensure_ascii=False).encode("utf-8") + b"\n\n"
+
+
+async def handle_completion(request: web.Request) -> web.StreamResponse:
+    config: MockConfig = request.app["config"]
+    stats = config.stats
+    stats["requests"] += 1
+    stats["in_flight"] += 1
+    stats["max_in_flight"] = max(stats["max_in_flight"], stats["in_flight"])
+    try:
+        try:
+            payload = await request.json()
+        except ValueError:
+            return web.json_response({"error": {"message": "invalid JSON"}}, status=400)
+
+        if config.fail_rate and random.random() < config.fail_rate:
+            stats["failed"] += 1
+            status = random.choice([429, 500])
+            headers = {"Retry-After": "0"} if status == 429 else {}
+            return web.json_response({"error": {"message": "mock failure", "code": status}},
+                                     status=status, headers=headers)
+
+        chunks = split_chunks(config.response_text, config.chunk_words)
+        await asyncio.sleep(config.first_token_latency)
+
+        if not payload.get("stream"):
+            await asyncio.sleep(config.token_latency * max(0, len(chunks) - 1))
+            return web.json_response(completion_body(config, config.response_text, payload))
+
+        stats["streamed"] += 1
+        resp = web.StreamResponse(headers={
+            "Content-Type": "text/event-stream",
+            "Cache-Control": "no-cache",
+        })
+        await resp.prepare(request)
+        chunk_id = f"chatcmpl-{uuid.uuid4().hex[:24]}"
+        model = payload.get("model") or config.model
+        for i, piece in enumerate(chunks):
+            if i:
+                await asyncio.sleep(config.token_latency)
+            await resp.write(chunk_event(chunk_id, model, piece))
+        await resp.write(chunk_event(chunk_id, model, "", finish=True))
+        await resp.write(b"data: [DONE]\n\n")
+        await resp.write_eof()
+        return resp
+    finally:
+        stats["in_flight"] -= 1
+
+
+async def handle_stats(request: web.Request) -> web.Response:
+    return web.json_response(request.app["config"].stats)
+
+
+def create_app(config: MockConfig) -> web.Application:
+    app = web.Application()
+    app["config"] = config
+    app.router.add_get("/stats", handle_stats)
+    app.router.add_post("/{tail:.*}", handle_completion)
+    return app
+
+
+async def start_mock_server(config: MockConfig, host: str = "127.0.0.1", port: int = 0):
+    """Start in the running loop; returns (runner, base_url). Call runner.cleanup() to stop."""
+    runner = web.AppRunner(create_app(config), access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    actual_port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://{host}:{actual_port}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mock OpenAI-compatible chat endpoint for local testing.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--response-file", default=str(DEFAULT_RESPONSE_FILE), help="Reply text (default: sample_botresponse.txt)")
+    parser.add_argument("--first-token-latency", type=float, default=0.2, help="Seconds before first chunk")
+    parser.add_argument("--token-latency", type=float, default=0.01, help="Seconds between chunks")
+    parser.add_argument("--chunk-words", type=int, default=4, help="Words per streamed chunk")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="Fraction of requests failing with 429/500")
+    args = parser.parse_args()
+
+    config = MockConfig(
+        response_text=load_response_text(args.response_file),
+        first_token_latency=args.first_token_latency,
+        token_latency=args.token_latency,
+        chunk_words=args.chunk_words,
+        fail_rate=args.fail_rate,
+    )
+    print(f"Mock LLM listening on http://{args.host}:{args.port} "
+          f"({len(split_chunks(config.response_text, config.chunk_words))} chunks per reply)")
+    web.run_app(create_app(config), host=args.host, port=args.port, print=None, access_log=None)
+
+
+if __name__ == "__main__":
+    main()
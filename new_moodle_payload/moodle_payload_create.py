@@ -1,14 +1,19 @@
 #!/usr/bin/env python3
 """
 Generate HTML files with study notes and MCQ links from YAML concept files.
+Without *_concepts.yaml / *_concept.yaml in the folder, the concept view is
+read straight from the unit_XX.yaml files listed in batch.csv.
 """
 
-import yaml
 import csv
 import os
 import argparse
+import sys
 from pathlib import Path
 
+from output_sink import OutputSink
+from payload_lib import iter_unit_files, load_view
+
 
 def load_csv_mapping(csv_path):
     """Load the batch.csv file and create a mapping of filename_prefix to lesson/topic."""
@@ -53,11 +58,11 @@ def generate_html_for_concept(concept, metadata, lesson_topic, subject_snake):
     return f"<li style=\"white-space: pre;\">{all_links}</li><br><br>"
 
 
-def process_yaml_file(yaml_path, csv_mapping, output_folder):
+def process_yaml_file(yaml_path, csv_mapping, output_folder, sink):
     """Process a single YAML file and generate HTML output."""
-    # Extract filename prefix (e.g., "unit_01" from "unit_01_concepts.yaml")
+    # Extract filename prefix (e.g., "unit_01" from "unit_01_concepts.yaml" or "unit_01.yaml")
     filename = os.path.basename(yaml_path)
-    filename_prefix = filename.replace('_concepts.yaml', '').replace('_concept.yaml', '')
+    filename_prefix = filename.replace('_concepts.yaml', '').replace('_concept.yaml', '').replace('.yaml', '')
 
     # Get lesson/topic from CSV mapping
     if filename_prefix not in csv_mapping:
@@ -66,9 +71,8 @@ def process_yaml_file(yaml_path, csv_mapping, output_folder):
 
     lesson_topic = csv_mapping[filename_prefix]
 
-    # Load YAML file
-    with open(yaml_path, 'r', encoding='utf-8') as f:
-        data = yaml.safe_load(f)
+    # Load YAML file (metadata + concepts of a unit or of its exported view)
+    data = load_view(yaml_path, "concept")
 
     # Extract metadata
     metadata = data.get('metadata', {})
@@ -102,10 +106,7 @@ def process_yaml_file(yaml_path, csv_mapping, output_folder):
 
     # Save HTML file
     output_path = os.path.join(output_folder, f"{filename_prefix}_concepts.html")
-    with open(output_path, 'w', encoding='utf-8') as f:
-        f.write(html_content)
-
-    print(f"Generated: {output_path}")
+    sink.write(output_path, html_content)
 
 
 def main():
@@ -139,13 +140,21 @@ def main():
     yaml_files = list(set(yaml_files))
 
     if not yaml_files:
-        print(f"No *_concepts.yaml or *_concept.yaml files found in '{folder_path}'")
+        yaml_files = list(iter_unit_files(folder_path, csv_mapping))
+    if not yaml_files:
+        print(f"No *_concepts.yaml, *_concept.yaml or batch.csv unit files found in '{folder_path}'")
         return
 
     print(f"Found {len(yaml_files)} YAML files to process")
 
-    for yaml_file in yaml_files:
-        process_yaml_file(str(yaml_file), csv_mapping, folder_path)
+    with OutputSink(announce="Generated") as sink:
+        for yaml_file in yaml_files:
+            process_yaml_file(str(yaml_file), csv_mapping, folder_path, sink)
+    if sink.counts["unchanged"]:
+        print(f"{sink.counts['unchanged']} page(s) already up to date")
+    if sink.counts["failed"]:
+        print(f"❌ {sink.counts['failed']} page(s) could not be written")
+        sys.exit(1)
 
     print(f"\nProcessing complete! HTML files saved in '{folder_path}'")
 
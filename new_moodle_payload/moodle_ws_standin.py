@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for Moodle's REST web service endpoint
+(/webservice/rest/server.php), answering the way Moodle does:
+
+- form-encoded POST with wstoken, wsfunction, moodlewsrestformat=json
+- errors come back as HTTP 200 {"exception", "errorcode", "message"}
+- core_webservice_get_site_info lists the functions the token may call
+
+It also answers the two upload functions moodle_ws_upload.py calls and keeps
+what it received in memory, so uploads, deltas and retries can be checked
+without a Moodle site.
+
+Usage:
+  python moodle_ws_standin.py --port 8766 --token test --fail-rate 0.1
+  curl -s localhost:8766/stats
+
+Requirements:
+  pip install aiohttp
+"""
+
+import argparse
+import asyncio
+import random
+from dataclasses import dataclass, field
+from typing import Dict
+
+from aiohttp import web
+from lxml import etree as ET
+
+from moodle_ws_upload import DEFAULT_PAGE_FUNCTION, DEFAULT_QUESTION_FUNCTION, REST_PATH
+
+
+@dataclass
+class StandinConfig:
+    token: str = "test"
+    latency: float = 0.01              # seconds per call
+    fail_rate: float = 0.0             # fraction of calls answered with HTTP 503
+    page_function: str = DEFAULT_PAGE_FUNCTION
+    question_function: str = DEFAULT_QUESTION_FUNCTION
+    pages: Dict[str, Dict] = field(default_factory=dict)        # "<courseid>/<idnumber>" -> params
+    questions: Dict[str, str] = field(default_factory=dict)     # "<courseid>/<idnumber>" -> category path
+    stats: Dict[str, int] = field(default_factory=lambda: {
+        "requests": 0, "failed": 0, "errors": 0, "pages": 0, "questions": 0, "connections": 0,
+    })
+
+
+def ws_exception(errorcode: str, message: str, exception: str = "moodle_exception") -> web.Response:
+    return web.json_response({"exception": exception, "errorcode": errorcode, "message": message})
+
+
+def upsert_page(config: StandinConfig, params) -> Dict:
+    for name in ("courseid", "idnumber", "name", "content"):
+        if name not in params:
+            raise KeyError(name)
+    key = f"{params['courseid']}/{params['idnumber']}"
+    created = key not in config.pages
+    config.pages[key] = {k: params[k] for k in params if not k.startswith("ws") and k != "moodlewsrestformat"}
+    config.stats["pages"] += 1
+    return {"cmid": list(config.pages).index(key) + 1, "created": created}
+
+
+def import_questions(config: StandinConfig, params) -> Dict:
+    for name in ("courseid", "categorypath", "questionxml"):
+        if name not in params:
+            raise KeyError(name)
+    root = ET.fromstring(params["questionxml"].encode("utf-8"))
+    imported = 0
+    for q in root.iter("question"):
+        if q.get("type") == "category":
+            continue
+        idnumber = (q.findtext("idnumber") or "").strip()
+        if not idnumber:
+            raise ValueError("question without idnumber")
+        config.questions[f"{params['courseid']}/{idnumber}"] = params["categorypath"]
+        imported += 1
+    config.stats["questions"] += imported
+    return {"imported": imported, "categorypath": params["categorypath"]}
+
+
+async def handle_rest(request: web.Request) -> web.Response:
+    config: StandinConfig = request.app["config"]
+    stats = config.stats
+    stats["requests"] += 1
+    transports = request.app["transports"]
+    if id(request.transport) not in transports:
+        transports.add(id(request.transport))
+        stats["connections"] += 1
+
+    params = await request.post()
+    await asyncio.sleep(config.latency)
+    if config.fail_rate and random.random() < config.fail_rate:
+        stats["failed"] += 1
+        return web.Response(status=503, text="Service Unavailable")
+
+    if params.get("wstoken") != config.token:
+        stats["errors"] += 1
+        return ws_exception("invalidtoken", "Invalid token - token not found")
+
+    function = params.get("wsfunction", "")
+    try:
+        if function == "core_webservice_get_site_info":
+            return web.json_response({
+                "sitename": "Stand-in Moodle", "username": "wsuser", "release": "4.3 (Build: 20231009)",
+                "functions": [{"name": name, "version": "2023100900"} for name in
+                              ("core_webservice_get_site_info", config.page_function, config.question_function)],
+            })
+        if function == config.page_function:
+            return web.json_response(upsert_page(config, params))
+        if function == config.question_function:
+            return web.json_response(import_questions(config, params))
+    except KeyError as e:
+        stats["errors"] += 1
+        return ws_exception("invalidparameter", f"Invalid parameter value detected (Missing required key: {e.args[0]})",
+                            "invalid_parameter_exception")
+    except (ValueError, ET.XMLSyntaxError) as e:
+        stats["errors"] += 1
+        return ws_exception("cannotimport", f"Error importing questions: {e}")
+
+    stats["errors"] += 1
+    return ws_exception("invalidrecord", "Can't find data record in database table external_functions.",
+                        "dml_missing_record_exception")
+
+
+async def handle_stats(request: web.Request) -> web.Response:
+    config: StandinConfig = request.app["config"]
+    return web.json_response(dict(config.stats, stored_pages=len(config.pages), stored_questions=len(config.questions)))
+
+
+def create_app(config: StandinConfig) -> web.Application:
+    app = web.Application()
+    app["config"] = config
+    app["transports"] = set()
+    app.router.add_get("/stats", handle_stats)
+    app.router.add_post(REST_PATH, handle_rest)
+    return app
+
+
+async def start_standin(config: StandinConfig, host: str = "127.0.0.1", port: int = 0):
+    """Start in the running loop; returns (runner, wwwroot). Call runner.cleanup() to stop."""
+    runner = web.AppRunner(create_app(config), access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    actual_port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://{host}:{actual_port}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stand-in Moodle REST web service for upload tests.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--token", default="test", help="Accepted wstoken")
+    parser.add_argument("--latency", type=float, default=0.01, help="Seconds per call")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="Fraction of calls failing with HTTP 503")
+    args = parser.parse_args()
+
+    config = StandinConfig(token=args.token, latency=args.latency, fail_rate=args.fail_rate)
+    print(f"Stand-in Moodle web service at http://{args.host}:{args.port}{REST_PATH}")
+    web.run_app(create_app(config), host=args.host, port=args.port, print=None, access_log=None)
+
+
+if __name__ == "__main__":
+    main()
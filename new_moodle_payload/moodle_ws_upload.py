@@ -0,0 +1,362 @@
+#!/usr/bin/env python3
+"""
+Push a payload folder's generated pages and its MCQ banks to a course
+through Moodle's REST web services, sending only what changed.
+
+- one page per batch.csv unit (<prefix>_learning.html / _concepts.html)
+- question banks (<level>_NN.xml) in chunks of --chunk-size questions,
+  category path "Unit NN: <topic>/<Level>"
+
+A state file keeps the sha256 of every page and question last accepted per
+site+course (the stand-in counts as one site, whatever port it gets);
+unchanged items are not sent again. Calls share one keep-alive
+connection pool with --concurrency in flight, and 5xx/network errors are
+retried with backoff. Moodle-level errors (HTTP 200 with "exception") are
+reported and not retried.
+
+Moodle core has no web service that writes page content or imports Moodle
+XML, and moodle-local-ai_functions does not define one either, so a real
+upload needs a plugin on the site that provides both and names them with
+--page-function and --question-function (enabled for the token's service).
+The stand-in answers to DEFAULT_PAGE_FUNCTION / DEFAULT_QUESTION_FUNCTION
+unless told otherwise. Their parameters:
+  page:      courseid, section, idnumber, name, content, contentformat
+  questions: courseid, categorypath, format=xml, questionxml
+
+Usage:
+  python moodle_ws_upload.py --url https://moodle.example.org --token $MOODLE_WS_TOKEN --courseid 12 \\
+      --page-function local_mysite_upsert_page --question-function local_mysite_import_questions \\
+      --folder GATE-Chemistry/6-months-moodle-payload/inorganic_chemistry --mcq GATE-Chemistry/MCQ/inorganic
+  python moodle_ws_upload.py --standin --courseid 2 --folder ... --mcq ...   # local stand-in server
+  python moodle_ws_upload.py ... --dry-run                                   # list what would be sent
+
+Requirements:
+  pip install aiohttp lxml pyyaml
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import random
+import sys
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List
+
+import aiohttp
+from lxml import etree as ET
+
+from build_mbz import BANK_RE, load_units
+from payload_lib import LEVELS, PLAN_PROFILES, plan_for_folder
+
+
+REST_PATH = "/webservice/rest/server.php"
+# Names the stand-in answers to; a real site supplies its own (see the module docstring).
+DEFAULT_PAGE_FUNCTION = "local_ai_functions_upsert_page"
+DEFAULT_QUESTION_FUNCTION = "local_ai_functions_import_questions"
+STANDIN_TARGET = "standin"
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+STATE_VERSION = 1
+
+
+class WebServiceError(Exception):
+    def __init__(self, message: str, retryable: bool):
+        super().__init__(message)
+        self.retryable = retryable
+
+
+@dataclass
+class UploadItem:
+    kind: str                   # "page" | "questions"
+    label: str
+    params: Dict[str, str]
+    hashes: Dict[str, str]      # state keys settled by this call
+
+
+@dataclass
+class Stats:
+    total: int = 0
+    unchanged: int = 0
+    ok: int = 0
+    failed: int = 0
+    retries: int = 0
+    started: float = field(default_factory=time.monotonic)
+
+    def line(self) -> str:
+        elapsed = time.monotonic() - self.started
+        return (f"{self.ok + self.failed}/{self.total} calls (ok {self.ok}, failed {self.failed}, "
+                f"retries {self.retries}) in {elapsed:.1f}s")
+
+
+def sha256(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+# -------------------- State --------------------
+class UploadState:
+    """{"version", "targets": {"<url or 'standin'>#<courseid>": {"<key>": "<sha256>"}}}, saved atomically."""
+
+    def __init__(self, path: Path, target: str):
+        self.path = Path(path)
+        self.target = target
+        self.data = {"version": STATE_VERSION, "targets": {}}
+        if self.path.exists():
+            try:
+                loaded = json.loads(self.path.read_text(encoding="utf-8"))
+                if loaded.get("version") == STATE_VERSION:
+                    self.data = loaded
+            except ValueError:
+                print(f"⚠ WARNING: unreadable state file {self.path}; sending everything")
+        self.hashes: Dict[str, str] = self.data["targets"].setdefault(target, {})
+
+    def unchanged(self, key: str, digest: str) -> bool:
+        return self.hashes.get(key) == digest
+
+    def settle(self, hashes: Dict[str, str]) -> None:
+        self.hashes.update(hashes)
+
+    def save(self) -> None:
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        tmp.write_text(json.dumps(self.data, ensure_ascii=False, indent=1, sort_keys=True), encoding="utf-8")
+        tmp.replace(self.path)
+
+
+# -------------------- Items --------------------
+def page_items(folder: Path, plan: str, courseid: int, state: UploadState, stats: Stats,
+               page_function: str) -> List[UploadItem]:
+    items = []
+    for unit in load_units(folder, plan):
+        params = {
+            "wsfunction": page_function, "courseid": str(courseid), "section": str(unit.number),
+            "idnumber": unit.prefix, "name": unit.topic, "content": unit.html, "contentformat": "1",
+        }
+        key = f"page:{unit.prefix}"
+        digest = sha256(json.dumps(params, sort_keys=True, ensure_ascii=False))
+        if state.unchanged(key, digest):
+            stats.unchanged += 1
+            continue
+        items.append(UploadItem("page", f"{unit.prefix} {unit.topic}", params, {key: digest}))
+    return items
+
+
+def question_items(mcq_dir: Path, topics: Dict[int, str], courseid: int, chunk_size: int,
+                   state: UploadState, stats: Stats, question_function: str) -> List[UploadItem]:
+    items = []
+    banks = sorted((int(m.group(2)), LEVELS.index(m.group(1)), p)
+                   for p in mcq_dir.glob("*.xml") for m in [BANK_RE.match(p.stem)] if m)
+    for unit_no, level_idx, path in banks:
+        unit_label = f"Unit {unit_no:02d}: {topics[unit_no]}" if unit_no in topics else f"Unit {unit_no:02d}"
+        category = f"{unit_label}/{LEVELS[level_idx].capitalize()}"
+        root = ET.parse(str(path), ET.XMLParser(strip_cdata=False, resolve_entities=False)).getroot()
+        changed = []
+        position = 0
+        for q in root.iter("question"):
+            if q.get("type") == "category":
+                continue
+            position += 1
+            idnumber = (q.findtext("idnumber") or "").strip()
+            if not idnumber:
+                # Banks converted before idnumbers existed: "<bank>-qNNN" by position, the shape
+                # convert_txt_moodle_xml.py writes; inserting or removing a question shifts the rest.
+                idnumber = f"{path.stem}-q{position:03d}"
+                ET.SubElement(q, "idnumber").text = idnumber
+            xml = ET.tostring(q, encoding="unicode")
+            key = f"question:{idnumber}"
+            digest = sha256(category + "\n" + xml)
+            if state.unchanged(key, digest):
+                stats.unchanged += 1
+                continue
+            changed.append((key, digest, xml))
+        for start in range(0, len(changed), chunk_size):
+            chunk = changed[start:start + chunk_size]
+            quiz = "<?xml version=\"1.0\" encoding=\"UTF-8\"?>\n<quiz>\n" + "\n".join(x for _, _, x in chunk) + "\n</quiz>\n"
+            params = {"wsfunction": question_function, "courseid": str(courseid),
+                      "categorypath": category, "format": "xml", "questionxml": quiz}
+            label = f"{path.name} [{start + 1}-{start + len(chunk)}]"
+            items.append(UploadItem("questions", label, params, {k: d for k, d, _ in chunk}))
+    return items
+
+
+# -------------------- Calls --------------------
+async def call_ws(session: aiohttp.ClientSession, url: str, token: str, params: Dict[str, str]):
+    data = dict(params, wstoken=token, moodlewsrestformat="json")
+    try:
+        async with session.post(url, data=data) as resp:
+            if resp.status != 200:
+                text = (await resp.text())[:200]
+                raise WebServiceError(f"HTTP {resp.status}: {text}", resp.status in RETRY_STATUSES)
+            body = await resp.json(content_type=None)
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        raise WebServiceError(f"{type(e).__name__}: {e}", True)
+    except ValueError as e:
+        raise WebServiceError(f"non-JSON reply: {e}", False)
+    if isinstance(body, dict) and "exception" in body:
+        raise WebServiceError(f"{body.get('errorcode')}: {body.get('message')}", False)
+    return body
+
+
+async def call_with_retry(session, url: str, args, params: Dict[str, str], stats: Stats):
+    attempt = 0
+    while True:
+        attempt += 1
+        try:
+            return await call_ws(session, url, args.token, params)
+        except WebServiceError as e:
+            if not e.retryable or attempt > args.retries:
+                raise
+            stats.retries += 1
+            await asyncio.sleep(args.backoff * (2 ** (attempt - 1)) * (0.5 + random.random()))
+
+
+async def upload_one(item: UploadItem, session, url: str, args, state: UploadState, stats: Stats) -> None:
+    try:
+        await call_with_retry(session, url, args, item.params, stats)
+    except WebServiceError as e:
+        stats.failed += 1
+        print(f"❌ {item.label}: {e}")
+        return
+    state.settle(item.hashes)
+    stats.ok += 1
+
+
+async def check_functions(session, url: str, args, wanted: List[str], stats: Stats) -> bool:
+    try:
+        info = await call_with_retry(session, url, args, {"wsfunction": "core_webservice_get_site_info"}, stats)
+    except WebServiceError as e:
+        print(f"❌ core_webservice_get_site_info failed: {e}")
+        return False
+    available = {f.get("name") for f in info.get("functions", [])}
+    missing = [f for f in wanted if f not in available]
+    print(f"Connected to '{info.get('sitename')}' as {info.get('username')} (Moodle {info.get('release')})")
+    for name in missing:
+        print(f"❌ {name} is not enabled for this token's service")
+    return not missing
+
+
+async def run(args) -> int:
+    standin_runner = None
+    if args.standin:
+        from moodle_ws_standin import StandinConfig, start_standin
+        args.page_function = args.page_function or DEFAULT_PAGE_FUNCTION
+        args.question_function = args.question_function or DEFAULT_QUESTION_FUNCTION
+        standin_runner, args.url = await start_standin(StandinConfig(
+            token=args.token or "test", fail_rate=args.standin_fail_rate,
+            page_function=args.page_function, question_function=args.question_function))
+        args.token = args.token or "test"
+        print(f"Stand-in web service at {args.url}{REST_PATH}")
+    if not args.url or not args.token:
+        print("Error: give --url and --token (or $MOODLE_WS_TOKEN), or --standin")
+        return 1
+    if not args.page_function or (args.mcq and not args.question_function):
+        print("Error: give --page-function (and --question-function with --mcq): the wsfunctions your site "
+              "provides for writing pages and importing questions")
+        return 1
+
+    url = args.url.rstrip("/") + REST_PATH
+    folder = Path(args.folder)
+    plan = args.plan or plan_for_folder(folder)
+    target = STANDIN_TARGET if args.standin else args.url.rstrip("/")
+    state = UploadState(Path(args.state) if args.state else folder / ".ws_upload_state.json",
+                        f"{target}#{args.courseid}")
+    if args.force:
+        state.hashes.clear()
+
+    stats = Stats()
+    items = page_items(folder, plan, args.courseid, state, stats, args.page_function)
+    if args.mcq:
+        topics = {int(u.prefix.rsplit("_", 1)[-1]): u.topic
+                  for u in load_units(folder, plan) if u.prefix.rsplit("_", 1)[-1].isdigit()}
+        items += question_items(Path(args.mcq), topics, args.courseid, args.chunk_size, state, stats,
+                                args.question_function)
+    stats.total = len(items)
+    print(f"{stats.unchanged} item(s) unchanged, {stats.total} call(s) to send")
+
+    if args.dry_run:
+        for item in items:
+            print(f"  {item.kind:9s} {item.label}")
+        if standin_runner is not None:
+            await standin_runner.cleanup()
+        return 0
+
+    connector = aiohttp.TCPConnector(limit=args.concurrency, keepalive_timeout=60)
+    timeout = aiohttp.ClientTimeout(total=args.timeout)
+    queue: asyncio.Queue = asyncio.Queue()
+    for item in items:
+        queue.put_nowait(item)
+    last_save = time.monotonic()
+
+    async def worker(session):
+        nonlocal last_save
+        while True:
+            try:
+                item = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            await upload_one(item, session, url, args, state, stats)
+            if time.monotonic() - last_save > 5:
+                state.save()
+                last_save = time.monotonic()
+            if (stats.ok + stats.failed) % args.progress_every == 0:
+                print(stats.line())
+
+    try:
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+            if items and not await check_functions(session, url, args,
+                                                   sorted({i.params["wsfunction"] for i in items}), stats):
+                return 1
+            workers = [asyncio.create_task(worker(session)) for _ in range(min(len(items), args.concurrency))]
+            await asyncio.gather(*workers)
+    finally:
+        state.save()
+        if standin_runner is not None:
+            config = standin_runner.app["config"]
+            print(f"Stand-in: {json.dumps(config.stats)}")
+            await standin_runner.cleanup()
+
+    print(stats.line())
+    print(f"✓ State: {state.path}")
+    if stats.failed:
+        print(f"⚠ {stats.failed} call(s) failed; rerun to send the remaining changes")
+    return 1 if stats.failed else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Upload pages and question banks via Moodle web services.")
+    parser.add_argument("--url", help="Moodle wwwroot, e.g. https://moodle.example.org")
+    parser.add_argument("--token", default=os.environ.get("MOODLE_WS_TOKEN", ""), help="wstoken (default: $MOODLE_WS_TOKEN)")
+    parser.add_argument("--courseid", type=int, required=True, help="Target course id")
+    parser.add_argument("--folder", required=True, help="Payload folder with batch.csv and generated HTML")
+    parser.add_argument("--mcq", help="Folder with <level>_NN.xml question banks (optional)")
+    parser.add_argument("--plan", choices=sorted(PLAN_PROFILES), help="Default: from the folder name")
+    parser.add_argument("--state", help="State file (default: <folder>/.ws_upload_state.json)")
+    parser.add_argument("--page-function", help="wsfunction that creates/updates a page (required unless --standin)")
+    parser.add_argument("--question-function", help="wsfunction that imports Moodle XML (required with --mcq unless --standin)")
+    parser.add_argument("--chunk-size", type=int, default=50, help="Questions per import call")
+    parser.add_argument("--concurrency", type=int, default=4, help="Calls in flight (pooled keep-alive connections)")
+    parser.add_argument("--retries", type=int, default=4, help="Retries per call on 5xx/network errors")
+    parser.add_argument("--backoff", type=float, default=1.0, help="First backoff delay in seconds")
+    parser.add_argument("--timeout", type=float, default=120.0, help="Per-call timeout in seconds")
+    parser.add_argument("--progress-every", type=int, default=25, help="Print progress every N calls")
+    parser.add_argument("--force", action="store_true", help="Ignore the state file and send everything")
+    parser.add_argument("--dry-run", action="store_true", help="List the calls that would be sent")
+    parser.add_argument("--standin", action="store_true", help="Upload to a local stand-in server (moodle_ws_standin.py)")
+    parser.add_argument("--standin-fail-rate", type=float, default=0.0, help="Stand-in HTTP 503 rate, for retry tests")
+    args = parser.parse_args()
+
+    if not (Path(args.folder) / "batch.csv").exists():
+        print(f"Error: '{args.folder}' has no batch.csv")
+        sys.exit(1)
+    if args.mcq and not Path(args.mcq).is_dir():
+        print(f"Error: MCQ folder '{args.mcq}' does not exist")
+        sys.exit(1)
+    if (args.plan or plan_for_folder(args.folder)) not in PLAN_PROFILES:
+        print(f"Error: cannot tell the plan from '{args.folder}'; pass --plan")
+        sys.exit(1)
+    sys.exit(asyncio.run(run(args)))
+
+
+if __name__ == "__main__":
+    main()
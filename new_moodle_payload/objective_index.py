@@ -0,0 +1,414 @@
+#!/usr/bin/env python3
+"""
+Near-duplicate index over the syllabus strings that drive generation:
+learning_objectives, section headings (section_heading / section_title) and
+concept clarifiers, across every exam and plan. CSIR and GATE plans phrase the
+same content differently ("Crystal field splitting in octahedral complexes"
+vs "Crystal-field splitting of octahedral complexes"), so each spelling
+triggers its own notes and MCQs; the index finds the equivalent spellings so
+one generation can be shared.
+
+Vectors: character 3- and 4-grams of the normalized text (NFKD, lower case,
+punctuation -> space), hashed into DIM features, sublinear tf x idf, L2
+normalized. Approximate nearest neighbours: random-hyperplane LSH (SimHash);
+BITS sign bits per string split into bands of BAND bits, one hash table per
+band. Candidates that share any band bucket are re-scored with the exact
+cosine, so results are exact above --min-sim and only recall is approximate.
+Everything is local NumPy/SciPy; building over the whole corpus takes seconds.
+
+A string is indexed once however often it occurs; its occurrences (unit
+path, kind, lesson key "subject/topic") travel with it.
+
+Usage:
+  python objective_index.py build --root .. --out objective_index.npz
+  python objective_index.py query --index objective_index.npz --text "Crystal field splitting in octahedral complexes"
+  python objective_index.py groups --index objective_index.npz --min-sim 0.8 --out objective_groups.json
+
+groups writes candidate groups of differently spelled strings that span more
+than one unit (identical strings already share a cache key). Each group is
+centered on a canonical member (the most frequent spelling still unclaimed)
+and admits only strings within --min-sim of it, recorded as "similarity".
+Character n-grams cannot tell "Primary Kinetic Isotope Effects" from
+"Primary and Secondary Kinetic Isotope Effects", so a member must also carry
+the same content words as the canonical text (spelling and plural variants
+aside), and a string that only occurs as a section heading joins a group only
+within its own lesson: "Definition and General Characteristics" means a
+different thing in every unit. The groups are advisory -- review a member
+before mapping its notes or MCQs onto the canonical text.
+
+Requirements:
+  pip install pyyaml numpy scipy
+"""
+
+import argparse
+import hashlib
+import io
+import json
+import re
+import sys
+import time
+import unicodedata
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import scipy.sparse as sp
+
+from concept_graph import exam_of, iter_lesson_units, lesson_key
+from output_sink import write_atomic
+from payload_lib import plan_for_folder
+from unit_model import Unit, load_unit_model
+
+
+HERE = Path(__file__).resolve().parent
+DEFAULT_ROOT = HERE.parent
+KINDS = ("objective", "section", "clarifier")
+NGRAMS = (3, 4)
+DIM = 1 << 20
+BITS = 256
+BAND = 12
+SEED = 20241019
+MAX_BUCKET = 500        # buckets larger than this hold generic strings; skipped when pairing
+NON_ALNUM_RE = re.compile(r"[^a-z0-9]+")
+# Words that do not change what a string is about; objective verbs included so
+# "Explain nuclear spin" still matches the heading "Nuclear Spin".
+FILLER_WORDS = frozenset("""
+    a an and the of in on for to with by from at as into via vs versus its their using based
+    understand explain describe define apply identify learn analyze analyse compare predict
+    construct calculate determine distinguish interpret evaluate discuss recognize
+""".split())
+
+
+# -------------------- Vectors --------------------
+def normalize(text: str) -> str:
+    text = unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode("ascii").lower()
+    return " ".join(NON_ALNUM_RE.sub(" ", text).split())
+
+
+def _feature(gram: str, _cache: Dict[str, int] = {}) -> int:
+    feature = _cache.get(gram)
+    if feature is None:
+        digest = hashlib.blake2b(gram.encode("utf-8"), digest_size=8).digest()
+        feature = _cache[gram] = int.from_bytes(digest, "little") % DIM
+    return feature
+
+
+def features(text: str) -> Counter:
+    padded = f" {normalize(text)} "
+    return Counter(_feature(padded[i:i + n]) for n in NGRAMS for i in range(len(padded) - n + 1))
+
+
+def hyperplanes(seed: int = SEED) -> np.ndarray:
+    """±1 hyperplane coordinates per feature, packed: (DIM, BITS // 8) uint8."""
+    return np.random.default_rng(seed).integers(0, 256, size=(DIM, BITS // 8), dtype=np.uint8)
+
+
+def vectorize(counts: List[Counter], idf: np.ndarray) -> sp.csr_matrix:
+    indptr, indices, data = [0], [], []
+    for c in counts:
+        indices.extend(c.keys())
+        data.extend(c.values())
+        indptr.append(len(indices))
+    m = sp.csr_matrix((np.asarray(data, dtype=np.float32), np.asarray(indices, dtype=np.int64),
+                       np.asarray(indptr, dtype=np.int64)), shape=(len(counts), DIM))
+    m.sum_duplicates()
+    m.data = (1 + np.log(m.data)) * idf[m.indices]
+    norms = np.sqrt(np.asarray(m.multiply(m).sum(axis=1)).ravel())
+    norms[norms == 0] = 1
+    return sp.csr_matrix(sp.diags(1 / norms) @ m)
+
+
+def signatures(vectors: sp.csr_matrix, planes: np.ndarray) -> np.ndarray:
+    """SimHash bits (n, BITS) bool: sign of the projection on each hyperplane."""
+    out = np.zeros((vectors.shape[0], BITS), dtype=bool)
+    for row in range(vectors.shape[0]):
+        lo, hi = vectors.indptr[row], vectors.indptr[row + 1]
+        signs = np.unpackbits(planes[vectors.indices[lo:hi]], axis=1).astype(np.float32) * 2 - 1
+        out[row] = vectors.data[lo:hi] @ signs > 0
+    return out
+
+
+def band_keys(bits: np.ndarray) -> np.ndarray:
+    """(n, BITS // BAND) int64 bucket keys, one per band."""
+    n_bands = BITS // BAND
+    weights = 1 << np.arange(BAND, dtype=np.int64)
+    return bits[:, :n_bands * BAND].reshape(len(bits), n_bands, BAND).astype(np.int64) @ weights
+
+
+def content_words(text: str) -> List[str]:
+    # Comparison signs carry meaning ("pH < 7" vs "pH = 7") but normalize() drops them.
+    for sign, word in (("<", " lt "), (">", " gt "), ("=", " eq ")):
+        text = text.replace(sign, word)
+    return [w for w in normalize(text).split() if w not in FILLER_WORDS]
+
+
+def _same_word(a: str, b: str) -> bool:
+    if a == b or a.rstrip("s") == b.rstrip("s"):
+        return True
+    short, long = sorted((a, b), key=len)
+    return len(short) >= 5 and long.startswith(short) and len(long) - len(short) <= 3
+
+
+def same_terms(a: str, b: str) -> bool:
+    """Every content word of each string has a counterpart in the other."""
+    wa, wb = content_words(a), content_words(b)
+    return (all(any(_same_word(x, y) for y in wb) for x in wa)
+            and all(any(_same_word(y, x) for x in wa) for y in wb))
+
+
+# -------------------- Corpus --------------------
+def iter_strings(unit: Unit) -> Iterator[Tuple[str, str]]:
+    """(kind, text) for every indexed string of a unit."""
+    for item in unit.learning_path:
+        for objective in item.learning_objectives:
+            yield "objective", objective
+        for lesson in item.lessons:
+            for sec in lesson.sections:
+                yield "section", sec.heading
+    for concept in unit.concepts:
+        yield "clarifier", concept.clarifier
+
+
+def collect(root: Path, kinds: Tuple[str, ...]) -> Tuple[List[str], List[List], Dict]:
+    """Unique texts, their occurrences [unit id, kind id, lesson id], and the id tables."""
+    tables = {"units": [], "kinds": list(KINDS), "lessons": []}
+    unit_ids: Dict[str, int] = {}
+    lesson_ids: Dict[str, int] = {}
+    text_ids: Dict[str, int] = {}
+    texts: List[str] = []
+    occurrences: List[List] = []
+    for path, topic in iter_lesson_units(root):
+        unit = load_unit_model(path)
+        rel = path.resolve().relative_to(root.resolve()).as_posix()
+        uid = unit_ids.setdefault(rel, len(unit_ids))
+        if uid == len(tables["units"]):
+            tables["units"].append({"path": rel, "exam": exam_of(path, root), "plan": plan_for_folder(path.parent) or ""})
+        key = lesson_key(unit, topic)[0]
+        lid = lesson_ids.setdefault(key, len(lesson_ids))
+        if lid == len(tables["lessons"]):
+            tables["lessons"].append(key)
+        seen = set()
+        for kind, text in iter_strings(unit):
+            text = " ".join(text.split())
+            if kind not in kinds or not normalize(text) or (kind, text) in seen:
+                continue
+            seen.add((kind, text))
+            tid = text_ids.get(text)
+            if tid is None:
+                tid = text_ids[text] = len(texts)
+                texts.append(text)
+                occurrences.append([])
+            occurrences[tid].append([uid, KINDS.index(kind), lid])
+    return texts, occurrences, tables
+
+
+# -------------------- Index --------------------
+class ObjectiveIndex:
+    def __init__(self, texts: List[str], occurrences: List[List], tables: Dict, idf: np.ndarray,
+                 vectors: sp.csr_matrix, bits: Optional[np.ndarray] = None):
+        self.texts = texts
+        self.occurrences = occurrences
+        self.tables = tables
+        self.idf = idf
+        self.vectors = vectors
+        self.planes = hyperplanes()
+        self.bits = signatures(vectors, self.planes) if bits is None else bits
+        self.keys = band_keys(self.bits)
+        self.buckets: List[Dict[int, np.ndarray]] = []
+        for band in range(self.keys.shape[1]):
+            grouped = defaultdict(list)
+            for row, key in enumerate(self.keys[:, band].tolist()):
+                grouped[key].append(row)
+            self.buckets.append({k: np.asarray(v, dtype=np.int64) for k, v in grouped.items()})
+
+    @classmethod
+    def build(cls, root: Path, kinds: Tuple[str, ...] = KINDS) -> "ObjectiveIndex":
+        texts, occurrences, tables = collect(root, kinds)
+        counts = [features(t) for t in texts]
+        df = np.zeros(DIM, dtype=np.float32)
+        for c in counts:
+            df[list(c)] += 1
+        idf = (np.log((1 + len(texts)) / (1 + df)) + 1).astype(np.float32)
+        return cls(texts, occurrences, tables, idf, vectorize(counts, idf))
+
+    def save(self, path) -> None:
+        meta = {"version": 1, "dim": DIM, "ngrams": NGRAMS, "bits": BITS, "band": BAND, "seed": SEED,
+                "texts": self.texts, "occurrences": self.occurrences, **self.tables}
+        buf = io.BytesIO()
+        v = self.vectors
+        np.savez_compressed(buf, indptr=v.indptr, indices=v.indices, data=v.data, idf=self.idf,
+                            bits=np.packbits(self.bits, axis=1),
+                            meta=np.frombuffer(json.dumps(meta, ensure_ascii=False).encode("utf-8"), dtype=np.uint8))
+        write_atomic(path, buf.getvalue())
+
+    @classmethod
+    def load(cls, path) -> "ObjectiveIndex":
+        with np.load(path) as npz:
+            meta = json.loads(npz["meta"].tobytes().decode("utf-8"))
+            if (meta["dim"], tuple(meta["ngrams"]), meta["bits"], meta["band"], meta["seed"]) != (DIM, NGRAMS, BITS, BAND, SEED):
+                raise ValueError(f"{path} was built with other vector settings; rebuild it")
+            texts = meta["texts"]
+            vectors = sp.csr_matrix((npz["data"], npz["indices"], npz["indptr"]), shape=(len(texts), DIM))
+            bits = np.unpackbits(npz["bits"], axis=1)[:, :BITS].astype(bool)
+            idf = npz["idf"]
+        tables = {k: meta[k] for k in ("units", "kinds", "lessons")}
+        return cls(texts, meta["occurrences"], tables, idf, vectors, bits)
+
+    def candidates(self, keys: np.ndarray) -> np.ndarray:
+        found = [self.buckets[band].get(int(key)) for band, key in enumerate(keys)]
+        found = [f for f in found if f is not None]
+        return np.unique(np.concatenate(found)) if found else np.zeros(0, dtype=np.int64)
+
+    def query(self, text: str, top_k: int = 10, min_sim: float = 0.8) -> List[Tuple[int, float]]:
+        """(text id, cosine) of indexed strings equivalent to text, best first."""
+        vector = vectorize([features(text)], self.idf)
+        if not vector.nnz:
+            return []
+        rows = self.candidates(band_keys(signatures(vector, self.planes))[0])
+        if not len(rows):
+            return []
+        sims = np.asarray((self.vectors[rows] @ vector.T).todense()).ravel()
+        keep = np.flatnonzero(sims >= min_sim)
+        order = keep[np.argsort(-sims[keep], kind="stable")][:top_k]
+        return [(int(rows[i]), float(sims[i])) for i in order]
+
+    def pairs(self, min_sim: float) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Every (i, j, cosine) with i < j sharing a bucket and cosine >= min_sim."""
+        left, right = [], []
+        for band in range(self.keys.shape[1]):
+            order = np.argsort(self.keys[:, band], kind="stable")
+            ranked = self.keys[order, band]
+            sizes = np.diff(np.r_[0, np.flatnonzero(np.diff(ranked)) + 1, len(ranked)])
+            small = np.repeat(sizes, sizes) <= MAX_BUCKET
+            for shift in range(1, min(int(sizes.max()), MAX_BUCKET)):
+                same = (ranked[shift:] == ranked[:-shift]) & small[shift:]
+                a, b = order[:-shift][same], order[shift:][same]
+                left.append(np.minimum(a, b))
+                right.append(np.maximum(a, b))
+        if not left:
+            empty = np.zeros(0, dtype=np.int64)
+            return empty, empty, np.zeros(0, dtype=np.float32)
+        pair_ids = np.unique(np.concatenate(left) * len(self.texts) + np.concatenate(right))
+        i, j = pair_ids // len(self.texts), pair_ids % len(self.texts)
+        sims = np.zeros(len(i), dtype=np.float32)
+        for start in range(0, len(i), 200_000):
+            stop = start + 200_000
+            sims[start:stop] = np.asarray(
+                self.vectors[i[start:stop]].multiply(self.vectors[j[start:stop]]).sum(axis=1)).ravel()
+        keep = sims >= min_sim
+        return i[keep], j[keep], sims[keep]
+
+    def describe(self, tid: int) -> List[str]:
+        units, kinds, lessons = self.tables["units"], self.tables["kinds"], self.tables["lessons"]
+        return [f"{kinds[k]:<9} {units[u]['path']}  ({lessons[l]})" for u, k, l in self.occurrences[tid]]
+
+
+# -------------------- Groups --------------------
+def groups(index: ObjectiveIndex, min_sim: float) -> List[Dict]:
+    """
+    Candidate groups of two or more spellings spanning two or more units,
+    largest first. Center-based, not transitive: the most frequent unclaimed
+    string takes every unclaimed neighbour with cosine >= min_sim to it, so
+    A~B~C chains cannot pull in a C that is far from A. A pair is a neighbour
+    only if both strings carry the same content words, and a string used only
+    as a section heading pairs only with strings from one of its lessons.
+    """
+    section = KINDS.index("section")
+    lessons = [{occ[2] for occ in occs} for occs in index.occurrences]
+    heading_only = [all(occ[1] == section for occ in occs) for occs in index.occurrences]
+
+    i, j, sims = index.pairs(min_sim)
+    neighbours: Dict[int, Dict[int, float]] = defaultdict(dict)
+    for a, b, sim in zip(i.tolist(), j.tolist(), sims.tolist()):
+        if (heading_only[a] or heading_only[b]) and not lessons[a] & lessons[b]:
+            continue
+        if not same_terms(index.texts[a], index.texts[b]):
+            continue
+        neighbours[a][b] = neighbours[b][a] = sim
+
+    claimed = set()
+    members: Dict[int, Dict[int, float]] = {}
+    for center in sorted(neighbours, key=lambda t: (-len(index.occurrences[t]), t)):
+        if center in claimed:
+            continue
+        group = {t: sim for t, sim in neighbours[center].items() if t not in claimed}
+        if not group:
+            continue
+        group[center] = 1.0
+        claimed.update(group)
+        members[center] = group
+
+    out = []
+    units = index.tables["units"]
+    for canonical, group in members.items():
+        unit_ids = {occ[0] for t in group for occ in index.occurrences[t]}
+        if len(unit_ids) < 2:
+            continue
+        out.append({
+            "canonical": index.texts[canonical],
+            "units": len(unit_ids),
+            "exams": sorted({units[u]["exam"] for u in unit_ids}),
+            "members": [{"text": index.texts[t], "count": len(index.occurrences[t]), "similarity": round(sim, 4)}
+                        for t, sim in sorted(group.items())],
+        })
+    out.sort(key=lambda g: (-g["units"], g["canonical"]))
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or query the near-duplicate objective index.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    b = sub.add_parser("build", help="Scan the corpus and write the index")
+    b.add_argument("--root", default=str(DEFAULT_ROOT), help="Corpus root")
+    b.add_argument("--out", default="objective_index.npz", help="Index file")
+    b.add_argument("--kinds", default=",".join(KINDS), help="Comma list of string kinds to index")
+    q = sub.add_parser("query", help="Equivalent strings of one objective / heading")
+    q.add_argument("--index", default="objective_index.npz")
+    q.add_argument("--text", required=True)
+    q.add_argument("--top-k", type=int, default=10)
+    q.add_argument("--min-sim", type=float, default=0.8, help="Cosine of char n-gram vectors")
+    g = sub.add_parser("groups", help="Write candidate groups of equivalent strings across units (review before use)")
+    g.add_argument("--index", default="objective_index.npz")
+    g.add_argument("--min-sim", type=float, default=0.8)
+    g.add_argument("--out", default="objective_groups.json")
+    args = parser.parse_args()
+
+    started = time.monotonic()
+    if args.command == "build":
+        kinds = tuple(k.strip() for k in args.kinds.split(",") if k.strip())
+        unknown = [k for k in kinds if k not in KINDS]
+        if unknown:
+            print(f"Error: unknown kind(s) {', '.join(unknown)}; known: {', '.join(KINDS)}")
+            sys.exit(1)
+        index = ObjectiveIndex.build(Path(args.root), kinds)
+        index.save(args.out)
+        n_occ = sum(len(o) for o in index.occurrences)
+        print(f"✓ {len(index.texts)} distinct strings ({n_occ} occurrences in {len(index.tables['units'])} units), "
+              f"{len(index.buckets)} LSH tables -> {args.out} in {time.monotonic() - started:.1f}s")
+        return
+
+    if not Path(args.index).exists():
+        print(f"❌ index '{args.index}' not found; run: python objective_index.py build --out {args.index}")
+        sys.exit(1)
+    index = ObjectiveIndex.load(args.index)
+    if args.command == "query":
+        matches = index.query(args.text, args.top_k, args.min_sim)
+        if not matches:
+            print(f"⚠ nothing at cosine >= {args.min_sim}")
+        for tid, sim in matches:
+            print(f"{sim:5.2f}  {index.texts[tid]}")
+            for line in index.describe(tid):
+                print(f"         {line}")
+        return
+
+    found = groups(index, args.min_sim)
+    write_atomic(args.out, json.dumps({"min_sim": args.min_sim, "advisory": True, "groups": found}, indent=2, ensure_ascii=False))
+    spelled = sum(len(g["members"]) - 1 for g in found)
+    print(f"✓ {len(found)} candidate groups across units ({spelled} alternative spellings) -> {args.out} "
+          f"in {time.monotonic() - started:.1f}s")
+    print("⚠ Groups are advisory: review a member before mapping it onto the canonical text")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Shared output writer for the generators: rendered bytes are handed to a
+small writer thread pool so rendering continues while files are written.
+
+Every write
+  - goes to a temp file in the target folder and is renamed over the target,
+    so a crash never leaves a half-written unit_XX_learning.html or
+    syllabus300.json behind;
+  - is skipped when the target already holds the same bytes (no mtime churn);
+  - is coalesced with a later write to the same path that arrives while it is
+    still queued (only the last bytes are written).
+
+Usage:
+  from output_sink import OutputSink, write_atomic
+  with OutputSink() as sink:                 # waits for all writes on exit
+      for ...:
+          sink.write(out_path, html)         # str or bytes, returns immediately
+  print(sink.summary())
+
+  write_atomic(path, text)                   # one file, same rules, synchronous
+
+Requirements:
+  (standard library only)
+"""
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Tuple, Union
+
+
+DEFAULT_WORKERS = 4
+MAX_QUEUED = 256        # files held in memory before write() waits for the disk
+
+
+def _as_bytes(data: Union[str, bytes]) -> bytes:
+    return data.encode("utf-8") if isinstance(data, str) else data
+
+
+def write_atomic(path, data: Union[str, bytes]) -> bool:
+    """Write path via temp file + rename unless it already holds data. Returns True when written."""
+    path = Path(path)
+    data = _as_bytes(data)
+    try:
+        if path.stat().st_size == len(data) and path.read_bytes() == data:
+            return False
+    except FileNotFoundError:
+        pass
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            tmp.unlink()
+        except OSError:
+            pass
+        raise
+    return True
+
+
+class OutputSink:
+    def __init__(self, workers: int = DEFAULT_WORKERS, announce: str = "", max_queued: int = MAX_QUEUED):
+        """announce: when set, print "<announce>: <path>" for every file actually written."""
+        self.announce = announce
+        self._pool = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="output-sink")
+        self._slots = threading.BoundedSemaphore(max(1, max_queued))
+        self._lock = threading.Lock()
+        self._pending: Dict[str, Tuple[str, bytes]] = {}   # abs path -> (path as given, latest bytes)
+        self._active: set = set()                           # paths with a drain job queued or running
+        self.counts: Dict[str, int] = {"written": 0, "unchanged": 0, "coalesced": 0, "failed": 0}
+        self.errors: List[Tuple[str, str]] = []
+        self._closed = False
+
+    def write(self, path, data: Union[str, bytes]) -> None:
+        """Queue data for path; returns without waiting for the disk."""
+        if self._closed:
+            raise RuntimeError("OutputSink is closed")
+        key = os.path.abspath(path)
+        data = _as_bytes(data)
+        with self._lock:
+            if key in self._pending:
+                self.counts["coalesced"] += 1
+            self._pending[key] = (str(path), data)
+            if key in self._active:
+                return
+            self._active.add(key)
+        self._slots.acquire()
+        self._pool.submit(self._drain, key)
+
+    def _drain(self, key: str) -> None:
+        # One job per path at a time; it keeps going while newer bytes arrive.
+        while True:
+            with self._lock:
+                item = self._pending.pop(key, None)
+                if item is None:
+                    self._active.discard(key)
+                    self._slots.release()
+                    return
+            path, data = item
+            try:
+                changed = write_atomic(path, data)
+            except Exception as e:
+                with self._lock:
+                    self.counts["failed"] += 1
+                    self.errors.append((path, str(e)))
+                print(f"❌ write failed {path}: {e}")
+                continue
+            with self._lock:
+                self.counts["written" if changed else "unchanged"] += 1
+            if changed and self.announce:
+                print(f"{self.announce}: {path}")
+
+    def close(self) -> Dict[str, int]:
+        """Wait for every queued write; returns the counts."""
+        if not self._closed:
+            self._closed = True
+            self._pool.shutdown(wait=True)
+        return self.counts
+
+    def summary(self) -> str:
+        return ", ".join(f"{k} {v}" for k, v in self.counts.items() if v or k == "written")
+
+    def __enter__(self) -> "OutputSink":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""
+Shared helpers for the payload tools: batch.csv mapping, plan profiles and
+the lesson links (anchors) each plan renders for a unit YAML.
+
+The plan profiles mirror the link generators:
+  1_month   -> 1_month_moodle_payload_create.py   (concepts.core/related, clarifier)
+  3_months  -> 3_month_moodle_payload_create.py   (learning_path[*].learning_objectives)
+  6_months  -> 6_month_moodle_payload_create.py   (textbook_style_content[*].sections[*].section_heading)
+
+and the derived views (DERIVED_VIEWS) that used to be written next to every
+unit as *_concept.yaml / *_concepts.yaml / *_learning.yaml: load_view()
+computes them from the cached parse; export_views.py writes them on request.
+"""
+
+import csv
+import os
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+import yaml
+
+
+LEVELS = ("basic", "intermediate", "advanced")
+
+PLAN_PROFILES: Dict[str, Dict] = {
+    "1_month": {
+        "dir": "1-month-moodle-payload",
+        "source": "concepts",
+        "html_suffix": "_concepts.html",
+        "notes_text": "Generate detailed study notes: {text}",
+        "mcq_text": {
+            "basic": "Generate Basic MCQ: {text}",
+            "intermediate": "Generate Intermediate MCQ: {text}",
+            "advanced": "Generate Advanced MCQ: {text}",
+        },
+        "counts": {"basic": 5, "intermediate": 3, "advanced": 2},
+    },
+    "3_months": {
+        "dir": "3-months-moodle-payload",
+        "source": "learning_objectives",
+        "html_suffix": "_learning.html",
+        "notes_text": "Generate study notes on {text}",
+        "mcq_text": {
+            "basic": "Create Basic MCQ on {text}",
+            "intermediate": "Create Intermediate MCQ on {text}",
+            "advanced": "Create advanced MCQ on {text}",
+        },
+        "counts": {"basic": 5, "intermediate": 3, "advanced": 2},
+    },
+    "6_months": {
+        "dir": "6-months-moodle-payload",
+        "source": "sections",
+        "html_suffix": "_learning.html",
+        "notes_text": "Generate study notes on {text}",
+        "mcq_text": {
+            "basic": "Create Basic MCQ on {text}",
+            "intermediate": "Create intermediate MCQ on {text}",
+            "advanced": "Create advanced MCQ on {text}",
+        },
+        "counts": {"basic": 5, "intermediate": 3, "advanced": 2},
+    },
+}
+
+# libyaml-backed loader/emitter when PyYAML was built with it (same semantics as safe_load / dump).
+SafeLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+Dumper = getattr(yaml, "CDumper", yaml.Dumper)
+
+PLAN_DIR_RE = re.compile(r"^(\d+)-months?-moodle-pay(?:load|laod)$")
+
+
+@dataclass(frozen=True)
+class Link:
+    """One rendered <a> in a lesson page, i.e. one possible LLM request."""
+    function: str          # ask_agent | mcq_widget
+    level: str             # "" for ask_agent
+    number: int            # 0 for ask_agent
+    subject: str           # data-subject (snake_case)
+    topic: str             # data-topic (snake_case)
+    lesson: str            # data-lesson
+    tags: str              # data-tags
+    agent_text: str        # data-agent-text
+    clarification: str     # text shown next to the links
+
+
+def convert_to_snake_case(text):
+    """Convert text to snake_case (rule used for data-subject/data-topic)."""
+    return text.lower().replace(' ', '_').replace('-', '_')
+
+
+def load_csv_mapping(csv_path):
+    """Load batch.csv and create mapping of filename_prefix -> topic (lesson_topic)."""
+    mapping = {}
+    with open(csv_path, 'r', encoding='utf-8') as f:
+        reader = csv.reader(f)
+        for row in reader:
+            if len(row) >= 2:
+                lesson_topic = row[0].strip()
+                filename_prefix = row[1].strip()
+                mapping[filename_prefix] = lesson_topic
+    return mapping
+
+
+def plan_for_folder(folder) -> Optional[str]:
+    """'.../GATE-Chemistry/3-months-moodle-payload/organic_chemistry' -> '3_months'."""
+    for part in reversed(Path(folder).resolve().parts):
+        m = PLAN_DIR_RE.match(part)
+        if m:
+            months = int(m.group(1))
+            key = f"{months}_month" if months == 1 else f"{months}_months"
+            return key if key in PLAN_PROFILES else None
+    return None
+
+
+def iter_payload_folders(root) -> Iterator[Path]:
+    """Every folder below root that has a batch.csv."""
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        if "batch.csv" in filenames:
+            yield Path(dirpath)
+
+
+def iter_unit_files(folder, mapping: Dict[str, str]) -> Iterator[Path]:
+    """Source unit YAML files of a payload folder (derived view files are skipped)."""
+    for path in sorted(Path(folder).glob("*.yaml")):
+        if view_name(path) is not None:
+            continue
+        if path.stem in mapping:
+            yield path
+
+
+def load_unit(yaml_path, use_bundle: bool = True) -> Dict:
+    """Parsed unit YAML; served from $EXAMCATALYST_BUNDLE (corpus_bundle.py) when it is up to date."""
+    if use_bundle and os.environ.get("EXAMCATALYST_BUNDLE"):
+        from corpus_bundle import env_bundle
+        bundle = env_bundle()
+        data = bundle.get_fresh(yaml_path) if bundle is not None else None
+        if data is not None:
+            return data if isinstance(data, dict) else {}
+    with open(yaml_path, 'r', encoding='utf-8') as f:
+        data = yaml.load(f, Loader=SafeLoader)
+    return data if isinstance(data, dict) else {}
+
+
+# -------------------- Derived views --------------------
+def concept_view(data: Dict) -> Dict:
+    """metadata + concepts (yaml_concept_extractor.py, <stem>_concept.yaml)."""
+    view = {}
+    if 'metadata' in data:
+        view['metadata'] = data['metadata']
+    if 'concepts' in data:
+        view['concepts'] = data['concepts']
+    return view
+
+
+def concepts_view(data: Dict) -> Dict:
+    """metadata + core concepts with their count (parse_concept_title_yaml.py, <stem>_concepts.yaml)."""
+    core = (data.get('concepts') or {}).get('core') or []
+    return {
+        'metadata': data.get('metadata', {}),
+        'total_core_concepts': len(core),
+        'concepts': {'core': core},
+    }
+
+
+def learning_view(data: Dict) -> Dict:
+    """metadata + id/title/learning_objectives per learning_path item (<stem>_learning.yaml)."""
+    learning_path = data.get('learning_path') or []
+    return {
+        'metadata': data.get('metadata', {}),
+        'total_titles': len(learning_path),
+        'learning_path': [{'id': item.get('id'),
+                           'title': item.get('title'),
+                           'learning_objectives': item.get('learning_objectives', [])}
+                          for item in learning_path if isinstance(item, dict)],
+    }
+
+
+# view name -> (file suffix it was materialized under, builder)
+DERIVED_VIEWS: Dict[str, Tuple[str, Callable[[Dict], Dict]]] = {
+    "concept": ("_concept.yaml", concept_view),
+    "concepts": ("_concepts.yaml", concepts_view),
+    "learning": ("_learning.yaml", learning_view),
+}
+
+
+def view_name(path) -> Optional[str]:
+    """'unit_01_concepts.yaml' -> 'concepts'; None for a source unit file."""
+    name = Path(path).name
+    for view, (suffix, _) in DERIVED_VIEWS.items():
+        if name.endswith(suffix):
+            return view
+    return None
+
+
+@lru_cache(maxsize=4096)
+def _load_view_cached(path: str, mtime_ns: int, size: int, view: str) -> Dict:
+    return DERIVED_VIEWS[view][1](load_unit(path))
+
+
+def load_view(yaml_path, view: str) -> Dict:
+    """
+    A derived view of a unit, computed from the parse (bundle-backed, cached
+    per file version). Treat the result as read-only: it shares lists with
+    the cached parse.
+    """
+    path = os.path.abspath(yaml_path)
+    st = os.stat(path)
+    return _load_view_cached(path, st.st_mtime_ns, st.st_size, view)
+
+
+def dump_view(data: Dict) -> str:
+    """YAML text of a view, formatted like the old extractors' yaml.dump (C emitter when available)."""
+    return yaml.dump(data, Dumper=Dumper, default_flow_style=False, sort_keys=False, allow_unicode=True)
+
+
+# -------------------- Links --------------------
+def _links_for(profile: Dict, subject: str, topic: str, lesson: str, tags: str, text: str) -> List[Link]:
+    links = [Link("ask_agent", "", 0, subject, topic, lesson, tags,
+                  profile["notes_text"].format(text=text), text)]
+    for level in LEVELS:
+        links.append(Link("mcq_widget", level, profile["counts"][level], subject, topic, lesson, tags,
+                          profile["mcq_text"][level].format(text=text), text))
+    return links
+
+
+def iter_page_blocks(unit, profile: Dict, lesson_topic: str) -> Iterator[Tuple[str, List[List[Link]]]]:
+    """
+    Page structure behind the links: ("core" | "related", one link set per
+    concept) for concept pages, one ("learning_path", link sets) per
+    learning_path item otherwise. Each link set is notes + one MCQ per level.
+    unit is a unit_model.Unit or the raw YAML dict; section-style units
+    (topic / section_title instead of lesson / section_heading) read the same way.
+    data-lesson of a learning_objectives item is its "topic", as the 3-month
+    generator writes it; profile "item_lesson": "name" falls back to "title"
+    (section units, see section_corpus.py).
+    """
+    from unit_model import Unit
+    if not isinstance(unit, Unit):
+        unit = Unit.from_dict(unit)
+    subject_snake = convert_to_snake_case(unit.subject)
+    topic_snake = convert_to_snake_case(lesson_topic)
+
+    if profile["source"] == "concepts":
+        for block, concepts in (("core", unit.core), ("related", unit.related)):
+            yield block, [_links_for(profile, subject_snake, topic_snake, c.name,
+                                     convert_to_snake_case(c.name), c.clarifier) for c in concepts]
+        return
+
+    for item in unit.learning_path:
+        tags_value = item.tags_value
+        if profile["source"] == "learning_objectives":
+            lesson = getattr(item, profile.get("item_lesson", "topic"))
+            yield "learning_path", [_links_for(profile, subject_snake, topic_snake, lesson, tags_value, obj)
+                                    for obj in item.learning_objectives]
+            continue
+        yield "learning_path", [_links_for(profile, subject_snake, topic_snake, lesson.name, tags_value,
+                                           sec.heading)
+                                for lesson in item.lessons for sec in lesson.sections]
+
+
+def iter_links(data: Dict, plan: str, lesson_topic: str) -> Iterator[Link]:
+    """All links the plan's generator renders for one unit, in page order."""
+    for _, sets in iter_page_blocks(data, PLAN_PROFILES[plan], lesson_topic):
+        for links in sets:
+            yield from links
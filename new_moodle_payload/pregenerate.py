@@ -0,0 +1,464 @@
+#!/usr/bin/env python3
+"""
+Pre-generate LLM answers for every request in the prompt manifest
+(prompt_manifest.py output) so lesson clicks can be served warm.
+
+Requests are sent exactly as local_ai_functions_call_endpoint() sends them:
+POST <endpoint>?api-version=<v> (lib.php) or the bare <endpoint> for ask_agent
+(libagent.php ignores api_version), "Authorization: Bearer <api_key>", the
+payload from the manifest with "model" filled in when absent. Streaming
+payloads (ask_agent) are read as SSE and assembled into the final text.
+--api-version forces the query parameter onto every function.
+
+- one pooled keep-alive connection pool, per-host concurrency + rate limits
+- retry with exponential backoff and jitter (honours Retry-After)
+- results stored content-addressed by manifest id: <store>/objects/ab/<id>.json
+- <store>/checkpoint.txt lists finished ids; rerunning resumes where it stopped
+- --cache DIR also fills response_cache.py's cache, which the block reads
+
+Endpoints come from --endpoint (all functions) or --agent-config, a JSON file
+in the local_ai_functions_agents.config_data shape, keyed by the plugin's
+function names (the page's data-function="mcq_widget" is the plugin's "mcq"):
+  {"ask_agent": {"endpoint": "...", "api_key": "...", "api_version": "...", "model": "..."},
+   "mcq": {...}}
+
+Usage:
+  python prompt_manifest.py
+  python pregenerate.py --mock --limit 200                      # bundled mock server
+  python pregenerate.py --agent-config agents.json --concurrency 8 --rate 4
+  python pregenerate.py --agent-config agents.json --cache /var/moodledata/ai_assistant_response_cache
+
+Requirements:
+  pip install aiohttp
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Set
+from urllib.parse import urlsplit
+
+import aiohttp
+
+from response_cache import ResponseCache, key_for_record
+
+
+RETRY_STATUSES = {408, 409, 425, 429, 500, 502, 503, 504}
+DEFAULT_API_VERSION = "2024-05-01-preview"
+DEFAULT_MODEL = "Phi-4"
+PAGE_FUNCTIONS = ("ask_agent", "mcq_widget")
+CONFIG_KEYS = {"mcq_widget": "mcq"}     # data-function -> local_ai_functions function name
+BARE_URL_FUNCTIONS = {"ask_agent"}      # served by libagent.php, which posts to the endpoint as configured
+
+
+class RequestFailed(Exception):
+    def __init__(self, message: str, retryable: bool, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retryable = retryable
+        self.retry_after = retry_after
+
+
+@dataclass
+class FunctionConfig:
+    endpoint: str
+    api_key: str
+    api_version: str = DEFAULT_API_VERSION
+    model: str = DEFAULT_MODEL
+
+    @property
+    def url(self) -> str:
+        if not self.api_version:
+            return self.endpoint
+        sep = "&" if "?" in self.endpoint else "?"
+        return f"{self.endpoint}{sep}api-version={self.api_version}"
+
+    @property
+    def host(self) -> str:
+        return urlsplit(self.endpoint).netloc
+
+    @property
+    def uses_responses_api(self) -> bool:
+        # Same rule as local_ai_functions_call_endpoint().
+        return "/openai/responses" in self.endpoint or "gpt-5" in self.model.lower()
+
+
+class HostLimiter:
+    """Concurrency cap plus a minimum spacing between request starts for one host."""
+
+    def __init__(self, concurrency: int, rate: float):
+        self.semaphore = asyncio.Semaphore(max(1, concurrency))
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next_start = 0.0
+        self._lock = asyncio.Lock()
+
+    async def __aenter__(self):
+        await self.semaphore.acquire()
+        if self.interval:
+            async with self._lock:
+                now = time.monotonic()
+                wait = self._next_start - now
+                self._next_start = max(now, self._next_start) + self.interval
+            if wait > 0:
+                await asyncio.sleep(wait)
+        return self
+
+    async def __aexit__(self, *exc):
+        self.semaphore.release()
+
+
+class ContentStore:
+    """Answers stored by request id, written atomically; checkpoint.txt records finished ids."""
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        self.objects = self.root / "objects"
+        self.objects.mkdir(parents=True, exist_ok=True)
+        self.checkpoint_path = self.root / "checkpoint.txt"
+        self.failures_path = self.root / "failures.jsonl"
+        self._checkpoint = open(self.checkpoint_path, "a", encoding="utf-8")
+
+    def path_for(self, rid: str) -> Path:
+        return self.objects / rid[:2] / f"{rid}.json"
+
+    def completed_ids(self) -> Set[str]:
+        done: Set[str] = set()
+        if self.checkpoint_path.exists():
+            with open(self.checkpoint_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    rid = line.strip()
+                    if rid:
+                        done.add(rid)
+        # A checkpoint line without its object (deleted store file) is redone.
+        return {rid for rid in done if self.path_for(rid).exists()}
+
+    def put(self, rid: str, record: Dict) -> None:
+        path = self.path_for(rid)
+        path.parent.mkdir(exist_ok=True)
+        tmp = path.with_name(path.name + ".tmp")
+        tmp.write_text(json.dumps(record, ensure_ascii=False), encoding="utf-8")
+        tmp.replace(path)
+        self._checkpoint.write(rid + "\n")
+        self._checkpoint.flush()
+
+    def record_failure(self, rid: str, error: str, attempts: int) -> None:
+        with open(self.failures_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps({"id": rid, "error": error, "attempts": attempts, "at": int(time.time())}) + "\n")
+
+    def close(self) -> None:
+        self._checkpoint.close()
+
+
+@dataclass
+class Stats:
+    total: int = 0
+    skipped: int = 0
+    ok: int = 0
+    failed: int = 0
+    retries: int = 0
+    started: float = field(default_factory=time.monotonic)
+
+    def line(self) -> str:
+        elapsed = time.monotonic() - self.started
+        rate = self.ok / elapsed if elapsed else 0.0
+        return (f"{self.ok + self.failed}/{self.total} done (ok {self.ok}, failed {self.failed}, "
+                f"retries {self.retries}) {rate:.1f} req/s")
+
+
+def extract_content(data: Dict, uses_responses_api: bool) -> Optional[str]:
+    """Python port of local_ai_functions_extract_content()."""
+    if uses_responses_api:
+        output = data.get("output")
+        if isinstance(output, list) and output:
+            first = output[0] or {}
+            content = first.get("content")
+            if isinstance(content, list) and content and "text" in content[0]:
+                return content[0]["text"]
+            if "text" in first:
+                return first["text"]
+        if isinstance(output, dict) and "text" in output:
+            return output["text"]
+        return None
+    try:
+        return data["choices"][0]["message"]["content"]
+    except (KeyError, IndexError, TypeError):
+        return None
+
+
+def sse_delta(event: Dict, uses_responses_api: bool) -> str:
+    """Text carried by one SSE data event (chat.completion.chunk or Responses API delta)."""
+    if uses_responses_api:
+        delta = event.get("delta")
+        if isinstance(delta, dict):
+            return delta.get("text") or ""
+        return delta if isinstance(delta, str) else ""
+    choices = event.get("choices") or []
+    if choices:
+        return (choices[0].get("delta") or {}).get("content") or ""
+    return ""
+
+
+def sse_event_text(raw: bytes, uses_responses_api: bool) -> str:
+    parts: List[str] = []
+    for line in raw.decode("utf-8").splitlines():
+        if not line.startswith("data:"):
+            continue
+        data = line[5:].strip()
+        if not data or data == "[DONE]":
+            continue
+        try:
+            parts.append(sse_delta(json.loads(data), uses_responses_api))
+        except ValueError:
+            continue
+    return "".join(parts)
+
+
+async def read_sse(response: aiohttp.ClientResponse, uses_responses_api: bool) -> str:
+    parts: List[str] = []
+    buffer = b""
+    async for chunk in response.content.iter_any():
+        buffer += chunk
+        while b"\n\n" in buffer:
+            raw, buffer = buffer.split(b"\n\n", 1)
+            parts.append(sse_event_text(raw, uses_responses_api))
+    if buffer.strip():
+        parts.append(sse_event_text(buffer, uses_responses_api))    # last event without a blank line
+    return "".join(parts)
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        return None
+
+
+async def call_endpoint(session: aiohttp.ClientSession, fconfig: FunctionConfig, payload: Dict) -> str:
+    body = dict(payload)
+    body.setdefault("model", fconfig.model)
+    headers = {"Content-Type": "application/json", "Authorization": f"Bearer {fconfig.api_key}"}
+    try:
+        async with session.post(fconfig.url, json=body, headers=headers) as resp:
+            if resp.status != 200:
+                text = (await resp.text())[:300]
+                raise RequestFailed(f"HTTP {resp.status}: {text}", resp.status in RETRY_STATUSES,
+                                    parse_retry_after(resp.headers.get("Retry-After")))
+            if body.get("stream"):
+                content = await read_sse(resp, fconfig.uses_responses_api)
+            else:
+                content = extract_content(await resp.json(content_type=None), fconfig.uses_responses_api)
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        raise RequestFailed(f"{type(e).__name__}: {e}", True)
+    if not content:
+        raise RequestFailed("empty response content", True)
+    return content
+
+
+async def run_one(record: Dict, session, configs, limiters, store: ContentStore, stats: Stats, args,
+                  cache: Optional[ResponseCache] = None) -> None:
+    rid = record["id"]
+    fconfig = configs[record["function"]]
+    limiter = limiters[fconfig.host]
+    attempt = 0
+    while True:
+        attempt += 1
+        try:
+            async with limiter:
+                started = time.monotonic()
+                content = await call_endpoint(session, fconfig, record["payload"])
+                elapsed = time.monotonic() - started
+        except RequestFailed as e:
+            if not e.retryable or attempt > args.retries:
+                stats.failed += 1
+                store.record_failure(rid, str(e), attempt)
+                print(f"❌ {rid[:12]} {record['function']}: {e}", file=sys.stderr)
+                return
+            stats.retries += 1
+            delay = e.retry_after
+            if delay is None:
+                delay = min(args.max_backoff, args.backoff * (2 ** (attempt - 1))) * random.uniform(0.5, 1.0)
+            await asyncio.sleep(delay)
+            continue
+
+        store.put(rid, {
+            "id": rid,
+            "function": record["function"],
+            "level": record.get("level", ""),
+            "number": record.get("number", 0),
+            "agent_text": record.get("agent_text", ""),
+            "template": record.get("template", ""),
+            "template_version": record.get("template_version", ""),
+            "model": record["payload"].get("model", fconfig.model),
+            "content": content,
+            "latency_ms": round(elapsed * 1000, 1),
+            "created": int(time.time()),
+        })
+        if cache is not None:
+            cache.put(key_for_record(record), content, record["function"], record.get("level", ""),
+                      record.get("number", 0), record.get("template_version", ""))
+        stats.ok += 1
+        return
+
+
+def iter_manifest(path: Path, functions: Optional[Set[str]]) -> Iterator[Dict]:
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            if functions and record.get("function") not in functions:
+                continue
+            yield record
+
+
+def load_function_configs(args) -> Dict[str, FunctionConfig]:
+    configs: Dict[str, FunctionConfig] = {}
+    if args.agent_config:
+        with open(args.agent_config, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        for name in PAGE_FUNCTIONS:
+            cfg = data.get(CONFIG_KEYS.get(name, name))
+            if isinstance(cfg, dict) and cfg.get("endpoint"):
+                configs[name] = FunctionConfig(
+                    endpoint=cfg["endpoint"],
+                    api_key=cfg.get("api_key", ""),
+                    api_version=api_version_for(name, args.api_version, cfg.get("api_version")),
+                    model=cfg.get("model", DEFAULT_MODEL),
+                )
+    if args.endpoint:
+        for name in PAGE_FUNCTIONS:
+            configs.setdefault(name, FunctionConfig(args.endpoint, args.api_key,
+                                                    api_version_for(name, args.api_version), args.model))
+    return configs
+
+
+def api_version_for(name: str, forced: Optional[str], configured: Optional[str] = None) -> str:
+    """api-version the plugin would send for this function; --api-version overrides."""
+    if forced is not None:
+        return forced
+    if name in BARE_URL_FUNCTIONS:
+        return ""
+    return DEFAULT_API_VERSION if configured is None else configured
+
+
+async def run(args) -> int:
+    mock_runner = None
+    if args.mock:
+        from mock_llm_server import DEFAULT_RESPONSE_FILE, MockConfig, load_response_text, start_mock_server
+        mock_config = MockConfig(response_text=load_response_text(DEFAULT_RESPONSE_FILE),
+                                 first_token_latency=0.05, token_latency=0.0, fail_rate=args.mock_fail_rate)
+        mock_runner, base_url = await start_mock_server(mock_config)
+        args.endpoint = f"{base_url}/chat/completions"
+        args.api_key = args.api_key or "mock"
+        print(f"Mock LLM server at {base_url}")
+
+    configs = load_function_configs(args)
+    if not configs:
+        print("Error: give --endpoint, --agent-config or --mock")
+        return 1
+
+    store = ContentStore(Path(args.store))
+    cache = ResponseCache(args.cache) if args.cache else None
+    done = store.completed_ids()
+    functions = set(args.functions.split(",")) if args.functions else None
+
+    todo: List[Dict] = []
+    stats = Stats()
+    for record in iter_manifest(Path(args.manifest), functions):
+        if record["id"] in done:
+            stats.skipped += 1
+            continue
+        if record["function"] not in configs:
+            print(f"⚠ WARNING: no endpoint configured for {record['function']}; skipping {record['id'][:12]}")
+            continue
+        todo.append(record)
+        if args.limit and len(todo) >= args.limit:
+            break
+    stats.total = len(todo)
+    print(f"{stats.skipped} already in store, {stats.total} to generate")
+
+    limiters: Dict[str, HostLimiter] = {}
+    for fconfig in configs.values():
+        limiters.setdefault(fconfig.host, HostLimiter(args.concurrency, args.rate))
+
+    connector = aiohttp.TCPConnector(limit=args.concurrency * len(limiters), limit_per_host=args.concurrency,
+                                     keepalive_timeout=60)
+    timeout = aiohttp.ClientTimeout(total=args.timeout)
+    queue: asyncio.Queue = asyncio.Queue()
+    for record in todo:
+        queue.put_nowait(record)
+
+    async def worker(session):
+        while True:
+            try:
+                record = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            await run_one(record, session, configs, limiters, store, stats, args, cache)
+            finished = stats.ok + stats.failed
+            if finished % args.progress_every == 0:
+                print(stats.line())
+
+    try:
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+            workers = [asyncio.create_task(worker(session))
+                       for _ in range(min(len(todo), args.concurrency * len(limiters)) or 0)]
+            await asyncio.gather(*workers)
+    finally:
+        store.close()
+        if cache is not None:
+            cache.close()
+        if mock_runner is not None:
+            await mock_runner.cleanup()
+
+    print(stats.line())
+    print(f"✓ Store: {store.root}")
+    if stats.failed:
+        print(f"⚠ {stats.failed} failed request(s) logged to {store.failures_path}; rerun to retry them")
+    return 1 if stats.failed else 0
+
+
+def main():
+    here = Path(__file__).resolve().parent
+    parser = argparse.ArgumentParser(description="Pre-generate LLM answers for the prompt manifest.")
+    parser.add_argument("--manifest", default=str(here / "prompt_manifest.jsonl"), help="prompt_manifest.py output")
+    parser.add_argument("--store", default=str(here / "pregenerated"), help="Content-addressed output store")
+    parser.add_argument("--cache", help="Also write answers into this response_cache.py folder")
+    parser.add_argument("--endpoint", help="Chat completions URL used for every function")
+    parser.add_argument("--api-key", default=os.environ.get("LLM_API_KEY", ""), help="Bearer key (default: $LLM_API_KEY)")
+    parser.add_argument("--api-version", help="api-version query parameter for every function ('' to omit; "
+                                               f"default: none for ask_agent, {DEFAULT_API_VERSION} otherwise)")
+    parser.add_argument("--model", default=DEFAULT_MODEL, help="Model set when the payload has none")
+    parser.add_argument("--agent-config", help="JSON in local_ai_functions_agents.config_data shape")
+    parser.add_argument("--functions", help="Comma list, e.g. mcq_widget (default: all)")
+    parser.add_argument("--limit", type=int, default=0, help="Generate at most N requests this run")
+    parser.add_argument("--concurrency", type=int, default=8, help="In-flight requests per host")
+    parser.add_argument("--rate", type=float, default=0.0, help="Max request starts per second per host (0 = no limit)")
+    parser.add_argument("--retries", type=int, default=5, help="Retries per request")
+    parser.add_argument("--backoff", type=float, default=1.0, help="First backoff delay in seconds")
+    parser.add_argument("--max-backoff", type=float, default=60.0, help="Backoff cap in seconds")
+    parser.add_argument("--timeout", type=float, default=300.0, help="Per-request timeout in seconds")
+    parser.add_argument("--progress-every", type=int, default=100, help="Print progress every N requests")
+    parser.add_argument("--mock", action="store_true", help="Run against the bundled mock_llm_server in-process")
+    parser.add_argument("--mock-fail-rate", type=float, default=0.0, help="Injected 429/500 rate for --mock")
+    args = parser.parse_args()
+
+    if args.progress_every < 1:
+        print("Error: --progress-every must be at least 1")
+        sys.exit(1)
+    if not Path(args.manifest).exists():
+        print(f"Error: manifest '{args.manifest}' not found (run prompt_manifest.py first)")
+        sys.exit(1)
+    sys.exit(asyncio.run(run(args)))
+
+
+if __name__ == "__main__":
+    main()
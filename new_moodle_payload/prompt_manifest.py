@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+Build the deduplicated manifest of every LLM request the generated lesson
+pages can trigger (data-function x data-level x data-number x data-agent-text).
+
+Links are derived from the unit YAML files and the plan profiles in
+payload_lib (no HTML scraping). Each link is rendered into the exact request
+ask_agent_ajax.php / mcq_widget_ajax.php would send, using the block's
+prompts/ask_agent_instruction.txt and prompts/mcq_<level>.txt, and the
+request is content-addressed so identical clicks across units, plans and
+exams collapse to one manifest line.
+
+Usage:
+  python prompt_manifest.py
+  python prompt_manifest.py --root GATE-Chemistry --output gate_chem_prompts.jsonl
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from output_sink import write_atomic
+from payload_lib import (
+    Link,
+    iter_links,
+    iter_payload_folders,
+    iter_unit_files,
+    load_csv_mapping,
+    load_unit,
+    plan_for_folder,
+)
+
+
+DEFAULT_TARGET = "CSIR Chemical Sciences Exam"  # main.mustache default when data-target is absent
+DEFAULT_PROMPTS_DIR = Path(__file__).resolve().parent.parent / "moodle-blocks-ai_assistant" / "prompts"
+
+MCQ_MAX_TOKENS = {"basic": 3000, "intermediate": 4000, "advanced": 4000}
+
+
+def normalize_text(text: str) -> str:
+    """Collapse whitespace; the only normalization applied to link values."""
+    return " ".join(str(text).split())
+
+
+class PromptTemplates:
+    """Loads prompts/*.txt once and renders them like the PHP endpoints (str_replace)."""
+
+    def __init__(self, prompts_dir: Path):
+        self.prompts_dir = Path(prompts_dir)
+        self._cache: Dict[str, Tuple[str, str]] = {}
+
+    def get(self, name: str) -> Tuple[str, str]:
+        """Return (template text, template version hash)."""
+        if name not in self._cache:
+            text = (self.prompts_dir / name).read_text(encoding="utf-8")
+            self._cache[name] = (text, hashlib.sha256(text.encode("utf-8")).hexdigest()[:12])
+        return self._cache[name]
+
+
+def render(template: str, values: Dict[str, str]) -> str:
+    for placeholder, value in values.items():
+        template = template.replace(placeholder, str(value))
+    return template
+
+
+def build_request(link: Link, target: str, templates: PromptTemplates) -> Dict:
+    """
+    Return {"template", "template_version", "payload"} for one link, where payload is the
+    chat-completions body the AJAX endpoint sends to local_ai_functions_call_endpoint().
+    """
+    subject = normalize_text(link.subject)
+    topic = normalize_text(link.topic)
+    lesson = normalize_text(link.lesson)
+    tags = normalize_text(link.tags)
+    agent_text = normalize_text(link.agent_text)
+
+    if link.function == "ask_agent":
+        name = "ask_agent_instruction.txt"
+        template, version = templates.get(name)
+        context = [f"**Exam**: {target}", f"**Subject**: {subject}"]
+        if lesson:
+            context.append(f"**Lesson**: {lesson}")
+        if topic:
+            context.append(f"**Topic**: {topic}")
+        if tags:
+            context.append(f"**Keywords**: {tags}")
+        context.append(f"**Student Query**: {agent_text}")
+        system_prompt = render(template, {
+            "{TARGET_EXAM}": target, "{SUBJECT}": subject, "{TOPIC}": topic,
+            "{LESSON}": lesson, "{TAGS}": tags, "{CONTEXT_BLOCK}": "\n".join(context),
+        })
+        payload = {
+            "messages": [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": f"Generate study notes for: {agent_text}"},
+            ],
+            "stream": True,
+            "max_tokens": 6000,
+            "temperature": 0.6,
+            "top_p": 0.9,
+            "presence_penalty": 0.5,
+            "frequency_penalty": 0.6,
+        }
+    else:
+        name = f"mcq_{link.level}.txt"
+        template, version = templates.get(name)
+        system_prompt = render(template, {
+            "{QUESTION_COUNT}": link.number, "{TARGET_EXAM}": target, "{SUBJECT}": subject,
+            "{TOPIC}": topic, "{LESSON}": lesson, "{LEVEL}": link.level.lower(),
+            "{AGENT_TEXT}": agent_text, "{TAGS}": tags,
+        })
+        payload = {
+            "messages": [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": f"Generate {link.number} MCQs on: {agent_text}"},
+            ],
+            "stream": False,
+            "max_tokens": MCQ_MAX_TOKENS[link.level],
+            "temperature": 0.6,
+            "top_p": 0.9,
+            "frequency_penalty": 0.7,
+            "presence_penalty": 0.8,
+            "n": 1,
+        }
+    return {"template": name, "template_version": version, "payload": payload}
+
+
+def request_id(function: str, payload: Dict) -> str:
+    canonical = json.dumps({"function": function, "payload": payload}, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def collect_links(root: Path) -> List[Tuple[str, str, Link]]:
+    """[(plan, source 'folder/unit.yaml', link)] for every payload folder under root."""
+    out = []
+    for folder in iter_payload_folders(root):
+        plan = plan_for_folder(folder)
+        if plan is None:
+            continue
+        mapping = load_csv_mapping(folder / "batch.csv")
+        for yaml_path in iter_unit_files(folder, mapping):
+            try:
+                data = load_unit(yaml_path)
+            except Exception as e:
+                print(f"⚠ WARNING: cannot parse {yaml_path}: {e}", file=sys.stderr)
+                continue
+            source = os.path.relpath(yaml_path, root)
+            for link in iter_links(data, plan, mapping[yaml_path.stem]):
+                out.append((plan, source, link))
+    return out
+
+
+def main():
+    here = Path(__file__).resolve().parent
+    parser = argparse.ArgumentParser(description="Write the deduplicated LLM prompt manifest as JSONL.")
+    parser.add_argument("--root", default=str(here), help="Folder to scan for payload folders (default: this folder)")
+    parser.add_argument("--prompts", default=str(DEFAULT_PROMPTS_DIR), help="blocks/ai_assistant/prompts folder")
+    parser.add_argument("--target", default=DEFAULT_TARGET, help="Target exam sent by the block (data-target default)")
+    parser.add_argument("--output", default="prompt_manifest.jsonl", help="Output JSONL (relative to --root)")
+    args = parser.parse_args()
+
+    root = Path(args.root)
+    if not root.is_dir():
+        print(f"Error: Folder '{root}' does not exist")
+        sys.exit(1)
+
+    templates = PromptTemplates(Path(args.prompts))
+    links = collect_links(root)
+
+    records: Dict[str, Dict] = {}
+    per_plan_total: Dict[str, int] = {}
+    per_plan_ids: Dict[str, set] = {}
+
+    for plan, source, link in links:
+        req = build_request(link, args.target, templates)
+        rid = request_id(link.function, req["payload"])
+        per_plan_total[plan] = per_plan_total.get(plan, 0) + 1
+        per_plan_ids.setdefault(plan, set()).add(rid)
+
+        rec = records.get(rid)
+        if rec is None:
+            rec = records[rid] = {
+                "id": rid,
+                "function": link.function,
+                "level": link.level,
+                "number": link.number,
+                "subject": link.subject,
+                "topic": link.topic,
+                "lesson": normalize_text(link.lesson),
+                "tags": normalize_text(link.tags),
+                "agent_text": normalize_text(link.agent_text),
+                "target": args.target,
+                "template": req["template"],
+                "template_version": req["template_version"],
+                "payload": req["payload"],
+                "plans": [],
+                "sources": [],
+                "occurrences": 0,
+            }
+        rec["occurrences"] += 1
+        if plan not in rec["plans"]:
+            rec["plans"].append(plan)
+        if source not in rec["sources"]:
+            rec["sources"].append(source)
+
+    output_path = root / args.output
+    write_atomic(output_path, "".join(json.dumps(rec, ensure_ascii=False) + "\n" for rec in records.values()))
+
+    print("=" * 70)
+    print("PROMPT MANIFEST")
+    print("=" * 70)
+    for plan in sorted(per_plan_total):
+        print(f"{plan:>9}: {per_plan_total[plan]:>7} links -> {len(per_plan_ids[plan]):>7} distinct requests")
+    by_function: Dict[str, int] = {}
+    for rec in records.values():
+        key = rec["function"] if not rec["level"] else f"{rec['function']}:{rec['level']}"
+        by_function[key] = by_function.get(key, 0) + 1
+    for key in sorted(by_function):
+        print(f"  {key:<24} {by_function[key]:>7}")
+    print(f"Total links: {len(links)}  distinct requests: {len(records)}")
+    print(f"✓ Wrote {output_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+"""
+Response cache for generated study notes (ask_agent) and MCQs (mcq_widget).
+
+Layout of a cache folder:
+  response_cache.sqlite3   entries (key -> blob, size, ttl, LRU clock, hits) + stats
+  blobs/ab/<sha256>.txt    response text, content-addressed (identical answers share a blob)
+
+Key = sha256 of
+  "v1\\n<function>\\n<level>\\n<number>\\n<template_version>\\n<normalized prompt>"
+where the normalized prompt is "role: content" per message with runs of
+ASCII whitespace collapsed, and template_version is the first 12 hex chars of
+sha256(prompts/<template>.txt) (same as prompt_manifest.py). The block's
+locallib.php (block_ai_assistant_response_cache_get) computes the same key
+and reads the database directly, so PHP needs nothing but pdo_sqlite.
+
+Python writes (pregenerate.py --cache, llm_proxy.py); PHP only reads and
+bumps hit counters. Entries past their TTL are misses; puts evict least
+recently used entries until the blob bytes fit the byte budget.
+
+Usage:
+  python response_cache.py stats --cache /var/moodledata/ai_assistant_response_cache
+  python response_cache.py import --cache DIR --store pregenerated --manifest prompt_manifest.jsonl
+  python response_cache.py gc --cache DIR --max-bytes 500000000
+  python response_cache.py get --cache DIR --key <key>
+"""
+
+import argparse
+import hashlib
+import json
+import re
+import sqlite3
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+
+DB_FILENAME = "response_cache.sqlite3"
+KEY_VERSION = "v1"
+DEFAULT_TTL = 30 * 24 * 3600          # seconds
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+# Explicit ASCII class: PHP's preg_replace without /u must collapse exactly the same bytes.
+WHITESPACE_RE = re.compile(r"[ \t\n\r\f\x0b]+")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    function TEXT NOT NULL,
+    level TEXT NOT NULL,
+    number INTEGER NOT NULL,
+    template_version TEXT NOT NULL,
+    blob TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created INTEGER NOT NULL,
+    expires_at INTEGER,
+    last_access INTEGER NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS entries_lru ON entries(last_access);
+CREATE INDEX IF NOT EXISTS entries_blob ON entries(blob);
+CREATE TABLE IF NOT EXISTS stats (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    name TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+INSERT OR IGNORE INTO stats(name, value) VALUES
+    ('hits', 0), ('misses', 0), ('puts', 0), ('evictions', 0), ('expired', 0), ('bytes', 0);
+"""
+
+
+def collapse_whitespace(text: str) -> str:
+    return WHITESPACE_RE.sub(" ", str(text)).strip(" ")
+
+
+def normalize_prompt(messages: List[Dict]) -> str:
+    return "\n".join(f"{m.get('role', '')}: {collapse_whitespace(m.get('content', ''))}" for m in messages)
+
+
+def cache_key(function: str, level: str, number: int, template_version: str, messages: List[Dict]) -> str:
+    material = "\n".join([KEY_VERSION, function, level or "", str(int(number or 0)),
+                          template_version, normalize_prompt(messages)])
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+def key_for_record(record: Dict) -> str:
+    """Cache key of a prompt_manifest.py record."""
+    return cache_key(record["function"], record.get("level", ""), record.get("number", 0),
+                     record.get("template_version", ""), record["payload"]["messages"])
+
+
+class ResponseCache:
+    def __init__(self, root, max_bytes: Optional[int] = None, default_ttl: Optional[int] = DEFAULT_TTL):
+        self.root = Path(root)
+        self.blobs = self.root / "blobs"
+        self.blobs.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(str(self.root / DB_FILENAME), timeout=30, isolation_level=None)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(SCHEMA)
+        if max_bytes is not None:
+            self._set_meta("max_bytes", str(max_bytes))
+        self.max_bytes = int(self._get_meta("max_bytes") or DEFAULT_MAX_BYTES)
+        self.default_ttl = default_ttl
+
+    # ---------- internals ----------
+
+    def _get_meta(self, name: str) -> Optional[str]:
+        row = self.db.execute("SELECT value FROM meta WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, name: str, value: str) -> None:
+        self.db.execute("INSERT OR REPLACE INTO meta(name, value) VALUES (?, ?)", (name, value))
+
+    def _bump(self, name: str, delta: int = 1) -> None:
+        self.db.execute("UPDATE stats SET value = value + ? WHERE name = ?", (delta, name))
+
+    def blob_path(self, digest: str) -> Path:
+        return self.blobs / digest[:2] / f"{digest}.txt"
+
+    def _delete_entry(self, key: str, blob: str, size: int) -> None:
+        """Remove one row; drop its blob when no other entry shares it. Caller holds the transaction."""
+        self.db.execute("DELETE FROM entries WHERE key = ?", (key,))
+        if self.db.execute("SELECT 1 FROM entries WHERE blob = ? LIMIT 1", (blob,)).fetchone() is None:
+            self.blob_path(blob).unlink(missing_ok=True)
+            self._bump("bytes", -size)
+
+    # ---------- public API ----------
+
+    def get(self, key: str) -> Optional[str]:
+        now = int(time.time())
+        row = self.db.execute("SELECT blob, expires_at FROM entries WHERE key = ?", (key,)).fetchone()
+        if row is None or (row[1] is not None and row[1] <= now):
+            self._bump("misses")
+            return None
+        try:
+            content = self.blob_path(row[0]).read_text(encoding="utf-8")
+        except OSError:
+            self._bump("misses")
+            return None
+        self.db.execute("UPDATE entries SET last_access = ?, hits = hits + 1 WHERE key = ?", (now, key))
+        self._bump("hits")
+        return content
+
+    def lookup(self, function: str, level: str, number: int, template_version: str,
+               messages: List[Dict]) -> Optional[str]:
+        return self.get(cache_key(function, level, number, template_version, messages))
+
+    def put(self, key: str, content: str, function: str, level: str = "", number: int = 0,
+            template_version: str = "", ttl: Optional[int] = None) -> None:
+        data = content.encode("utf-8")
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.blob_path(digest)
+        now = int(time.time())
+        ttl = self.default_ttl if ttl is None else ttl
+        expires_at = now + ttl if ttl else None
+
+        if not path.exists():
+            path.parent.mkdir(exist_ok=True)
+            tmp = path.with_name(path.name + ".tmp")
+            tmp.write_bytes(data)
+            tmp.replace(path)
+
+        self.db.execute("BEGIN IMMEDIATE")
+        try:
+            old = self.db.execute("SELECT blob, size FROM entries WHERE key = ?", (key,)).fetchone()
+            if old is not None and old[0] != digest:
+                self._delete_entry(key, old[0], old[1])
+            new_blob = self.db.execute("SELECT 1 FROM entries WHERE blob = ? LIMIT 1", (digest,)).fetchone() is None
+            self.db.execute(
+                "INSERT OR REPLACE INTO entries(key, function, level, number, template_version, blob, size, "
+                "created, expires_at, last_access, hits) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, COALESCE((SELECT hits FROM entries WHERE key = ?), 0))",
+                (key, function, level or "", int(number or 0), template_version, digest, len(data),
+                 now, expires_at, now, key))
+            if new_blob:
+                self._bump("bytes", len(data))
+            self._bump("puts")
+            self._evict_locked(protect=key)
+            self.db.execute("COMMIT")
+        except Exception:
+            self.db.execute("ROLLBACK")
+            raise
+
+    def _evict_locked(self, protect: Optional[str] = None) -> int:
+        evicted = 0
+        total = self.db.execute("SELECT value FROM stats WHERE name = 'bytes'").fetchone()[0]
+        if total <= self.max_bytes:
+            return 0
+        cursor = self.db.execute("SELECT key, blob, size FROM entries ORDER BY last_access, created")
+        for key, blob, size in cursor.fetchall():
+            if total <= self.max_bytes:
+                break
+            if key == protect:
+                continue
+            shared = self.db.execute("SELECT COUNT(*) FROM entries WHERE blob = ?", (blob,)).fetchone()[0] > 1
+            self._delete_entry(key, blob, size)
+            if not shared:
+                total -= size
+            evicted += 1
+        if evicted:
+            self._bump("evictions", evicted)
+        return evicted
+
+    def gc(self) -> Dict[str, int]:
+        """Drop expired entries, then evict down to the byte budget."""
+        now = int(time.time())
+        self.db.execute("BEGIN IMMEDIATE")
+        try:
+            expired = self.db.execute(
+                "SELECT key, blob, size FROM entries WHERE expires_at IS NOT NULL AND expires_at <= ?", (now,)
+            ).fetchall()
+            for key, blob, size in expired:
+                self._delete_entry(key, blob, size)
+            self._bump("expired", len(expired))
+            evicted = self._evict_locked()
+            self.db.execute("COMMIT")
+        except Exception:
+            self.db.execute("ROLLBACK")
+            raise
+        return {"expired": len(expired), "evicted": evicted}
+
+    def stats(self) -> Dict[str, int]:
+        out = dict(self.db.execute("SELECT name, value FROM stats").fetchall())
+        out["entries"] = self.db.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        out["blobs"] = self.db.execute("SELECT COUNT(DISTINCT blob) FROM entries").fetchone()[0]
+        out["max_bytes"] = self.max_bytes
+        lookups = out["hits"] + out["misses"]
+        out["hit_rate_pct"] = round(100.0 * out["hits"] / lookups, 1) if lookups else 0.0
+        return out
+
+    def close(self) -> None:
+        self.db.close()
+
+
+def import_store(cache: ResponseCache, store: Path, manifest: Path, ttl: Optional[int]) -> int:
+    """Load pregenerate.py results (objects/ab/<id>.json) using the manifest for the prompt messages."""
+    imported = 0
+    with open(manifest, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            obj = store / "objects" / record["id"][:2] / f"{record['id']}.json"
+            if not obj.exists():
+                continue
+            content = json.loads(obj.read_text(encoding="utf-8")).get("content")
+            if not content:
+                continue
+            cache.put(key_for_record(record), content, record["function"], record.get("level", ""),
+                      record.get("number", 0), record.get("template_version", ""), ttl=ttl)
+            imported += 1
+    return imported
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage the ask_agent / mcq_widget response cache.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    for name in ("stats", "gc", "get", "import"):
+        p = sub.add_parser(name)
+        p.add_argument("--cache", required=True, help="Cache folder")
+        p.add_argument("--max-bytes", type=int, help="Byte budget for blobs (stored in the cache)")
+        if name == "get":
+            p.add_argument("--key", required=True)
+        if name == "import":
+            p.add_argument("--store", required=True, help="pregenerate.py store folder")
+            p.add_argument("--manifest", required=True, help="prompt_manifest.py output used for that store")
+            p.add_argument("--ttl", type=int, default=DEFAULT_TTL, help="Seconds (0 = never expires)")
+    args = parser.parse_args()
+
+    cache = ResponseCache(args.cache, max_bytes=args.max_bytes)
+    try:
+        if args.command == "get":
+            content = cache.get(args.key)
+            if content is None:
+                print("miss", file=sys.stderr)
+                sys.exit(1)
+            sys.stdout.write(content)
+        elif args.command == "gc":
+            result = cache.gc()
+            print(f"✓ Removed {result['expired']} expired, evicted {result['evicted']}")
+        elif args.command == "import":
+            count = import_store(cache, Path(args.store), Path(args.manifest), args.ttl)
+            print(f"✓ Imported {count} responses")
+        if args.command in ("stats", "gc", "import"):
+            for name, value in sorted(cache.stats().items()):
+                print(f"  {name:<14} {value}")
+    finally:
+        cache.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Build a section-style corpus (syllabus_gate_biochemistry/section_NN.yaml:
+concept schema plus a title/topic/section_title learning_path, no batch.csv)
+in one parallel pass:
+
+  batch.csv               topic,filename_prefix; topics come from metadata.syllabus_line
+                          ("Section 4: Quantum Mechanics - ..." -> "Quantum Mechanics",
+                          otherwise its first clause) unless a batch.csv is already there
+  section_NN_concepts.html  1-month concepts page (derive_plans renderers; --plans adds more)
+  syllabus300.json        topics -> lessons (textbook_style_content) -> chapters (section titles)
+  mcq_scaffold.json       one bank per section and level (<level>_NN, as under MCQ/<subject>/)
+                          with the question count and MCQ prompts the pages link to
+
+Units are read through unit_model.load_unit_model (bundle-aware, cached), one
+process per section; pages and JSON go through output_sink, so unchanged
+files are left alone.
+
+Usage:
+  python section_corpus.py --corpus syllabus_gate_biochemistry
+  python section_corpus.py --corpus ... --out /tmp/biochem --plans 1_month,6_months
+  python section_corpus.py --corpus ... --dry-run      # print the derived topics only
+
+Requirements:
+  pip install pyyaml
+"""
+
+import argparse
+import csv
+import io
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from derive_plans import render_page
+from output_sink import OutputSink, write_atomic
+from payload_lib import LEVELS, PLAN_PROFILES, iter_page_blocks, load_csv_mapping
+from unit_model import Unit, load_unit_model
+from yaml_full_extractor import to_snake_case
+
+
+SECTION_UNIT_RE = re.compile(r"^section_(\d+(?:_\d+)*)\.yaml$")
+SECTION_PREFIX_RE = re.compile(r"^\s*Section\s+\d+\s*:\s*(.+?)\s+-\s")
+CLAUSE_SPLIT_RE = re.compile(r"[;.](?:\s|$)")
+# Section units name learning_path items by "title", not "topic".
+SECTION_PROFILES = {plan: dict(profile, item_lesson="name") for plan, profile in PLAN_PROFILES.items()}
+
+
+# -------------------- Topics --------------------
+def topic_from_syllabus_line(syllabus_line: str) -> str:
+    """'Enzyme kinetics, regulation and inhibition; Vitamins ...' -> 'Enzyme kinetics, regulation and inhibition'."""
+    m = SECTION_PREFIX_RE.match(syllabus_line)
+    if m:
+        return m.group(1).strip()
+    first = CLAUSE_SPLIT_RE.split(syllabus_line.strip(), 1)[0]
+    return first.split(":", 1)[0].strip()
+
+
+def section_units(corpus: Path) -> List[Path]:
+    def key(p: Path):
+        return tuple(int(n) for n in SECTION_UNIT_RE.match(p.name).group(1).split("_"))
+    return sorted((p for p in corpus.glob("section_*.yaml") if SECTION_UNIT_RE.match(p.name)), key=key)
+
+
+def bank_number(path: Path) -> int:
+    """MCQ bank number from the file name, not its position: section_07 -> 7, section_2_3 -> 203."""
+    number = 0
+    for part in SECTION_UNIT_RE.match(path.name).group(1).split("_"):
+        number = number * 100 + int(part)
+    return number
+
+
+def derive_mapping(units: List[Path]) -> Dict[str, str]:
+    """filename_prefix -> topic; repeated topics get ' (Section N)' so topic keys stay distinct."""
+    topics = {p.stem: topic_from_syllabus_line(load_unit_model(p).syllabus_line) or p.stem for p in units}
+    seen: Dict[str, int] = {}
+    for topic in topics.values():
+        seen[topic] = seen.get(topic, 0) + 1
+    return {stem: (f"{topic} ({stem.replace('_', ' ').title()})" if seen[topic] > 1 else topic)
+            for stem, topic in topics.items()}
+
+
+# -------------------- Per-section work --------------------
+def syllabus_lessons(unit: Unit) -> List[Dict]:
+    """yaml_full_extractor.py shape, reading topic/section_title where lesson/section_heading are absent."""
+    lessons = []
+    for item in unit.learning_path:
+        for lesson in item.lessons:
+            name = lesson.name.strip()
+            if not name:
+                continue
+            lessons.append({
+                "lesson": name,
+                "lesson_key": to_snake_case(name),
+                "chapters": [{"chapter": sec.heading.strip()} for sec in lesson.sections if sec.heading.strip()],
+            })
+    return lessons
+
+
+def mcq_banks(unit: Unit, stem: str, topic: str, bank_no: int) -> List[Dict]:
+    """One bank per level: the MCQ links of the concepts page, grouped by level."""
+    profile = SECTION_PROFILES["1_month"]
+    banks = {level: {"bank": f"{level}_{bank_no:02d}", "unit": stem, "topic": topic, "level": level,
+                     "questions": 0, "prompts": []} for level in LEVELS}
+    for _, sets in iter_page_blocks(unit, profile, topic):
+        for links in sets:
+            for link in links:
+                if link.function == "mcq_widget":
+                    bank = banks[link.level]
+                    bank["questions"] += link.number
+                    bank["prompts"].append({"lesson": link.lesson, "number": link.number, "agent_text": link.agent_text})
+    return list(banks.values())
+
+
+def build_section(path: str, topic: str, plans: Tuple[str, ...], bank_no: int) -> Dict:
+    """Worker: everything one section contributes, rendered in memory."""
+    unit = load_unit_model(path)
+    stem = Path(path).stem
+    pages = {f"{stem}{SECTION_PROFILES[plan]['html_suffix']}": render_page(unit, SECTION_PROFILES[plan], topic)
+             for plan in plans}
+    return {
+        "stem": stem,
+        "subject": unit.subject.strip(),
+        "pages": pages,
+        "lessons": syllabus_lessons(unit),
+        "banks": mcq_banks(unit, stem, topic, bank_no),
+    }
+
+
+# -------------------- Build --------------------
+def build(corpus: Path, out: Path, plans: List[str], workers: int) -> int:
+    units = section_units(corpus)
+    if not units:
+        print(f"Error: no section_NN.yaml files in '{corpus}'")
+        return 1
+    batch_path = corpus / "batch.csv"
+    if batch_path.exists():
+        mapping = load_csv_mapping(batch_path)
+        missing = [p.name for p in units if p.stem not in mapping]
+        if missing:
+            print(f"⚠ batch.csv has no row for {', '.join(missing)}; deriving their topics")
+            mapping.update({k: v for k, v in derive_mapping(units).items() if k not in mapping})
+    else:
+        mapping = derive_mapping(units)
+
+    started = time.monotonic()
+    args = ([str(p) for p in units], [mapping[p.stem] for p in units], [tuple(plans)] * len(units),
+            [bank_number(p) for p in units])
+    with ProcessPoolExecutor(max_workers=max(1, min(workers, len(units)))) as pool:
+        results = list(pool.map(build_section, *args))
+
+    subject = next((r["subject"] for r in results if r["subject"]), "")
+    syllabus = {"subject": subject or None, "subject_key": to_snake_case(subject) if subject else None, "topics": []}
+    scaffold = {"subject": subject, "subject_key": to_snake_case(subject) if subject else "", "banks": []}
+    with OutputSink(announce="Generated") as sink:
+        for result in results:
+            for name, html in result["pages"].items():
+                sink.write(out / name, html)
+            topic = mapping[result["stem"]]
+            syllabus["topics"].append({"topic": topic, "topic_key": to_snake_case(topic), "lessons": result["lessons"]})
+            scaffold["banks"].extend(result["banks"])
+        sink.write(out / "syllabus300.json", json.dumps(syllabus, indent=2, ensure_ascii=False))
+        sink.write(out / "mcq_scaffold.json", json.dumps(scaffold, indent=2, ensure_ascii=False))
+    if not batch_path.exists() or out.resolve() != corpus.resolve():
+        rows = io.StringIO()
+        writer = csv.writer(rows, lineterminator="\n")
+        writer.writerow(["topic", "filename_prefix"])
+        writer.writerows([mapping[p.stem], p.stem] for p in units)
+        write_atomic(out / "batch.csv", rows.getvalue())
+
+    chapters = sum(len(l["chapters"]) for t in syllabus["topics"] for l in t["lessons"])
+    print(f"✓ {corpus.name}: {len(units)} section(s), {len(scaffold['banks'])} MCQ bank(s), "
+          f"{chapters} syllabus chapters; files {sink.summary()} in {time.monotonic() - started:.2f}s")
+    return 1 if sink.counts["failed"] else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build pages, syllabus JSON and MCQ scaffolding for a section_NN.yaml corpus.")
+    parser.add_argument("--corpus", required=True, help="Folder with section_NN.yaml files")
+    parser.add_argument("--out", help="Output folder (default: the corpus folder)")
+    parser.add_argument("--plans", default="1_month", help="Comma list of page plans (payload_lib.PLAN_PROFILES)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Worker processes")
+    parser.add_argument("--dry-run", action="store_true", help="Print the derived topic per section and exit")
+    args = parser.parse_args()
+
+    corpus = Path(args.corpus)
+    if not corpus.is_dir():
+        print(f"Error: Folder '{corpus}' does not exist.")
+        sys.exit(1)
+    plans = [p.strip() for p in args.plans.split(",") if p.strip()]
+    unknown = [p for p in plans if p not in PLAN_PROFILES]
+    if unknown:
+        print(f"Error: unknown plan(s) {', '.join(unknown)}; known: {', '.join(PLAN_PROFILES)}")
+        sys.exit(1)
+    suffixes = [PLAN_PROFILES[p]["html_suffix"] for p in plans]
+    if len(set(suffixes)) != len(suffixes):
+        print(f"Error: plans {', '.join(plans)} write the same page names ({', '.join(suffixes)}); pick one of each")
+        sys.exit(1)
+
+    if args.dry_run:
+        for stem, topic in derive_mapping(section_units(corpus)).items():
+            print(f"{stem:14s} {topic}")
+        return
+    sys.exit(build(corpus, Path(args.out) if args.out else corpus, plans, args.workers))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+Typed, immutable in-memory model of a unit YAML.
+
+  Unit
+    subject, target, syllabus_line                         (metadata)
+    core, related: Tuple[Concept]                          (concepts.core / concepts.related)
+    learning_path: Tuple[LearningPathItem]
+      id, topic, title, learning_objectives, text_objectives, milestone, duration_days, tags
+      lessons: Tuple[Lesson]                               (textbook_style_content)
+        lesson, topic
+        sections: Tuple[Section]                           (section_heading / section_title, section_type)
+
+Records are frozen __slots__ dataclasses; metadata, tags and section_type
+strings are interned, so a whole-corpus load shares one copy of each. Text
+fields hold str(value) exactly as the generators format it (missing -> "",
+null -> "None") and non-dict/non-list entries are dropped the way
+payload_lib does. Every page renderer (the 1/3/6-month generators,
+derive_plans, section_corpus) reads units through this model and
+payload_lib.iter_page_blocks, and the yaml_*_extractor syllabus builders
+read it too; there is no raw-dict rendering path left.
+
+Usage:
+  from unit_model import load_unit_model
+  unit = load_unit_model("GATE-Chemistry/6-months-moodle-payload/inorganic_chemistry/unit_01.yaml")
+  for item in unit.learning_path:
+      for lesson in item.lessons: ...
+
+  python unit_model.py --root .. --stats        # load the whole corpus, report memory
+
+Requirements:
+  pip install pyyaml
+"""
+
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Tuple
+
+from payload_lib import load_unit
+
+
+def _text(d: Dict, key: str) -> str:
+    return str(d.get(key, ''))
+
+
+def _itext(d: Dict, key: str) -> str:
+    return sys.intern(str(d.get(key, '')))
+
+
+def _dicts(value) -> Tuple[Dict, ...]:
+    if not isinstance(value, list):
+        return ()
+    return tuple(v for v in value if isinstance(v, dict))
+
+
+@dataclass(frozen=True, slots=True)
+class Concept:
+    name: str
+    clarifier: str
+
+    @classmethod
+    def from_dict(cls, d: Dict) -> "Concept":
+        return cls(_text(d, 'name'), _text(d, 'clarifier'))
+
+
+@dataclass(frozen=True, slots=True)
+class Section:
+    section_heading: str
+    section_title: str
+    section_type: str
+
+    @property
+    def heading(self) -> str:
+        """section_heading, or section_title in units that use that key."""
+        return self.section_heading or self.section_title
+
+    @classmethod
+    def from_dict(cls, d: Dict) -> "Section":
+        return cls(_text(d, 'section_heading'), _text(d, 'section_title'), _itext(d, 'section_type'))
+
+
+@dataclass(frozen=True, slots=True)
+class Lesson:
+    lesson: str
+    topic: str
+    sections: Tuple[Section, ...]
+
+    @property
+    def name(self) -> str:
+        return self.lesson or self.topic
+
+    @classmethod
+    def from_dict(cls, d: Dict) -> "Lesson":
+        return cls(_text(d, 'lesson'), _text(d, 'topic'),
+                   tuple(Section.from_dict(s) for s in _dicts(d.get('sections'))))
+
+
+@dataclass(frozen=True, slots=True)
+class LearningPathItem:
+    id: str
+    topic: str
+    title: str
+    learning_objectives: Tuple[str, ...]
+    text_objectives: Tuple[str, ...]       # only the objectives written as strings (syllabus extractors)
+    lessons: Tuple[Lesson, ...]
+    milestone: str
+    duration_days: str
+    tags: Tuple[str, ...]
+
+    @property
+    def name(self) -> str:
+        return self.topic or self.title
+
+    @property
+    def tags_value(self) -> str:
+        """data-tags value: comma-joined list."""
+        return ",".join(self.tags)
+
+    @classmethod
+    def from_dict(cls, d: Dict) -> "LearningPathItem":
+        tags = d.get('tags', [])
+        if isinstance(tags, list):
+            tag_tuple = tuple(sys.intern(str(t)) for t in tags)
+        else:
+            tag_tuple = () if tags is None else (sys.intern(str(tags)),)
+        objectives = d.get('learning_objectives')
+        if not isinstance(objectives, list):
+            objectives = []
+        rendered = tuple(str(o) for o in objectives)
+        # Share the tuple in the usual all-strings case.
+        texts = rendered if all(isinstance(o, str) for o in objectives) else tuple(
+            o for o in objectives if isinstance(o, str))
+        return cls(
+            id=_text(d, 'id'),
+            topic=_text(d, 'topic'),
+            title=_text(d, 'title'),
+            learning_objectives=rendered,
+            text_objectives=texts,
+            lessons=tuple(Lesson.from_dict(t) for t in _dicts(d.get('textbook_style_content'))),
+            milestone=_text(d, 'milestone'),
+            duration_days=_text(d, 'duration_days'),
+            tags=tag_tuple,
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class Unit:
+    subject: str
+    target: str
+    syllabus_line: str
+    core: Tuple[Concept, ...]
+    related: Tuple[Concept, ...]
+    learning_path: Tuple[LearningPathItem, ...]
+
+    @property
+    def concepts(self) -> Tuple[Concept, ...]:
+        return self.core + self.related
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "Unit":
+        metadata = data.get('metadata') or {}
+        if not isinstance(metadata, dict):
+            metadata = {}
+        concepts = data.get('concepts') or {}
+        if not isinstance(concepts, dict):
+            concepts = {}
+        return cls(
+            subject=_itext(metadata, 'subject'),
+            target=_itext(metadata, 'target'),
+            syllabus_line=_text(metadata, 'syllabus_line'),
+            core=tuple(Concept.from_dict(c) for c in _dicts(concepts.get('core'))),
+            related=tuple(Concept.from_dict(c) for c in _dicts(concepts.get('related'))),
+            learning_path=tuple(LearningPathItem.from_dict(i) for i in _dicts(data.get('learning_path'))),
+        )
+
+
+@lru_cache(maxsize=4096)
+def _load_cached(path: str, mtime_ns: int, size: int) -> Unit:
+    return Unit.from_dict(load_unit(path))
+
+
+def load_unit_model(yaml_path) -> Unit:
+    """Parse and convert a unit once per process (re-read when the file changes)."""
+    path = os.path.abspath(yaml_path)
+    st = os.stat(path)
+    return _load_cached(path, st.st_mtime_ns, st.st_size)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load unit YAML into the typed model and report its footprint.")
+    parser.add_argument("--root", default=str(Path(__file__).resolve().parent.parent), help="Corpus root")
+    parser.add_argument("--stats", action="store_true", help="Compare memory of raw dicts vs the model")
+    args = parser.parse_args()
+
+    paths = sorted(p for p in Path(args.root).rglob("*.yaml") if ".git" not in p.parts)
+    if not args.stats:
+        started = time.monotonic()
+        units = [load_unit_model(p) for p in paths]
+        print(f"✓ {len(units)} units, {sum(len(u.learning_path) for u in units)} learning_path items "
+              f"in {time.monotonic() - started:.1f}s")
+        return
+
+    # Resident size after loading the whole corpus (parser temporaries freed).
+    tracemalloc.start()
+    raw = [load_unit(p) for p in paths]
+    raw_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del raw
+
+    tracemalloc.start()
+    units = [Unit.from_dict(load_unit(p)) for p in paths]
+    model_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    print(f"raw dicts : {raw_bytes / 1e6:7.1f} MB")
+    print(f"unit model: {model_bytes / 1e6:7.1f} MB ({model_bytes / raw_bytes:.0%} of raw) for {len(units)} units")
+
+
+if __name__ == "__main__":
+    main()
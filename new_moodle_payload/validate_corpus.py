@@ -0,0 +1,349 @@
+#!/usr/bin/env python3
+"""
+Validate every unit YAML against one declarative schema, in parallel, with
+verdicts cached by file content.
+
+Three unit styles share the schema below:
+  concept         metadata + concepts.core/related              (unit_XX_concepts.yaml, 1-month units)
+  learning_path   + learning_path[*].topic / lesson / section_heading
+  section         + learning_path[*].title / topic / section_title   (syllabus_gate_biochemistry, CSIRCHEM sections)
+
+The schema is compiled once per process into checker closures. Each finding
+names its exact location, e.g.
+  learning_path[3].learning_objectives[1]: expected string, got mapping
+Errors break the generators (wrong types, missing keys); warnings are
+tolerated by them (unknown keys, unusual section_type spellings).
+
+Verdicts are cached in --cache by sha256 of the file bytes and of this
+script, so an unchanged corpus re-validates without parsing anything.
+
+Usage:
+  python validate_corpus.py                                   # whole repository
+  python validate_corpus.py --root GATE-Chemistry --report validation.json
+  python validate_corpus.py --strict                          # warnings fail too (CI)
+
+Requirements:
+  pip install pyyaml
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+import yaml
+
+from payload_lib import SafeLoader
+
+
+HERE = Path(__file__).resolve().parent
+DEFAULT_ROOT = HERE.parent
+DEFAULT_CACHE = HERE / ".validate_cache.json"
+SKIP_DIRS = {".git", "__pycache__", ".venv", "venv", "node_modules", ".artifact_store"}
+
+
+# -------------------- Schema --------------------
+TEXT = {"type": "str"}
+OPTIONAL_TEXT = {"type": "str", "optional": True, "nullable": True, "empty": True}
+SECTION_TYPE = {"type": "str", "enum": ["overview", "core_theory", "related_concepts"], "enum_severity": "warning"}
+
+METADATA = {"type": "map", "fields": {"subject": TEXT, "target": TEXT, "syllabus_line": TEXT}}
+CONCEPT = {"type": "map", "fields": {"name": TEXT, "clarifier": TEXT}}
+CONCEPTS = {"type": "map", "fields": {
+    "core": {"type": "list", "items": CONCEPT, "min": 1},
+    "related": {"type": "list", "items": CONCEPT, "optional": True, "nullable": True},
+}}
+# Only the 1-month page reads concepts; *_learning.yaml views carry the learning_path alone.
+OPTIONAL_CONCEPTS = dict(CONCEPTS, optional=True)
+
+
+def learning_path_schema(item_key: str, lesson_key: str, heading_key: str) -> Dict:
+    """learning_path spec; the styles differ only in which key names the item, lesson and section."""
+    section = {"type": "map", "fields": {heading_key: TEXT, "section_type": SECTION_TYPE}}
+    lesson = {"type": "map", "fields": {lesson_key: TEXT, "sections": {"type": "list", "items": section, "min": 1}}}
+    item = {"type": "map", "fields": {
+        "id": {"type": "int"},
+        item_key: TEXT,
+        "learning_objectives": {"type": "list", "items": TEXT, "min": 1},
+        "textbook_style_content": {"type": "list", "items": lesson, "optional": True},
+        "milestone": OPTIONAL_TEXT,
+        "duration_days": {"type": "int", "optional": True, "nullable": True},
+        "tags": {"type": "list", "items": TEXT, "optional": True, "nullable": True},
+    }}
+    return {"type": "list", "items": item, "min": 1}
+
+
+UNIT_COUNTS = {"total_core_concepts": {"type": "int", "optional": True},
+               "total_titles": {"type": "int", "optional": True}}
+
+SCHEMA: Dict[str, Dict] = {
+    "concept": {"type": "map", "fields": dict(
+        metadata=METADATA, concepts=CONCEPTS, **UNIT_COUNTS)},
+    "learning_path": {"type": "map", "fields": dict(
+        metadata=METADATA, concepts=OPTIONAL_CONCEPTS,
+        learning_path=learning_path_schema("topic", "lesson", "section_heading"), **UNIT_COUNTS)},
+    "section": {"type": "map", "fields": dict(
+        metadata=METADATA, concepts=OPTIONAL_CONCEPTS,
+        learning_path=learning_path_schema("title", "topic", "section_title"), **UNIT_COUNTS)},
+}
+
+
+# -------------------- Compiler --------------------
+Findings = List[Tuple[str, str, str]]            # (severity, path, message)
+Checker = Callable[[object, str, Findings], None]
+
+TYPE_NAMES = {dict: "mapping", list: "list", str: "string", int: "integer", float: "number",
+              bool: "boolean", type(None): "null"}
+
+
+def _type_name(value) -> str:
+    return TYPE_NAMES.get(type(value), type(value).__name__)
+
+
+def _join(path: str, key: str) -> str:
+    return f"{path}.{key}" if path else key
+
+
+def compile_spec(spec: Dict) -> Checker:
+    """Turn one spec node into a checker closure (done once; checking is then plain calls)."""
+    kind = spec["type"]
+    nullable = spec.get("nullable", False)
+
+    if kind == "str":
+        allow_empty = spec.get("empty", False)
+        enum = frozenset(spec.get("enum", ()))
+        enum_severity = spec.get("enum_severity", "error")
+
+        def check_str(value, path, out):
+            if value is None and nullable:
+                return
+            if not isinstance(value, str):
+                out.append(("error", path, f"expected string, got {_type_name(value)}"))
+            elif not allow_empty and not value.strip():
+                out.append(("error", path, "empty string"))
+            elif enum and value not in enum:
+                out.append((enum_severity, path, f"'{value}' is not one of {', '.join(sorted(enum))}"))
+        return check_str
+
+    if kind == "int":
+        def check_int(value, path, out):
+            if value is None and nullable:
+                return
+            if not isinstance(value, int) or isinstance(value, bool):
+                out.append(("error", path, f"expected integer, got {_type_name(value)}"))
+        return check_int
+
+    if kind == "list":
+        item_check = compile_spec(spec["items"])
+        min_items = spec.get("min", 0)
+
+        def check_list(value, path, out):
+            if value is None and nullable:
+                return
+            if not isinstance(value, list):
+                out.append(("error", path, f"expected list, got {_type_name(value)}"))
+                return
+            if len(value) < min_items:
+                out.append(("error", path, f"needs at least {min_items} item(s), has {len(value)}"))
+            for i, item in enumerate(value):
+                item_check(item, f"{path}[{i}]", out)
+        return check_list
+
+    if kind == "map":
+        fields = [(name, compile_spec(sub), sub.get("optional", False)) for name, sub in spec["fields"].items()]
+        known = frozenset(spec["fields"])
+
+        def check_map(value, path, out):
+            if value is None and nullable:
+                return
+            if not isinstance(value, dict):
+                out.append(("error", path or "$", f"expected mapping, got {_type_name(value)}"))
+                return
+            for name, check, optional in fields:
+                if name in value:
+                    check(value[name], _join(path, name), out)
+                elif not optional:
+                    out.append(("error", _join(path, name), "missing required key"))
+            for name in value:
+                if name not in known:
+                    out.append(("warning", _join(path, str(name)), "unknown key"))
+        return check_map
+
+    raise ValueError(f"unknown schema type {kind!r}")
+
+
+_compiled: Dict[str, Checker] = {}
+
+
+def checker_for(style: str) -> Checker:
+    if style not in _compiled:
+        _compiled[style] = compile_spec(SCHEMA[style])
+    return _compiled[style]
+
+
+def detect_style(data: Dict) -> str:
+    learning_path = data.get("learning_path")
+    if learning_path is None:
+        return "concept"
+    if isinstance(learning_path, list):
+        for item in learning_path:
+            if isinstance(item, dict):
+                return "section" if "title" in item and "topic" not in item else "learning_path"
+    return "learning_path"
+
+
+def validate_bytes(raw: bytes) -> Dict:
+    """Verdict for one file's bytes: {"style", "errors": [[path, msg]], "warnings": [[path, msg]]}."""
+    try:
+        data = yaml.load(raw.decode("utf-8"), Loader=SafeLoader)
+    except UnicodeDecodeError as e:
+        return {"style": None, "errors": [["$", f"not UTF-8: {e}"]], "warnings": []}
+    except yaml.YAMLError as e:
+        mark = getattr(e, "problem_mark", None)
+        where = f"line {mark.line + 1}, column {mark.column + 1}: " if mark else ""
+        problem = getattr(e, "problem", None) or str(e).splitlines()[0]
+        return {"style": None, "errors": [["$", f"YAML syntax: {where}{problem}"]], "warnings": []}
+    if not isinstance(data, dict):
+        return {"style": None, "errors": [["$", f"expected mapping at top level, got {_type_name(data)}"]],
+                "warnings": []}
+    style = detect_style(data)
+    findings: Findings = []
+    checker_for(style)(data, "", findings)
+    return {
+        "style": style,
+        "errors": [[p, m] for sev, p, m in findings if sev == "error"],
+        "warnings": [[p, m] for sev, p, m in findings if sev == "warning"],
+    }
+
+
+def _validate_job(job: Tuple[str, bytes]) -> Tuple[str, Dict]:
+    digest, raw = job
+    return digest, validate_bytes(raw)
+
+
+# -------------------- Driver --------------------
+def schema_fingerprint() -> str:
+    return hashlib.sha256(Path(__file__).read_bytes()).hexdigest()[:16]
+
+
+def iter_yaml_files(root: Path):
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = sorted(d for d in dirnames if d not in SKIP_DIRS)
+        for name in sorted(filenames):
+            if name.endswith((".yaml", ".yml")):
+                yield Path(dirpath) / name
+
+
+def load_cache(path: Path, fingerprint: str) -> Dict[str, Dict]:
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    return data.get("verdicts", {}) if data.get("schema") == fingerprint else {}
+
+
+def save_cache(path: Path, fingerprint: str, verdicts: Dict[str, Dict]) -> None:
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(json.dumps({"schema": fingerprint, "verdicts": verdicts}, separators=(",", ":")),
+                   encoding="utf-8")
+    tmp.replace(path)
+
+
+def run(root: Path, cache_path: Optional[Path], workers: int) -> Tuple[List[Dict], Dict[str, int]]:
+    fingerprint = schema_fingerprint()
+    cache = load_cache(cache_path, fingerprint) if cache_path else {}
+    files: List[Tuple[Path, str]] = []
+    jobs: Dict[str, bytes] = {}
+    cached = duplicates = 0
+    for path in iter_yaml_files(root):
+        raw = path.read_bytes()
+        digest = hashlib.sha256(raw).hexdigest()
+        files.append((path, digest))
+        if digest in cache:
+            cached += 1
+        elif digest in jobs:
+            duplicates += 1  # same bytes as a file already queued this run
+        else:
+            jobs[digest] = raw
+
+    verdicts: Dict[str, Dict] = {}
+    if jobs:
+        if workers > 1 and len(jobs) > 8:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                for digest, verdict in pool.map(_validate_job, jobs.items(), chunksize=16):
+                    verdicts[digest] = verdict
+        else:
+            for job in jobs.items():
+                digest, verdict = _validate_job(job)
+                verdicts[digest] = verdict
+
+    if cache_path:
+        save_cache(cache_path, fingerprint, {d: cache.get(d) or verdicts[d] for _, d in files})
+
+    results = []
+    counts = {"files": len(files), "validated": len(jobs), "cached": cached, "duplicates": duplicates,
+              "errors": 0, "warnings": 0, "files_with_errors": 0}
+    for path, digest in files:
+        verdict = verdicts.get(digest) or cache[digest]
+        counts["errors"] += len(verdict["errors"])
+        counts["warnings"] += len(verdict["warnings"])
+        counts["files_with_errors"] += bool(verdict["errors"])
+        try:
+            shown = path.relative_to(root)
+        except ValueError:
+            shown = path
+        results.append({"path": shown.as_posix(), "style": verdict["style"], "sha256": digest,
+                        "errors": verdict["errors"], "warnings": verdict["warnings"]})
+    return results, counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Validate unit YAML files against the corpus schema.")
+    parser.add_argument("--root", default=str(DEFAULT_ROOT), help="Folder to scan (default: repository root)")
+    parser.add_argument("--cache", default=str(DEFAULT_CACHE), help="Verdict cache file ('' to disable)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Worker processes")
+    parser.add_argument("--report", help="Write the JSON report here")
+    parser.add_argument("--strict", action="store_true", help="Exit non-zero on warnings too")
+    parser.add_argument("--quiet", action="store_true", help="Only print the summary")
+    args = parser.parse_args()
+
+    root = Path(args.root)
+    if not root.is_dir():
+        print(f"Error: '{root}' is not a folder")
+        sys.exit(1)
+
+    started = time.monotonic()
+    results, counts = run(root, Path(args.cache) if args.cache else None, args.workers)
+    elapsed = time.monotonic() - started
+
+    if not args.quiet:
+        for result in results:
+            for p, m in result["errors"]:
+                print(f"❌ {result['path']}: {p}: {m}")
+            for p, m in result["warnings"]:
+                print(f"⚠ {result['path']}: {p}: {m}")
+
+    if args.report:
+        report = {"schema": schema_fingerprint(), "root": str(root.resolve()), "elapsed_s": round(elapsed, 3),
+                  **counts, "results": [r for r in results if r["errors"] or r["warnings"]]}
+        Path(args.report).write_text(json.dumps(report, ensure_ascii=False, indent=1), encoding="utf-8")
+
+    styles: Dict[str, int] = {}
+    for r in results:
+        styles[r["style"] or "unreadable"] = styles.get(r["style"] or "unreadable", 0) + 1
+    print(f"{'✓' if not counts['errors'] else '❌'} {counts['files']} files "
+          f"({', '.join(f'{k} {v}' for k, v in sorted(styles.items()))}): "
+          f"{counts['errors']} error(s) in {counts['files_with_errors']} file(s), {counts['warnings']} warning(s); "
+          f"{counts['validated']} validated, {counts['cached']} cached, {counts['duplicates']} duplicate(s), "
+          f"{elapsed:.2f}s")
+    failed = counts["errors"] or (args.strict and counts["warnings"])
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,13 +2,19 @@
 """
 YAML Concept Extractor
 Extracts metadata and concepts sections from YAML files and saves them as separate files.
+
+The extraction is payload_lib's "concept" view; other tools read it with
+load_view() directly, so run this only when the *_concept.yaml files
+themselves are wanted (see also export_views.py).
 """
 
-import yaml
 import argparse
 import os
 from pathlib import Path
 
+from output_sink import write_atomic
+from payload_lib import dump_view, load_view, view_name
+
 def extract_concepts(yaml_file_path):
     """
     Extract metadata and concepts from a YAML file.
@@ -20,19 +26,7 @@ def extract_concepts(yaml_file_path):
         dict: Dictionary containing metadata and concepts
     """
     try:
-        with open(yaml_file_path, 'r', encoding='utf-8') as f:
-            data = yaml.safe_load(f)
-
-        # Extract only metadata and concepts
-        extracted_data = {}
-
-        if 'metadata' in data:
-            extracted_data['metadata'] = data['metadata']
-
-        if 'concepts' in data:
-            extracted_data['concepts'] = data['concepts']
-
-        return extracted_data
+        return load_view(yaml_file_path, "concept")
 
     except Exception as e:
         print(f"Error processing {yaml_file_path}: {str(e)}")
@@ -55,11 +49,11 @@ def save_concept_file(input_path, extracted_data):
         output_filename = input_file.stem + '_concept' + input_file.suffix
         output_path = input_file.parent / output_filename
 
-        # Save to YAML file
-        with open(output_path, 'w', encoding='utf-8') as f:
-            yaml.dump(extracted_data, f, default_flow_style=False, sort_keys=False, allow_unicode=True)
-
-        print(f"✓ Created: {output_path}")
+        # Save to YAML file (atomic; left alone when already identical)
+        if write_atomic(output_path, dump_view(extracted_data)):
+            print(f"✓ Created: {output_path}")
+        else:
+            print(f"✓ Up to date: {output_path}")
         return str(output_path)
 
     except Exception as e:
@@ -88,8 +82,8 @@ def process_folder(folder_path):
         print(f"Error: '{folder_path}' is not a directory.")
         return
 
-    # Find all YAML files
-    yaml_files = list(folder.glob('*.yaml')) + list(folder.glob('*.yml'))
+    # Find all YAML files (earlier *_concept.yaml output is not re-extracted)
+    yaml_files = [p for p in list(folder.glob('*.yaml')) + list(folder.glob('*.yml')) if view_name(p) is None]
 
     if not yaml_files:
         print(f"No YAML files found in '{folder_path}'")
@@ -8,6 +8,10 @@ from typing import List, Dict, Tuple
 
 import yaml
 
+from output_sink import write_atomic
+from payload_lib import load_unit
+from unit_model import Unit
+
 
 def to_snake_case(text: str) -> str:
     """Convert text to snake_case format."""
@@ -92,81 +96,46 @@ def load_batch_csv(batch_path: str) -> List[Dict[str, str]]:
 def build_lessons_from_yaml(yaml_path: str) -> Tuple[str, str, List[Dict]]:
     """
     Parse YAML file and extract subject and lessons.
-    
+
     Returns:
         Tuple of (subject, subject_key, lessons)
-    
+
     Raises:
         FileNotFoundError: If YAML file doesn't exist
         ValueError: If YAML format is invalid
     """
     if not os.path.isfile(yaml_path):
         raise FileNotFoundError(f"YAML file not found: {yaml_path}")
-    
+
     try:
-        with open(yaml_path, encoding="utf-8") as f:
-            data = yaml.safe_load(f)
-        
-        if data is None:
-            raise ValueError(f"YAML file is empty or invalid")
-        
-        if not isinstance(data, dict):
-            raise ValueError(f"YAML root must be a dictionary, got {type(data)}")
-        
-        # Extract metadata
-        metadata = data.get("metadata", {})
-        if not isinstance(metadata, dict):
-            print(f"  ⚠ WARNING: metadata is not a dict: {type(metadata)}")
-            metadata = {}
-        
-        subject = metadata.get("subject", "").strip()
-        subject_key = to_snake_case(subject) if subject else ""
-        
-        # Extract concepts
-        concepts = data.get("concepts", {})
-        if not isinstance(concepts, dict):
-            print(f"  ⚠ WARNING: concepts is not a dict: {type(concepts)}")
-            concepts = {}
-        
-        core_list = concepts.get("core", [])
-        if core_list is None:
-            core_list = []
-        
-        if not isinstance(core_list, list):
-            print(f"  ⚠ WARNING: concepts.core is not a list: {type(core_list)}")
-            core_list = []
-        
-        lessons = []
-        for idx, core in enumerate(core_list):
-            if not isinstance(core, dict):
-                print(f"  ⚠ WARNING: Skipping non-dict core item {idx}: {type(core)}")
-                continue
-            
-            name = core.get("name", "").strip()
-            clarifier = core.get("clarifier", "").strip()
-            
-            if not name:
-                print(f"  ⚠ WARNING: Skipping core item {idx} with empty name")
-                continue
-            
-            lesson_obj = {
-                "lesson": name,
-                "lesson_key": to_snake_case(name),
-                "chapters": [],
-            }
-            
-            if clarifier:
-                lesson_obj["chapters"].append({"chapter": clarifier})
-            
-            lessons.append(lesson_obj)
-        
-        print(f"  ✓ Parsed {len(lessons)} lessons from YAML")
-        return subject, subject_key, lessons
-        
+        data = load_unit(yaml_path)
     except yaml.YAMLError as e:
-        raise ValueError(f"YAML parsing error: {e}")
-    except Exception as e:
-        raise Exception(f"Unexpected error parsing YAML: {e}")
+        raise ValueError(f"YAML parsing error in {yaml_path}: {e}")
+    if not data:
+        raise ValueError("YAML file is empty or has invalid root (expected mapping)")
+    # unit_model drops non-mapping entries; validate_corpus.py reports them.
+    unit = Unit.from_dict(data)
+    subject = unit.subject.strip()
+    subject_key = to_snake_case(subject) if subject else ""
+
+    lessons = []
+    for idx, core in enumerate(unit.core):
+        name = core.name.strip()
+        clarifier = core.clarifier.strip()
+        if not name:
+            print(f"  ⚠ WARNING: Skipping core item {idx} with empty name")
+            continue
+        lesson_obj = {
+            "lesson": name,
+            "lesson_key": to_snake_case(name),
+            "chapters": [],
+        }
+        if clarifier:
+            lesson_obj["chapters"].append({"chapter": clarifier})
+        lessons.append(lesson_obj)
+
+    print(f"  ✓ Parsed {len(lessons)} lessons from YAML")
+    return subject, subject_key, lessons
 
 
 def main():
@@ -293,9 +262,10 @@ def main():
     # Write output
     output_path = os.path.join(folder, args.output)
     try:
-        with open(output_path, "w", encoding="utf-8") as f:
-            json.dump(syllabus, f, indent=2, ensure_ascii=False)
-        print(f"✓ Successfully wrote output to: {output_path}")
+        if write_atomic(output_path, json.dumps(syllabus, indent=2, ensure_ascii=False)):
+            print(f"✓ Successfully wrote output to: {output_path}")
+        else:
+            print(f"✓ {output_path} already up to date")
         print(f"\nDone! Created syllabus with {len(syllabus['topics'])} topics.")
     except Exception as e:
         print(f"❌ ERROR: Failed to write output file: {e}")
@@ -8,6 +8,10 @@ from typing import List, Dict, Tuple
 
 import yaml
 
+from output_sink import write_atomic
+from payload_lib import load_unit
+from unit_model import Unit
+
 
 def to_snake_case(text: str) -> str:
     """Convert text to snake_case format."""
@@ -102,88 +106,39 @@ def build_lessons_from_yaml(yaml_path: str) -> Tuple[str, str, List[Dict]]:
         raise FileNotFoundError(f"YAML file not found: {yaml_path}")
 
     try:
-        with open(yaml_path, encoding="utf-8") as f:
-            data = yaml.safe_load(f)
-
-        if data is None:
-            raise ValueError("YAML file is empty or invalid")
-
-        if not isinstance(data, dict):
-            raise ValueError(f"YAML root must be a dictionary, got {type(data)}")
-
-        # Extract metadata
-        metadata = data.get("metadata", {})
-        if not isinstance(metadata, dict):
-            print(f"  ⚠ WARNING: metadata is not a dict: {type(metadata)}")
-            metadata = {}
-
-        subject = metadata.get("subject", "").strip()
-        subject_key = to_snake_case(subject) if subject else ""
-
-        # Extract learning_path
-        learning_path = data.get("learning_path", [])
-        if learning_path is None:
-            learning_path = []
-
-        if not isinstance(learning_path, list):
-            print(f"  ⚠ WARNING: learning_path is not a list: {type(learning_path)}")
-            learning_path = []
-
-        lessons: List[Dict] = []
-
-        for idx, path_item in enumerate(learning_path):
-            if not isinstance(path_item, dict):
-                print(
-                    f"  ⚠ WARNING: Skipping non-dict learning_path item {idx}: "
-                    f"{type(path_item)}"
-                )
-                continue
-
-            # Get the topic (your YAML uses 'topic' for lesson name)
-            lesson_name = (path_item.get("topic") or "").strip()
-
-            if not lesson_name:
-                print(f"  ⚠ WARNING: Skipping learning_path item {idx} with empty topic")
-                continue
-
-            # Get learning_objectives (which become chapters)
-            learning_objectives = path_item.get("learning_objectives", [])
-            if learning_objectives is None:
-                learning_objectives = []
-
-            if not isinstance(learning_objectives, list):
-                print(f"  ⚠ WARNING: learning_objectives is not a list for item {idx}")
-                learning_objectives = []
-
-            # Build chapters from learning_objectives
-            chapters: List[Dict[str, str]] = []
-            for obj in learning_objectives:
-                if isinstance(obj, str):
-                    obj_text = obj.strip()
-                    if obj_text:
-                        chapters.append({"chapter": obj_text})
-                else:
-                    print(f"  ⚠ WARNING: Skipping non-string learning_objective: {obj}")
-
-            lesson_obj = {
-                "lesson": lesson_name,
-                "lesson_key": to_snake_case(lesson_name),
-                "chapters": chapters,
-            }
-
-            lessons.append(lesson_obj)
-
-        print(f"  ✓ Parsed {len(lessons)} lessons from learning_path")
-        if lessons:
-            total_chapters = sum(len(lesson["chapters"]) for lesson in lessons)
-            print(f"  ✓ Total chapters (learning objectives): {total_chapters}")
+        data = load_unit(yaml_path)
+    except yaml.YAMLError as e:
+        raise ValueError(f"YAML parsing error in {yaml_path}: {e}")
+    if not data:
+        raise ValueError("YAML file is empty or has invalid root (expected mapping)")
+    # unit_model drops non-mapping entries; validate_corpus.py reports them.
+    unit = Unit.from_dict(data)
+    subject = unit.subject.strip()
+    subject_key = to_snake_case(subject) if subject else ""
+
+    lessons = []
+    for idx, item in enumerate(unit.learning_path):
+        # The topic becomes the lesson name, learning_objectives its chapters
+        lesson_name = item.topic.strip()
+        if not lesson_name:
+            print(f"  ⚠ WARNING: Skipping learning_path item {idx} with empty topic")
+            continue
+        skipped = len(item.learning_objectives) - len(item.text_objectives)
+        if skipped:
+            print(f"  ⚠ WARNING: Skipping {skipped} non-string learning_objective(s) in item {idx}")
+        chapters = [{"chapter": obj.strip()} for obj in item.text_objectives if obj.strip()]
+        lessons.append({
+            "lesson": lesson_name,
+            "lesson_key": to_snake_case(lesson_name),
+            "chapters": chapters,
+        })
 
-        return subject, subject_key, lessons
+    print(f"  ✓ Parsed {len(lessons)} lessons from learning_path")
+    if lessons:
+        total_chapters = sum(len(lesson["chapters"]) for lesson in lessons)
+        print(f"  ✓ Total chapters (learning objectives): {total_chapters}")
 
-    except yaml.YAMLError as e:
-        raise ValueError(f"YAML parsing error: {e}")
-    except Exception as e:
-        raise Exception(f"Unexpected error parsing YAML: {e}")
+    return subject, subject_key, lessons
 
 
 def main():
@@ -319,9 +274,10 @@ def main():
     # Write output
     output_path = os.path.join(folder, args.output)
     try:
-        with open(output_path, "w", encoding="utf-8") as f:
-            json.dump(syllabus, f, indent=2, ensure_ascii=False)
-        print(f"✓ Successfully wrote output to: {output_path}")
+        if write_atomic(output_path, json.dumps(syllabus, indent=2, ensure_ascii=False)):
+            print(f"✓ Successfully wrote output to: {output_path}")
+        else:
+            print(f"✓ {output_path} already up to date")
         print("\nDone! Created syllabus with:")
         print(f"  - {len(syllabus['topics'])} topics")
         print(f"  - {total_lessons} lessons")
@@ -8,6 +8,10 @@ from typing import List, Dict, Tuple
 
 import yaml
 
+from output_sink import write_atomic
+from payload_lib import load_unit
+from unit_model import Unit
+
 
 def to_snake_case(text: str) -> str:
     """Convert text to snake_case format."""
@@ -102,88 +106,37 @@ def build_lessons_from_yaml(yaml_path: str) -> Tuple[str, str, List[Dict]]:
         raise FileNotFoundError(f"YAML file not found: {yaml_path}")
 
     try:
-        with open(yaml_path, encoding="utf-8") as f:
-            data = yaml.safe_load(f)
-
-        if data is None or not isinstance(data, dict):
-            raise ValueError("YAML file is empty or has invalid root (expected mapping)")
-
-        # metadata -> subject
-        metadata = data.get("metadata", {}) or {}
-        if not isinstance(metadata, dict):
-            metadata = {}
-        subject = str(metadata.get("subject", "")).strip()
-        subject_key = to_snake_case(subject) if subject else ""
-
-        # learning_path list
-        learning_path = data.get("learning_path", []) or []
-        if not isinstance(learning_path, list):
-            print(f"⚠ WARNING: learning_path is not a list in {yaml_path}")
-            learning_path = []
-
-        lessons: List[Dict] = []
-
-        for lp_idx, lp_item in enumerate(learning_path):
-            if not isinstance(lp_item, dict):
-                print(f"⚠ WARNING: Skipping non-dict learning_path item {lp_idx} in {yaml_path}")
-                continue
-
-            # textbook_style_content is a list of lesson-blocks
-            tsc = lp_item.get("textbook_style_content", []) or []
-            if not isinstance(tsc, list):
-                print(f"⚠ WARNING: textbook_style_content is not a list at learning_path[{lp_idx}]")
-                continue
-
-            for ct_idx, content_block in enumerate(tsc):
-                if not isinstance(content_block, dict):
-                    print(
-                        f"⚠ WARNING: Skipping non-dict textbook_style_content item "
-                        f"{ct_idx} at learning_path[{lp_idx}]"
-                    )
-                    continue
-
-                lesson_name = str(content_block.get("lesson", "")).strip()
-                if not lesson_name:
-                    print(
-                        f"⚠ WARNING: Skipping textbook_style_content[{ct_idx}] at "
-                        f"learning_path[{lp_idx}] with empty lesson"
-                    )
-                    continue
-
-                sections = content_block.get("sections", []) or []
-                if not isinstance(sections, list):
-                    print(
-                        f"⚠ WARNING: sections is not a list for lesson '{lesson_name}' "
-                        f"in {yaml_path}"
-                    )
-                    sections = []
-
-                chapters = []
-                for sec_idx, sec in enumerate(sections):
-                    if not isinstance(sec, dict):
-                        print(
-                            f"⚠ WARNING: Skipping non-dict section {sec_idx} "
-                            f"for lesson '{lesson_name}'"
-                        )
-                        continue
-                    heading = str(sec.get("section_heading", "")).strip()
-                    if heading:
-                        chapters.append({"chapter": heading})
-
-                lessons.append(
-                    {
-                        "lesson": lesson_name,
-                        "lesson_key": to_snake_case(lesson_name),
-                        "chapters": chapters,
-                    }
-                )
-
-        return subject, subject_key, lessons
-
+        data = load_unit(yaml_path)
     except yaml.YAMLError as e:
         raise ValueError(f"YAML parsing error in {yaml_path}: {e}")
-    except Exception as e:
-        raise Exception(f"Unexpected error parsing {yaml_path}: {e}")
+    if not data:
+        raise ValueError("YAML file is empty or has invalid root (expected mapping)")
+    # unit_model drops non-mapping entries; validate_corpus.py reports them.
+    unit = Unit.from_dict(data)
+    subject = unit.subject.strip()
+    subject_key = to_snake_case(subject) if subject else ""
+
+    lessons: List[Dict] = []
+    for lp_idx, item in enumerate(unit.learning_path):
+        for ct_idx, content_block in enumerate(item.lessons):
+            lesson_name = content_block.lesson.strip()
+            if not lesson_name:
+                print(
+                    f"⚠ WARNING: Skipping textbook_style_content[{ct_idx}] at "
+                    f"learning_path[{lp_idx}] with empty lesson"
+                )
+                continue
+            chapters = [{"chapter": sec.section_heading.strip()}
+                        for sec in content_block.sections if sec.section_heading.strip()]
+            lessons.append(
+                {
+                    "lesson": lesson_name,
+                    "lesson_key": to_snake_case(lesson_name),
+                    "chapters": chapters,
+                }
+            )
+
+    return subject, subject_key, lessons
 
 
 def main():
@@ -272,9 +225,10 @@ def main():
 
     output_path = os.path.join(folder, args.output)
     try:
-        with open(output_path, "w", encoding="utf-8") as f:
-            json.dump(syllabus, f, indent=2, ensure_ascii=False)
-        print(f"✓ Wrote syllabus to {output_path}")
+        if write_atomic(output_path, json.dumps(syllabus, indent=2, ensure_ascii=False)):
+            print(f"✓ Wrote syllabus to {output_path}")
+        else:
+            print(f"✓ {output_path} already up to date")
     except Exception as e:
         print(f"❌ ERROR writing output file: {e}")
         sys.exit(1)